@@ -0,0 +1,128 @@
+# bin_manager/app/db_pool.py
+import asyncio
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Callable, Optional
+
+from bin_manager.db.database import BinDatabase, default_db_path
+
+DEFAULT_POOL_SIZE = 8
+
+
+def pool_size_from_env() -> int:
+    """BIN_DB_POOL_SIZE, or DEFAULT_POOL_SIZE when it is not set."""
+    value = os.getenv('BIN_DB_POOL_SIZE')
+    if value is None:
+        return DEFAULT_POOL_SIZE
+    try:
+        size = int(value)
+    except ValueError:
+        size = 0
+    if size < 1:
+        raise ValueError(f"BIN_DB_POOL_SIZE must be a positive integer, got {value!r}")
+    return size
+
+
+class AsyncDatabase:
+    """Request-scoped handle running BinDatabase calls on the pool's threads.
+
+    `await db.get_total_urls_count()` proxies any BinDatabase method;
+    `await db.run(fn, *args)` runs `fn(database, *args)` for ad hoc queries.
+    """
+
+    def __init__(self, pool: 'DatabasePool', database: BinDatabase):
+        self._pool = pool
+        self._database = database
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        return await self._pool.run_blocking(fn, self._database, *args, **kwargs)
+
+    def __getattr__(self, name: str):
+        method = getattr(self._database, name)
+
+        async def call(*args, **kwargs):
+            return await self._pool.run_blocking(method, *args, **kwargs)
+        return call
+
+
+class DatabasePool:
+    """Fixed set of SQLite connections shared by the API handlers.
+
+    Blocking sqlite3 work runs on a thread pool of the same size, so the
+    event loop keeps serving requests while queries execute. A path or size
+    not given is read from BIN_DB_PATH / BIN_DB_POOL_SIZE by configure(),
+    which the app calls on startup and the pool on first use, not at import.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, size: Optional[int] = None):
+        self.db_path = db_path
+        self.size = size
+        self._idle: 'queue.LifoQueue[BinDatabase]' = queue.LifoQueue()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def configure(self) -> None:
+        """Fill in the path and size not given from the environment; ValueError on a bad size."""
+        if self.db_path is None:
+            self.db_path = default_db_path()
+        if self.size is None:
+            self.size = pool_size_from_env()
+
+    def _ensure_started(self) -> None:
+        if self._executor is None:
+            self.configure()
+            self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix='db-pool')
+            self._slots = asyncio.Semaphore(self.size)
+
+    async def run_blocking(self, fn: Callable, *args, **kwargs):
+        """Run a blocking callable on the pool's threads."""
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    async def acquire(self) -> BinDatabase:
+        """Wait for a free connection, opening a new one while under `size`."""
+        self._ensure_started()
+        await self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            # Connections move between executor threads, one request at a time
+            return await self.run_blocking(BinDatabase, self.db_path, check_same_thread=False)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, database: BinDatabase) -> None:
+        # Drop any transaction a failed handler left open
+        database.conn.rollback()
+        self._idle.put_nowait(database)
+        self._slots.release()
+
+    def close(self) -> None:
+        """Close idle connections and stop the worker threads."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._slots = None
+
+
+db_pool = DatabasePool()
+
+
+async def get_db() -> AsyncIterator[AsyncDatabase]:
+    """FastAPI dependency lending a pooled connection for one request."""
+    database = await db_pool.acquire()
+    try:
+        yield AsyncDatabase(db_pool, database)
+    finally:
+        db_pool.release(database)
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# bin_manager/app/loadtest.py
+"""Measure API throughput and latency as the number of concurrent clients grows.
+
+Against an app that is already running:
+    python -m bin_manager.app.loadtest --path "/api/search?bank=bank&limit=50" --clients 1,2,4,8,16
+
+Or start a local uvicorn on a (synthetic) database and replay a mix of
+search, lookup and stats requests drawn from its contents:
+    python -m bin_manager.db.synthetic --rows 1000000 --out bench.db
+    python -m bin_manager.app.loadtest --serve bench.db --clients 1,4,16 --duration 10
+"""
+import argparse
+import http.client
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+# Share of each request kind in the --serve mix
+SCENARIO_WEIGHTS = (
+    ('search_prefix', 25),
+    ('search_bank', 15),
+    ('search_country_bank', 10),
+    ('lookup', 40),
+    ('stats', 10),
+)
+SAMPLE_SIZE = 1000
+
+PathPicker = Callable[[random.Random], Tuple[str, str]]
+
+
+def _client(host: str, port: int, pick: PathPicker, seed: int, deadline: float,
+            latencies: Dict[str, List[float]], errors: List[int]) -> None:
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    try:
+        while time.perf_counter() < deadline:
+            kind, path = pick(rng)
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors.append(response.status)
+                    continue
+            except (OSError, http.client.HTTPException):
+                errors.append(0)
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+                continue
+            latencies[kind].append(time.perf_counter() - start)
+    finally:
+        conn.close()
+
+
+def _percentile(values: List[float], p: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000 if values else 0.0
+
+
+def _summary(values: List[float], elapsed: float) -> Dict:
+    values.sort()
+    return {
+        'requests': len(values),
+        'rps': len(values) / elapsed,
+        'p50_ms': _percentile(values, 0.50),
+        'p95_ms': _percentile(values, 0.95),
+        'p99_ms': _percentile(values, 0.99),
+    }
+
+
+def run_level(url: str, path, clients: int, duration: float) -> Dict:
+    """Send requests from `clients` keep-alive connections for `duration` seconds.
+
+    `path` is a fixed request path or a callable picking (kind, path) per request.
+    """
+    parts = urlsplit(url)
+    pick = path if callable(path) else (lambda rng: ('request', path))
+    # One latency dict per client thread, merged once they are done
+    per_client = [defaultdict(list) for _ in range(clients)]
+    errors: List[int] = []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=_client, args=(parts.hostname, parts.port or 80, pick, seed,
+                                               deadline, per_client[seed], errors))
+        for seed in range(clients)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    for client_latencies in per_client:
+        for kind, values in client_latencies.items():
+            latencies[kind].extend(values)
+    result = _summary([value for values in latencies.values() for value in values], elapsed)
+    result.update(clients=clients, errors=len(errors),
+                  kinds={kind: _summary(values, elapsed) for kind, values in sorted(latencies.items())})
+    return result
+
+
+def scenario_picker(db_path: str, seed: int = 0) -> PathPicker:
+    """Build a request mix from BINs, issuers and countries sampled from `db_path`."""
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        max_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM bin_cards').fetchone()[0]
+        if not max_id:
+            raise ValueError(f"{db_path} has no BINs to sample")
+        rng = random.Random(seed)
+        sample = []
+        for _ in range(SAMPLE_SIZE):
+            row = conn.execute('SELECT bin_number, pays, emetteur FROM bin_cards WHERE id >= ? LIMIT 1',
+                               (rng.randint(1, max_id),)).fetchone()
+            if row:
+                sample.append(row)
+    finally:
+        conn.close()
+
+    kinds, weights = zip(*SCENARIO_WEIGHTS)
+
+    def pick(rng: random.Random) -> Tuple[str, str]:
+        kind = rng.choices(kinds, weights=weights)[0]
+        bin_number, country, bank = rng.choice(sample)
+        if kind == 'search_prefix':
+            return kind, f"/api/search?bin_prefix={bin_number[:rng.randint(4, 6)]}&limit=50"
+        if kind == 'search_bank':
+            return kind, f"/api/search?bank={quote(bank)}&limit=50"
+        if kind == 'search_country_bank':
+            return kind, f"/api/search?country={quote(country)}&bank={quote(bank)}&limit=50"
+        if kind == 'lookup':
+            pan = bin_number + ''.join(rng.choice('0123456789') for _ in range(16 - len(bin_number)))
+            return kind, f"/api/lookup/{pan}"
+        return kind, "/api/stats"
+    return pick
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(db_path: str, workers: int = 1, pool_size: Optional[int] = None) -> Tuple[subprocess.Popen, str]:
+    """Launch uvicorn serving the app on `db_path` and wait until it answers."""
+    port = _free_port()
+    env = dict(os.environ, BIN_DB_PATH=os.path.abspath(db_path))
+    if pool_size:
+        env['BIN_DB_POOL_SIZE'] = str(pool_size)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'bin_manager.app.main:app', '--host', '127.0.0.1',
+         '--port', str(port), '--workers', str(workers), '--log-level', 'warning'],
+        env=env
+    )
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/api/stats')
+            conn.getresponse().read()
+            conn.close()
+            return process, url
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not start within 30s")
+
+
+def print_results(results: List[Dict]) -> None:
+    base = results[0]['rps'] or 1
+    print(f"{'clients':>8} {'req/s':>9} {'speedup':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for row in results:
+        print(f"{row['clients']:>8} {row['rps']:>9.1f} {row['rps'] / base:>7.2f}x "
+              f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['errors']:>7}")
+        if len(row['kinds']) > 1:
+            for kind, stats in row['kinds'].items():
+                print(f"{'':>8} {stats['rps']:>9.1f} {'':>8} {stats['p50_ms']:>8.2f} "
+                      f"{stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} {'':>7}  {kind}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the BIN Database Manager API')
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of a running web app')
+    parser.add_argument('--path', default='/api/search?bank=bank&limit=50',
+                        help='Request path to hit (ignored with --serve)')
+    parser.add_argument('--serve', metavar='DB',
+                        help='Start uvicorn on DB and replay a search/lookup/stats mix sampled from it')
+    parser.add_argument('--workers', type=int, default=1, help='uvicorn worker processes with --serve')
+    parser.add_argument('--pool-size', type=int, help='BIN_DB_POOL_SIZE for the --serve app')
+    parser.add_argument('--clients', default='1,2,4,8,16',
+                        help='Comma separated concurrency levels (default: 1,2,4,8,16)')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per concurrency level')
+    args = parser.parse_args()
+
+    process = None
+    url, path = args.url, args.path
+    if args.serve:
+        path = scenario_picker(args.serve)
+        process, url = start_server(args.serve, args.workers, args.pool_size)
+        print(f"Serving {args.serve} on {url} ({args.workers} worker(s), {os.cpu_count()} CPU(s))")
+    try:
+        results = []
+        for clients in [int(c) for c in args.clients.split(',')]:
+            results.append(run_level(url, path, clients, args.duration))
+        print_results(results)
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
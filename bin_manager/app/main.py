@@ -1,25 +1,88 @@
 # bin_manager/app/main.py
-from fastapi import FastAPI, HTTPException, Query, BackgroundTasks, APIRouter
+from fastapi import FastAPI, HTTPException, Query, BackgroundTasks, APIRouter, Depends
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.requests import Request
 import uvicorn
+import asyncio
+import logging
+from datetime import datetime
 from typing import Optional
+from bin_manager.app.db_pool import AsyncDatabase, db_pool, get_db
+from bin_manager.app.scheduler import JOBS, scheduler
 from bin_manager.app.scraping_worker import scraping_worker
 from bin_manager.app.state import state_manager
 from bin_manager.app.url_collection_worker import url_collection_worker
 from bin_manager.db.database import BinDatabase
+from bin_manager.db import queries
+from bin_manager.db import ranges
+from bin_manager.db.ranges import BinRangeIndex, MIN_LOOKUP_DIGITS
+from bin_manager.db.suggest import MAX_SUGGESTIONS, REFRESH_INTERVAL, suggest_cache
+from bin_manager.metrics import metrics
+from bin_manager.scraper.sources import load_sources
 import os
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 TEMPLATE_DIR = os.path.join(BASE_DIR, "templates")
 STATIC_DIR = os.path.join(BASE_DIR, "static")
+PROFILE_DIR = "profiles"
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="BIN Database Manager", version="0.1")
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 templates = Jinja2Templates(directory=TEMPLATE_DIR)
 api_router = APIRouter(prefix="/api")
 
+background_tasks = set()
+
+async def refresh_suggestions():
+    """Keep the typeahead index in step with bin_cards."""
+    while True:
+        try:
+            database = await db_pool.acquire()
+            try:
+                if await db_pool.run_blocking(suggest_cache.refresh, database.conn):
+                    logger.info("Suggestion index rebuilt in %.2fs", suggest_cache.index.build_seconds)
+            finally:
+                db_pool.release(database)
+        except Exception:
+            logger.exception("Failed to refresh the suggestion index")
+        await asyncio.sleep(REFRESH_INTERVAL)
+
+async def sync_ranges():
+    """Keep bin_ranges in step with bin_cards, off the request path.
+
+    Syncing writes, so it runs on its own connection rather than holding a
+    pooled one while it waits for crawl writers.
+    """
+    database = await asyncio.to_thread(BinDatabase, db_pool.db_path, check_same_thread=False)
+    index = BinRangeIndex(database.conn)
+    try:
+        while True:
+            try:
+                await asyncio.to_thread(index.refresh)
+            except Exception:
+                logger.exception("Failed to sync the BIN ranges")
+            await asyncio.sleep(ranges.SYNC_INTERVAL)
+    finally:
+        database.close()
+
+@app.on_event("startup")
+async def start_background_tasks():
+    # Read the BIN_* pool and scheduler settings; a malformed one stops the startup here
+    db_pool.configure()
+    scheduler.configure()
+    for coroutine in (refresh_suggestions(), sync_ranges(), scheduler.run_forever()):
+        background_tasks.add(asyncio.create_task(coroutine))
+
+@app.on_event("shutdown")
+async def close_db_pool():
+    for task in background_tasks:
+        task.cancel()
+    await scheduler.shutdown()
+    db_pool.close()
+
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
     """Main dashboard page."""
@@ -28,21 +91,37 @@ async def index(request: Request):
         "title": "BIN Database Manager"
     })
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Expose scraper timings and counters in Prometheus text format."""
+    return PlainTextResponse(
+        metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
+
 @api_router.get("/stats")
-async def get_stats():
+async def get_stats(db: AsyncDatabase = Depends(get_db)):
     """Get current database statistics."""
-    db = BinDatabase()
+    total_urls = await db.get_total_urls_count()
+    processed = await db.get_processed_urls_count()
+    return {
+        "total_banks": total_urls,
+        "processed_banks": processed,
+        "completion_percentage": (processed / total_urls * 100) if total_urls > 0 else 0,
+        "scraping_status": state_manager.scraping_status
+    }
+
+@api_router.get("/sources")
+async def get_sources(db: AsyncDatabase = Depends(get_db)):
+    """Per source: merge priority, bank URLs per status and BINs attributed to it."""
+    return await db.get_source_stats()
+
+def check_sources(sources: Optional[str]) -> None:
+    """Reject an unknown source before starting a background crawl."""
     try:
-        total_urls = db.get_total_urls_count()
-        processed = db.get_processed_urls_count()
-        return {
-            "total_banks": total_urls,
-            "processed_banks": processed,
-            "completion_percentage": (processed / total_urls * 100) if total_urls > 0 else 0,
-            "scraping_status": state_manager.scraping_status
-        }
-    finally:
-        db.close()
+        load_sources(sources)
+    except (ValueError, ImportError, AttributeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @api_router.get("/urls/status")
 async def get_url_collection_status():
@@ -50,12 +129,16 @@ async def get_url_collection_status():
     return state_manager.url_collection_status
 
 @api_router.post("/urls/collect/start")
-async def start_url_collection(background_tasks: BackgroundTasks):
-    """Start the URL collection process."""
+async def start_url_collection(background_tasks: BackgroundTasks, sources: Optional[str] = None):
+    """Start the URL collection process on the given sources (default: BIN_SOURCES)."""
     if state_manager.url_collection_status['is_running']:
         raise HTTPException(status_code=400, detail="URL collection is already running")
+    if scheduler.busy:
+        raise HTTPException(status_code=400, detail="A scheduled crawl is running")
+    
+    check_sources(sources)
     
-    background_tasks.add_task(url_collection_worker)
+    background_tasks.add_task(url_collection_worker, sources)
     return {"status": "started", "message": "URL collection process started"}
 
 @api_router.post("/urls/collect/stop")
@@ -68,13 +151,29 @@ async def stop_url_collection():
     return {"status": "stopping"}
 
 @api_router.post("/scraping/start")
-async def start_scraping(background_tasks: BackgroundTasks):
-    """Start the BIN scraping process."""
+async def start_scraping(
+    background_tasks: BackgroundTasks,
+    profile: bool = False,
+    profile_every: int = Query(100, ge=1),
+    retry_failed: bool = False,
+    sources: Optional[str] = None
+):
+    """Start the BIN scraping process on the given sources, optionally capturing profiling reports."""
     if state_manager.scraping_status['is_running']:
         raise HTTPException(status_code=400, detail="Scraping is already running")
+    if scheduler.busy:
+        raise HTTPException(status_code=400, detail="A scheduled crawl is running")
+    check_sources(sources)
+    
+    profile_out = None
+    if profile:
+        profile_out = os.path.join(PROFILE_DIR, datetime.now().strftime('%Y%m%d_%H%M%S'))
     
-    background_tasks.add_task(scraping_worker)
-    return {"status": "started", "message": "BIN scraping process started"}
+    background_tasks.add_task(scraping_worker, profile_out, profile_every, retry_failed, sources)
+    response = {"status": "started", "message": "BIN scraping process started"}
+    if profile_out:
+        response["profile_out"] = profile_out
+    return response
 
 @api_router.post("/scraping/stop")
 async def stop_scraping():
@@ -82,103 +181,165 @@ async def stop_scraping():
     if not state_manager.scraping_status['is_running']:
         raise HTTPException(status_code=400, detail="Scraping is not running")
     
-    state_manager.update_scraping_status(is_running=False)
+    # Re-syncs resumable state from the database
+    await db_pool.run_blocking(state_manager.update_scraping_status, is_running=False)
     return {"status": "stopping"}
 
 @api_router.get("/scraping/progress")
-async def get_scraping_progress():
+async def get_scraping_progress(db: AsyncDatabase = Depends(get_db)):
     """Get detailed scraping progress information."""
-    db = BinDatabase()
-    try:
-        total_urls = db.get_total_urls_count()
-        processed = db.get_processed_urls_count()
-        
-        return {
-            "total_banks": total_urls,
-            "processed_banks": processed,
-            "remaining_banks": total_urls - processed,
-            "completion_percentage": (processed / total_urls * 100) if total_urls > 0 else 0,
-            "processed_bins": state_manager.scraping_status['processed_bins'],
-            "current_bank": state_manager.scraping_status['current_bank'],
-            "failed_urls": state_manager.scraping_status['failed_urls'],
-            "is_running": state_manager.scraping_status['is_running'],
-            "start_time": state_manager.scraping_status['start_time'],
-            "last_update": state_manager.scraping_status['last_update']
-        }
-    finally:
-        db.close()
+    total_urls = await db.get_total_urls_count()
+    processed = await db.get_processed_urls_count()
+    status_counts = await db.get_url_status_counts()
+
+    return {
+        "total_banks": total_urls,
+        "processed_banks": processed,
+        "remaining_banks": total_urls - processed,
+        "failed_banks": status_counts['failed'],
+        "completion_percentage": (processed / total_urls * 100) if total_urls > 0 else 0,
+        "processed_bins": state_manager.scraping_status['processed_bins'],
+        "current_bank": state_manager.scraping_status['current_bank'],
+        "failed_urls": list(state_manager.scraping_status['failed_urls']),
+        # failed_urls keeps the most recent failures only; this counts them all
+        "failed_count": state_manager.scraping_status['failed_count'],
+        "is_running": state_manager.scraping_status['is_running'],
+        "start_time": state_manager.scraping_status['start_time'],
+        "last_update": state_manager.scraping_status['last_update']
+    }
 
 @api_router.get("/scraping/resumable")
-async def check_resumable():
-    db = BinDatabase()
-    try:
-        total = db.get_total_urls_count()
-        processed = db.get_processed_urls_count()
-        is_resumable = total > 0 and processed < total
-        
-        response = {
-            "resumable": is_resumable,
-            "total": total,
-            "processed": processed,
-            "remaining": total - processed if total > 0 else 0
-        }
-        print(response)
-        return response
-    finally:
-        db.close()
+async def check_resumable(db: AsyncDatabase = Depends(get_db)):
+    total = await db.get_total_urls_count()
+    processed = await db.get_processed_urls_count()
+    is_resumable = total > 0 and processed < total
+    
+    response = {
+        "resumable": is_resumable,
+        "total": total,
+        "processed": processed,
+        "remaining": total - processed if total > 0 else 0
+    }
+    print(response)
+    return response
+
+@api_router.get("/scraping/failed")
+async def get_failed_urls(db: AsyncDatabase = Depends(get_db)):
+    """List failed bank URLs with their attempt count and last error."""
+    return await db.get_failed_urls()
 
 @api_router.post("/scraping/reset")
 async def reset_state():
     """Reset the state manager to initial state."""
-    state_manager.reset()
+    await db_pool.run_blocking(state_manager.reset)
     return {"status": "State reset successfully"}
 
+def _search_bins(db: BinDatabase, bin_prefix: Optional[str], bank: Optional[str],
+                 country: Optional[str], limit: int):
+    return queries.search(db.conn, bin_prefix, bank, country, limit)
+
 @api_router.get("/search")
 async def search_bins(
     bin_prefix: Optional[str] = None,
     bank: Optional[str] = None,
     country: Optional[str] = None,
-    limit: int = Query(50, ge=1, le=1000)
+    limit: int = Query(50, ge=1, le=1000),
+    db: AsyncDatabase = Depends(get_db)
 ):
     """Search BINs with optional filters."""
-    db = BinDatabase()
-    try:
-        cursor = db.conn.cursor()
-        
-        query = """
-            SELECT bin_number, pays, emetteur, marque_carte, type_carte, niveau_carte
-            FROM bin_cards
-            WHERE 1=1
-        """
-        params = []
-        
-        if bin_prefix:
-            query += " AND bin_number LIKE ?"
-            params.append(f"{bin_prefix}%")
-        
-        if bank:
-            query += " AND emetteur LIKE ?"
-            params.append(f"%{bank}%")
-            
-        if country:
-            query += " AND pays LIKE ?"
-            params.append(f"%{country}%")
-            
-        query += f" LIMIT {limit}"
-        
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        
-        return [{
-            "bin": row[0],
-            "country": row[1],
-            "bank": row[2],
-            "brand": row[3],
-            "type": row[4],
-            "level": row[5]
-        } for row in results]
-    finally:
-        db.close()
+    results = await db.run(_search_bins, bin_prefix, bank, country, limit)
+    if bank:
+        scheduler.record_queries({row[2] for row in results})
+    
+    return [{
+        "bin": row[0],
+        "country": row[1],
+        "bank": row[2],
+        "brand": row[3],
+        "type": row[4],
+        "level": row[5]
+    } for row in results]
+
+def _lookup_ranges(db: BinDatabase, number: str):
+    # Read-only: answers from bin_cards while sync_ranges catches up
+    return BinRangeIndex(db.conn).lookup(number)
+
+@api_router.get("/lookup/{number}")
+async def lookup_bin(number: str, db: AsyncDatabase = Depends(get_db)):
+    """Resolve a BIN or PAN to the most specific stored BIN range."""
+    if not number.isdigit() or len(number) < MIN_LOOKUP_DIGITS:
+        raise HTTPException(status_code=400, detail=f"Expected at least {MIN_LOOKUP_DIGITS} digits")
+    rows = await db.run(_lookup_ranges, number)
+    scheduler.record_queries(row['emetteur'] for row in rows)
+    return [{
+        "bin": row['bin_number'],
+        "range": row['range'],
+        "country": row['pays'],
+        "bank": row['emetteur'],
+        "brand": row['marque'],
+        "type": row['type'],
+        "level": row['niveau']
+    } for row in rows]
+
+@api_router.get("/changes")
+async def get_changes(
+    after: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+    db: AsyncDatabase = Depends(get_db)
+):
+    """Page through BIN changes made by scrapes/imports after change id `after`."""
+    oldest, _ = await db.get_change_range()
+    changes = await db.get_changes(after_id=after, limit=limit)
+    return {
+        "changes": changes,
+        # Always the cursor for the next call; equal to `after` when nothing is new
+        "next_after": changes[-1]['id'] if changes else after,
+        "more": len(changes) == limit,
+        # Older changes were pruned; a cursor below oldest_change - 1 has missed some
+        "oldest_change": oldest,
+        "latest_generation": await db.get_latest_generation()
+    }
+
+@api_router.get("/scheduler")
+async def get_scheduler_status(limit: int = Query(20, ge=1, le=200), db: AsyncDatabase = Depends(get_db)):
+    """Scheduled jobs, their next run and the most recent runs."""
+    return {**scheduler.status(), "runs": await db.get_scheduler_runs(limit)}
+
+@api_router.post("/scheduler/pause")
+async def pause_scheduler():
+    """Stop scheduling runs; running jobs end after their current bank or country."""
+    scheduler.pause()
+    return {"status": "paused"}
+
+@api_router.post("/scheduler/resume")
+async def resume_scheduler():
+    """Resume scheduled runs from the next matching time."""
+    scheduler.resume()
+    return {"status": "resumed"}
+
+@api_router.post("/scheduler/{job}/run")
+async def run_scheduler_job(job: str):
+    """Start a scheduler job now, with its usual time budget."""
+    if job not in JOBS:
+        raise HTTPException(status_code=404, detail=f"Unknown job, expected one of {', '.join(sorted(JOBS))}")
+    if scheduler.paused:
+        raise HTTPException(status_code=400, detail="Scheduler is paused")
+    if state_manager.scraping_status['is_running'] or state_manager.url_collection_status['is_running']:
+        raise HTTPException(status_code=400, detail="Manual collection or scraping is running")
+    if not scheduler.start(job):
+        raise HTTPException(status_code=400, detail=f"{job} is already running")
+    return {"status": "started", "job": job}
+
+@api_router.get("/suggest/{kind}")
+async def suggest(kind: str, q: str = "", limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS)):
+    """Typeahead for BIN prefixes, issuers or countries, most BINs first."""
+    if kind not in ("bin", "issuer", "country"):
+        raise HTTPException(status_code=404, detail="Expected /suggest/bin, /suggest/issuer or /suggest/country")
+    index = suggest_cache.index
+    if index is None:
+        raise HTTPException(status_code=503, detail="Suggestion index is still loading")
+    # Served from memory on the event loop, no database round trip
+    return index.suggest(kind, q, limit)
 
 app.include_router(api_router)
 
@@ -0,0 +1,469 @@
+# bin_manager/app/scheduler.py
+"""Periodic URL discovery and bank refresh inside the web app.
+
+Each job runs on a cron schedule (minute hour day-of-month month day-of-week)
+and stops when its time budget for the window is spent:
+
+- discovery walks the country pages and stores new bank URLs, resuming
+  after the last country it reached when a budget-limited run ended
+- refresh scrapes banks in priority order: previously failed, never
+  scraped, then banks older than min_age_days, most queried first
+
+Both jobs crawl every configured source (BIN_SOURCES) at once, one thread each.
+
+- maintenance checks the database, releases its free pages and refreshes
+  planner statistics (see bin_manager.db.maintenance)
+
+Runs never overlap: a job still running skips its next slot, scheduled jobs
+wait for manual collection/scraping, and a lease in scheduler_jobs keeps
+other app processes on the same database from starting the same job.
+
+Run a job once outside the app with:
+    python -m bin_manager.app.scheduler --run refresh --budget 10
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from bin_manager.app.state import state_manager
+from bin_manager.db import maintenance
+from bin_manager.db.database import BinDatabase
+from bin_manager.db.ranges import BinRangeIndex
+from bin_manager.scraper.crawl import crawl_sources, for_each_source
+from bin_manager.scraper.scraper import BinScraper, ScraperConfig
+from bin_manager.scraper.sources import BinSource, load_sources
+
+logger = logging.getLogger(__name__)
+
+# (min, max) of each cron field: minute, hour, day of month, month, day of week (0 = Sunday)
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+# Longest sleep of the scheduler loop, so pause/resume and query counts are picked up
+TICK_SECONDS = 60
+
+# Extra lease time on top of the budget, covering the page in flight when it runs out
+LEASE_GRACE_SECONDS = 300
+
+# Run statuses recorded in scheduler_runs
+RUN_DONE = 'done'
+RUN_BUDGET_EXHAUSTED = 'budget_exhausted'
+RUN_STOPPED = 'stopped'
+RUN_SKIPPED = 'skipped'
+RUN_FAILED = 'failed'
+
+
+class CronSchedule:
+    """A five-field cron expression supporting *, lists, ranges and steps."""
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != len(CRON_FIELDS):
+            raise ValueError(f"Expected 5 cron fields, got {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse(part, low, high) for part, (low, high) in zip(parts, CRON_FIELDS)
+        )
+        # Like cron, a restricted day of month OR day of week selects the day
+        self.any_day = parts[2] == '*'
+        self.any_weekday = parts[4] == '*'
+
+    @staticmethod
+    def _parse(field: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for item in field.split(','):
+            spec, _, step = item.partition('/')
+            if spec == '*':
+                start, end = low, high
+            elif '-' in spec:
+                start, end = (int(v) for v in spec.split('-'))
+            else:
+                start = end = int(spec)
+                if step:
+                    end = high
+            if not low <= start <= end <= high:
+                raise ValueError(f"Cron field {field!r} outside {low}-{high}")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = (moment.isoweekday() % 7) in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after `moment`."""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 4)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                month = candidate.month % 12 + 1
+                candidate = candidate.replace(year=candidate.year + (month == 1), month=month,
+                                              day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression {self.expression!r} never matches")
+
+
+def _env_flag(name: str, default: str) -> Callable[[], bool]:
+    """default_factory reading an on/off environment variable when the config is created."""
+    return lambda: os.getenv(name, default).lower() not in ('0', 'off', 'false', 'no')
+
+
+def _env_str(name: str, default: str) -> Callable[[], str]:
+    """default_factory reading a string environment variable when the config is created."""
+    return lambda: os.getenv(name, default)
+
+
+def _env_float(name: str, default: float) -> Callable[[], float]:
+    """default_factory reading a number from the environment when the config is created."""
+    def read() -> float:
+        value = os.getenv(name)
+        if value is None:
+            return default
+        try:
+            return float(value)
+        except ValueError:
+            raise ValueError(f"{name} must be a number, got {value!r}") from None
+    return read
+
+
+@dataclass
+class SchedulerConfig:
+    """Scheduler settings; the defaults are read from BIN_* environment variables on creation."""
+
+    enabled: bool = field(default_factory=_env_flag('BIN_SCHEDULER', 'on'))
+    # Weekly discovery, nightly refresh, both outside usual lookup peaks
+    discovery_schedule: str = field(default_factory=_env_str('BIN_SCHEDULE_DISCOVERY', '0 3 * * 0'))
+    discovery_budget_minutes: float = field(default_factory=_env_float('BIN_DISCOVERY_BUDGET', 60.0))
+    refresh_schedule: str = field(default_factory=_env_str('BIN_SCHEDULE_REFRESH', '30 3 * * *'))
+    refresh_budget_minutes: float = field(default_factory=_env_float('BIN_REFRESH_BUDGET', 120.0))
+    # Weekly, after discovery and refresh have done their writes
+    maintenance_schedule: str = field(default_factory=_env_str('BIN_SCHEDULE_MAINTENANCE', '0 6 * * 0'))
+    maintenance_budget_minutes: float = field(default_factory=_env_float('BIN_MAINTENANCE_BUDGET', 15.0))
+    # bin_changes rows older than this are pruned by the maintenance job
+    changes_retention_days: float = field(default_factory=_env_float('BIN_CHANGES_RETENTION_DAYS', 90.0))
+    # Banks scraped more recently than this are not refreshed
+    refresh_min_age_days: float = field(default_factory=_env_float('BIN_REFRESH_MIN_AGE_DAYS', 7.0))
+    # Failed banks are retried until they fail this many times in a row
+    max_failed_attempts: int = 5
+    scrape_delay: float = 0.8
+    # Comma-separated sources to crawl; None for BIN_SOURCES
+    sources: Optional[str] = None
+
+    def scraper_config(self) -> ScraperConfig:
+        return ScraperConfig(retry_attempts=5, retry_backoff=2, timeout=15, delay=self.scrape_delay)
+
+
+class JobRun:
+    """State of one run: its deadline, stop signal and counters."""
+
+    def __init__(self, job: str, budget_minutes: float, stop_event: threading.Event):
+        self.job = job
+        self.deadline = time.monotonic() + budget_minutes * 60
+        self.stop_event = stop_event
+        self.processed = 0
+        self.failed = 0
+        self.note: Optional[str] = None
+        self.status = RUN_DONE
+        self.lock = threading.Lock()
+
+    def record(self, ok: bool) -> None:
+        """Count a processed or failed item; called from every source's thread."""
+        with self.lock:
+            if ok:
+                self.processed += 1
+            else:
+                self.failed += 1
+
+    def should_stop(self) -> bool:
+        """True once the budget is spent or the scheduler is paused/stopping."""
+        if self.stop_event.is_set():
+            self.status = RUN_STOPPED
+            return True
+        if time.monotonic() >= self.deadline:
+            self.status = RUN_BUDGET_EXHAUSTED
+            return True
+        return False
+
+
+def _discover_source(run: JobRun, source: BinSource, config: SchedulerConfig) -> None:
+    """Store bank URLs of every country of one source, resuming after the last country reached."""
+    scraper = BinScraper(config.scraper_config(), source)
+    db = BinDatabase()
+    try:
+        db.register_source(source.name, source.priority, scraper.base_url)
+        countries = scraper.get_countries_list()
+        if not countries:
+            raise RuntimeError(f"No countries found on {source.name}")
+        cursor_name = f"{run.job}:{source.name}"
+        resume_after = db.get_job_cursor(cursor_name)
+        if resume_after in countries:
+            start = countries.index(resume_after) + 1
+            countries = countries[start:] + countries[:start]
+
+        completed_cycle = True
+        for href in countries:
+            if run.should_stop():
+                completed_cycle = False
+                break
+            banks = scraper.get_country_banks(scraper.country_url(href))
+            if banks:
+                db.insert_bank_urls(banks, source.name)
+            run.record(bool(banks))
+            db.set_job_cursor(cursor_name, href)
+
+        if completed_cycle:
+            db.set_job_cursor(cursor_name, None)
+    finally:
+        db.close()
+
+
+def run_discovery(run: JobRun, db: BinDatabase, sources: List[BinSource], config: SchedulerConfig) -> None:
+    """Store bank URLs of every country of every source, the sources in parallel."""
+    urls_before = db.get_total_urls_count()
+    for_each_source(sources, lambda source: _discover_source(run, source, config), run.stop_event)
+    run.note = f"{db.get_total_urls_count() - urls_before} new bank URLs"
+
+
+def run_refresh(run: JobRun, db: BinDatabase, sources: List[BinSource], config: SchedulerConfig) -> None:
+    """Scrape banks in priority order, the sources in parallel, until none is due or the budget is spent."""
+    since = db.conn.execute('SELECT CURRENT_TIMESTAMP').fetchone()[0]
+    generation_id = db.start_generation('refresh')
+
+    def refresh_claims(source_db: BinDatabase, source: BinSource):
+        while True:
+            url_data = source_db.claim_refresh_url(since, config.refresh_min_age_days,
+                                                   config.max_failed_attempts, source.name)
+            if url_data is None:
+                return
+            yield url_data
+
+    try:
+        crawl_sources(sources, config.scraper_config(), claims=refresh_claims,
+                      on_bank=lambda source, url_data, records, error: run.record(bool(records)),
+                      should_stop=run.should_stop, generation_id=generation_id)
+    finally:
+        db.finish_generation(generation_id)
+    # The app also syncs in the background; this covers runs started with --run
+    BinRangeIndex(db.conn).refresh()
+    if run.status == RUN_DONE:
+        run.note = "no more banks due"
+
+
+def run_maintenance(run: JobRun, db: BinDatabase, sources: List[BinSource], config: SchedulerConfig) -> None:
+    """Check integrity, release free pages and refresh planner statistics within the budget."""
+    report = maintenance.maintain(db, should_stop=run.should_stop,
+                                  keep_changes_days=config.changes_retention_days)
+    run.processed = report['released_pages']
+    if report['integrity']:
+        run.status, run.failed = RUN_FAILED, len(report['integrity'])
+    run.note = maintenance.summary(report)
+
+
+JOBS: Dict[str, Callable[[JobRun, BinDatabase, List[BinSource], SchedulerConfig], None]] = {
+    'discovery': run_discovery,
+    'refresh': run_refresh,
+    'maintenance': run_maintenance,
+}
+
+
+class Scheduler:
+    """Fires the discovery, refresh and maintenance jobs on their schedules from the app's event loop.
+
+    Without a config, it is read from the environment by configure(), which
+    the app calls on startup and run_job on first use, not at import.
+    """
+
+    def __init__(self, config: Optional[SchedulerConfig] = None):
+        self.config: Optional[SchedulerConfig] = None
+        self.schedules: Dict[str, CronSchedule] = {}
+        self.budgets: Dict[str, float] = {}
+        self.paused = True
+        self.next_runs: Dict[str, datetime] = {}
+        self.running: Dict[str, datetime] = {}
+        self.stop_event = threading.Event()
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.query_counts: Counter = Counter()
+        self._tasks: Set[asyncio.Task] = set()
+        if config is not None:
+            self.configure(config)
+
+    def configure(self, config: Optional[SchedulerConfig] = None) -> None:
+        """Apply `config`, by default read from the environment; ValueError on a malformed setting."""
+        self.config = config or SchedulerConfig()
+        self.schedules = {
+            'discovery': CronSchedule(self.config.discovery_schedule),
+            'refresh': CronSchedule(self.config.refresh_schedule),
+            'maintenance': CronSchedule(self.config.maintenance_schedule),
+        }
+        self.budgets = {
+            'discovery': self.config.discovery_budget_minutes,
+            'refresh': self.config.refresh_budget_minutes,
+            'maintenance': self.config.maintenance_budget_minutes,
+        }
+        self.paused = not self.config.enabled
+
+    def record_queries(self, bank_names: Iterable[str]) -> None:
+        """Count API hits per issuer; flushed to bank_urls.query_count by the loop."""
+        self.query_counts.update(name for name in bank_names if name)
+
+    @property
+    def busy(self) -> bool:
+        return bool(self.running)
+
+    def status(self) -> Dict:
+        return {
+            'paused': self.paused,
+            'jobs': [{
+                'name': name,
+                'schedule': schedule.expression,
+                'budget_minutes': self.budgets[name],
+                'next_run': None if self.paused else self.next_runs.get(name),
+                'running_since': self.running.get(name),
+            } for name, schedule in self.schedules.items()],
+        }
+
+    def pause(self) -> None:
+        """Stop scheduling runs and end the running ones at the next bank/country."""
+        self.paused = True
+        self.stop_event.set()
+
+    def resume(self) -> None:
+        self.paused = False
+        self.stop_event.clear()
+        now = datetime.now()
+        self.next_runs = {name: schedule.next_after(now) for name, schedule in self.schedules.items()}
+
+    async def run_forever(self) -> None:
+        """Scheduler loop started with the app."""
+        if self.config is None:
+            self.configure()
+        now = datetime.now()
+        self.next_runs = {name: schedule.next_after(now) for name, schedule in self.schedules.items()}
+        while True:
+            await self._flush_query_counts()
+            now = datetime.now()
+            if not self.paused:
+                for name, next_run in self.next_runs.items():
+                    if next_run <= now:
+                        self.next_runs[name] = self.schedules[name].next_after(now)
+                        self.start(name, 'schedule')
+            wake = min(self.next_runs.values(), default=now + timedelta(seconds=TICK_SECONDS))
+            await asyncio.sleep(min(TICK_SECONDS, max(1.0, (wake - datetime.now()).total_seconds())))
+
+    def start(self, name: str, trigger: str = 'manual') -> bool:
+        """Start a job in the background; False if it is already running."""
+        if name in self.running:
+            if trigger == 'schedule':
+                logger.warning("Skipping %s run: the previous one is still running", name)
+                self._record_skip(name, trigger, "previous run still running")
+            return False
+        self.running[name] = datetime.now()
+        task = asyncio.create_task(self._run_in_thread(name, trigger))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _run_in_thread(self, name: str, trigger: str) -> None:
+        try:
+            # Scraping blocks on HTTP and SQLite; keep it off the event loop
+            await asyncio.to_thread(self.run_job, name, trigger)
+        except Exception:
+            logger.exception("Scheduler job %s crashed", name)
+        finally:
+            self.running.pop(name, None)
+
+    def run_job(self, name: str, trigger: str = 'manual', budget_minutes: Optional[float] = None) -> Dict:
+        """Run one job to completion in the calling thread and return its summary."""
+        if self.config is None:
+            self.configure()
+        budget = self.budgets[name] if budget_minutes is None else budget_minutes
+        db = BinDatabase()
+        run = JobRun(name, budget, self.stop_event)
+        run_id = db.start_scheduler_run(name, trigger)
+        try:
+            if state_manager.scraping_status['is_running'] or state_manager.url_collection_status['is_running']:
+                run.status, run.note = RUN_SKIPPED, "manual collection or scraping in progress"
+            elif not db.acquire_job_lease(name, self.owner, budget * 60 + LEASE_GRACE_SECONDS):
+                run.status, run.note = RUN_SKIPPED, "running in another process"
+            else:
+                try:
+                    logger.info("Starting %s run (%s, budget %.0f min)", name, trigger, budget)
+                    JOBS[name](run, db, load_sources(self.config.sources), self.config)
+                finally:
+                    db.release_job_lease(name, self.owner)
+        except Exception as e:
+            run.status, run.note = RUN_FAILED, str(e)
+            raise
+        finally:
+            db.finish_scheduler_run(run_id, run.status, run.processed, run.failed, run.note)
+            db.close()
+            logger.info("%s run ended: %s (%d processed, %d failed)", name, run.status, run.processed, run.failed)
+        return {'job': name, 'status': run.status, 'processed': run.processed,
+                'failed': run.failed, 'note': run.note}
+
+    def _record_skip(self, name: str, trigger: str, note: str) -> None:
+        db = BinDatabase()
+        try:
+            db.finish_scheduler_run(db.start_scheduler_run(name, trigger), RUN_SKIPPED, note=note)
+        finally:
+            db.close()
+
+    async def _flush_query_counts(self) -> None:
+        if not self.query_counts:
+            return
+        counts, self.query_counts = self.query_counts, Counter()
+
+        def flush():
+            db = BinDatabase()
+            try:
+                db.add_bank_query_counts(counts)
+            finally:
+                db.close()
+        try:
+            await asyncio.to_thread(flush)
+        except Exception:
+            logger.exception("Failed to store bank query counts")
+
+    async def shutdown(self) -> None:
+        """Stop running jobs at their next bank/country and wait for them."""
+        self.stop_event.set()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._flush_query_counts()
+
+
+scheduler = Scheduler()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a scheduler job once')
+    parser.add_argument('--run', choices=sorted(JOBS), required=True, help='Job to run')
+    parser.add_argument('--budget', type=float, metavar='MINUTES',
+                        help='Time budget (default: the job\'s configured budget)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    summary = scheduler.run_job(args.run, 'cli', args.budget)
+    print(f"{summary['job']}: {summary['status']}, {summary['processed']} processed, "
+          f"{summary['failed']} failed" + (f" ({summary['note']})" if summary['note'] else ""))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,14 @@
 # bin_manager/app/scraping_worker.py
 import asyncio
+import threading
 from datetime import datetime
 from bin_manager.db.database import BinDatabase
-from bin_manager.scraper.scraper import BinScraper, ScraperConfig
+from bin_manager.logging_setup import setup_logging
+from bin_manager.scraper.crawl import crawl_sources
+from bin_manager.scraper.scraper import ScraperConfig
+from bin_manager.scraper.sources import load_sources
 from bin_manager.app.state import state_manager
+from bin_manager.profiling import ScrapeProfiler
 
 def format_bank_name(name: str, max_length: int = 20) -> str:
     """Format bank name for consistent display."""
@@ -11,8 +16,9 @@ def format_bank_name(name: str, max_length: int = 20) -> str:
         return name.ljust(max_length)
     return name[:max_length-3] + "..."
 
-async def scraping_worker():
-    """Background worker for scraping BIN data."""
+async def scraping_worker(profile_out: str = None, profile_every: int = 100, retry_failed: bool = False,
+                         sources: str = None):
+    """Background worker for scraping BIN data, all sources at once."""
     config = ScraperConfig(
         retry_attempts=5,
         retry_backoff=2,
@@ -20,10 +26,24 @@ async def scraping_worker():
         delay=0.8
     )
     
-    scraper = BinScraper(config)
+    logger = setup_logging()
+    # Before opening the database, so a bad sources spec leaves no connection behind
+    sources = load_sources(sources)
+    if profile_out and len(sources) > 1:
+        logger.warning("Profiling needs a single source; profiling disabled")
+        profile_out = None
+    profiler = ScrapeProfiler(profile_out, every=profile_every) if profile_out else None
     db = BinDatabase()
     
     try:
+        recovered = db.recover_interrupted_urls()
+        if recovered:
+            logger.warning("Recovered %d URLs left in progress by an interrupted run", recovered)
+        if retry_failed:
+            logger.info("Requeued %d failed URLs for retry", db.requeue_failed_urls())
+
+        generation_id = db.start_generation('scrape')
+
         # Initialize session statistics
         total_urls = db.get_total_urls_count()
         processed_urls = db.get_processed_urls_count()
@@ -36,52 +56,51 @@ async def scraping_worker():
             processed_bins=0
         )
         
-        scraper.logger.info(f"Starting scraping session - {total_urls - processed_urls:,} banks remaining")
-        
-        unprocessed_urls = db.get_unprocessed_urls()
-        for url_data in unprocessed_urls:
-            if not state_manager.scraping_status['is_running']:
-                scraper.logger.warning("Scraping stopped by user")
-                break
-                
-            try:
-                bank_name = url_data['url'].split('/')[-1]
-                formatted_name = format_bank_name(bank_name)
-                
-                state_manager.update_scraping_status(
-                    current_bank=formatted_name
-                )
-                
-                scraper.logger.info(f"Processing bank: {bank_name}")
-                bank_table = scraper.get_bank_bins(url_data['url'])
-                
+        logger.info("Starting scraping session - %s banks remaining", f"{total_urls - processed_urls:,}")
+
+        lock = threading.Lock()
+
+        def should_stop() -> bool:
+            return not state_manager.scraping_status['is_running']
+
+        def on_bank(source, url_data, bank_table, error):
+            # Called from every source's crawl thread
+            bank_name = url_data['url'].split('/')[-1]
+            with lock:
                 if bank_table:
-                    db.insert_bank_data(bank_table, url_data['id'])
-                    current_bins = state_manager.scraping_status['processed_bins']
                     state_manager.update_scraping_status(
-                        processed_bins=current_bins + len(bank_table)
+                        current_bank=format_bank_name(bank_name),
+                        processed_bins=state_manager.scraping_status['processed_bins'] + len(bank_table)
                     )
-                    scraper.logger.info(f"Collected {len(bank_table)} BINs from {bank_name}")
+                    logger.info("Collected %d BINs from %s", len(bank_table), bank_name,
+                                extra={'bank': bank_name, 'source': source.name, 'sampled': True})
                 else:
-                    failed_urls = state_manager.scraping_status['failed_urls']
-                    failed_urls.append(url_data['url'])
-                    state_manager.update_scraping_status(failed_urls=failed_urls)
-                    scraper.logger.warning(f"No BINs found for {bank_name}")
-                
-                db.mark_url_processed(url_data['id'])
-                current_processed = state_manager.scraping_status['processed_banks']
+                    state_manager.record_failed_url(url_data['url'])
+                    logger.warning("No BINs found for %s: %s", bank_name, error,
+                                   extra={'bank': bank_name, 'source': source.name})
                 state_manager.update_scraping_status(
-                    processed_banks=current_processed + 1
+                    processed_banks=state_manager.scraping_status['processed_banks'] + 1
                 )
-                
-                await asyncio.sleep(0.5)
-                
-            except Exception as e:
-                scraper.logger.error(f"Error processing {url_data['url']}: {str(e)}")
-                failed_urls = state_manager.scraping_status['failed_urls']
-                failed_urls.append(url_data['url'])
-                state_manager.update_scraping_status(failed_urls=failed_urls)
-                continue
+                if profiler:
+                    profiler.tick()
+
+        def crawl():
+            # The profiler has to run on the thread doing the work
+            if profiler:
+                profiler.start()
+            try:
+                crawl_sources(sources, config, on_bank=on_bank, should_stop=should_stop,
+                              generation_id=generation_id)
+            finally:
+                if profiler:
+                    profiler.stop()
+                    logger.info("Profiling reports written to %s", profile_out)
+
+        # Scraping blocks on HTTP and SQLite; keep it off the event loop
+        await asyncio.to_thread(crawl)
+        if should_stop():
+            logger.warning("Scraping stopped by user")
+        db.finish_generation(generation_id)
                 
     finally:
         state_manager.update_scraping_status(
@@ -89,4 +108,4 @@ async def scraping_worker():
             current_bank=''
         )
         db.close()
-        scraper.logger.info("Scraping session completed")
\ No newline at end of file
+        logger.info("Scraping session completed")
\ No newline at end of file
@@ -1,4 +1,5 @@
 # bin_manager/app/state.py
+from collections import deque
 from datetime import datetime
 from typing import Dict, Any
 from bin_manager.db.database import BinDatabase
@@ -6,6 +7,9 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Failed URLs kept in memory for the dashboard; the full list stays in bank_urls
+MAX_RECENT_FAILURES = 50
+
 class StateManager:
     """Manages application state across different modules."""
     
@@ -30,7 +34,8 @@ class StateManager:
             'total_banks': 0,
             'current_bank': '',
             'processed_bins': 0,
-            'failed_urls': [],
+            'failed_urls': deque(maxlen=MAX_RECENT_FAILURES),
+            'failed_count': 0,
             'last_update': None
         }
         logger.info("Initial scraping status: %s", self._scraping_status)
@@ -88,7 +93,8 @@ class StateManager:
             'total_banks': 0,
             'current_bank': '',
             'processed_bins': 0,
-            'failed_urls': [],
+            'failed_urls': deque(maxlen=MAX_RECENT_FAILURES),
+            'failed_count': 0,
             'last_update': None
         }
         
@@ -113,6 +119,12 @@ class StateManager:
         if 'is_running' in kwargs or 'total_banks' in kwargs or 'processed_banks' in kwargs:
             self.sync_with_db()
     
+    def record_failed_url(self, url: str) -> None:
+        """Count a failed bank URL and keep it among the most recent failures."""
+        self._scraping_status['failed_urls'].append(url)
+        self._scraping_status['failed_count'] += 1
+        self._scraping_status['last_update'] = datetime.now()
+
     @property
     def url_collection_status(self) -> Dict[str, Any]:
         """Get current URL collection status."""
@@ -33,6 +33,11 @@ function dashboard() {
             country: ''
         },
         searchResults: [],
+        suggestions: {
+            bin: [],
+            issuer: [],
+            country: []
+        },
         pollingInterval: null,
         
         init() {
@@ -180,6 +185,20 @@ function dashboard() {
             this.searchResults = await response.json();
         },
 
+        async suggest(kind, query) {
+            if (!query) {
+                this.suggestions[kind] = [];
+                return;
+            }
+            try {
+                const params = new URLSearchParams({ q: query, limit: 10 });
+                const response = await fetch(`/api/suggest/${kind}?${params}`);
+                this.suggestions[kind] = response.ok ? await response.json() : [];
+            } catch (error) {
+                console.error('Error fetching suggestions:', error);
+            }
+        },
+
         formatPercentage(value) {
             return Number(value).toFixed(1);
         },
@@ -1,14 +1,20 @@
 # bin_manager/app/url_collection_worker.py
 import asyncio
+import threading
 from datetime import datetime
 from bin_manager.db.database import BinDatabase
+from bin_manager.logging_setup import setup_logging
+from bin_manager.scraper.crawl import for_each_source
 from bin_manager.scraper.scraper import BinScraper, ScraperConfig
+from bin_manager.scraper.sources import load_sources
 from bin_manager.app.state import state_manager
 
-async def url_collection_worker():
-    """Background worker for collecting bank URLs."""
-    db = BinDatabase()
-    scraper = BinScraper(ScraperConfig(delay=0.8))
+async def url_collection_worker(sources: str = None):
+    """Background worker for collecting bank URLs, all sources at once."""
+    logger = setup_logging()
+    sources = load_sources(sources)
+    config = ScraperConfig(delay=0.8)
+    lock = threading.Lock()
     
     try:
         # Reset status at start
@@ -21,60 +27,73 @@ async def url_collection_worker():
             collected_urls=0,
             failed_countries=[]
         )
-        
-        # Get country list
-        scraper.logger.info("Fetching country list...")
-        country_hrefs = scraper.get_countries_list()
-        
-        if not country_hrefs:
-            scraper.logger.error("No countries found!")
-            return
-            
-        state_manager.update_url_status(total_countries=len(country_hrefs))
-        scraper.logger.info(f"Found {len(country_hrefs)} countries to process")
-        
-        for href in country_hrefs:
-            if not state_manager.url_collection_status['is_running']:
-                scraper.logger.warning("Collection stopped by user")
-                break
-                
-            country_name = href.split('/')[-1]
-            scraper.logger.info(f"Processing country: {country_name}")
-            
-            state_manager.update_url_status(current_country=country_name)
-            
+
+        def fail_country(country_name: str) -> None:
+            failed_countries = state_manager.url_collection_status['failed_countries']
+            failed_countries.append(country_name)
+            state_manager.update_url_status(failed_countries=failed_countries)
+
+        def collect(source):
+            # Each source lists its countries on its own thread and connection
+            scraper = BinScraper(config, source)
+            db = BinDatabase()
             try:
-                country_url = scraper.config.base_url + href
-                country_banks_hrefs = scraper.get_country_banks(country_url)
+                db.register_source(source.name, source.priority, scraper.base_url)
+                logger.info("Fetching country list of %s...", source.name)
+                country_hrefs = scraper.get_countries_list()
                 
-                if country_banks_hrefs:
-                    db.insert_bank_urls(country_banks_hrefs)
-                    current_urls = state_manager.url_collection_status['collected_urls']
+                if not country_hrefs:
+                    logger.error("No countries found on %s!", source.name)
+                    return
+                    
+                with lock:
                     state_manager.update_url_status(
-                        collected_urls=current_urls + len(country_banks_hrefs)
+                        total_countries=state_manager.url_collection_status['total_countries'] + len(country_hrefs)
                     )
-                    scraper.logger.info(f"Collected {len(country_banks_hrefs)} URLs from {country_name}")
-                else:
-                    failed_countries = state_manager.url_collection_status['failed_countries']
-                    failed_countries.append(country_name)
-                    state_manager.update_url_status(failed_countries=failed_countries)
-                    scraper.logger.info(f"No URLs found for {country_name}")
+                logger.info("Found %d countries to process on %s", len(country_hrefs), source.name)
                 
-                current_processed = state_manager.url_collection_status['processed_countries']
-                state_manager.update_url_status(processed_countries=current_processed + 1)
-                await asyncio.sleep(0.5)
-                
-            except Exception as e:
-                scraper.logger.error(f"Error processing {country_name}: {str(e)}")
-                failed_countries = state_manager.url_collection_status['failed_countries']
-                failed_countries.append(country_name)
-                state_manager.update_url_status(failed_countries=failed_countries)
-                continue
+                for href in country_hrefs:
+                    if not state_manager.url_collection_status['is_running']:
+                        logger.warning("Collection stopped by user")
+                        break
+                        
+                    country_name = f"{source.name}/{href.split('/')[-1]}"
+                    logger.info("Processing country: %s", country_name, extra={'country': country_name})
+                    
+                    try:
+                        country_banks_hrefs = scraper.get_country_banks(scraper.country_url(href))
+                        if country_banks_hrefs:
+                            db.insert_bank_urls(country_banks_hrefs, source.name)
+                        
+                        with lock:
+                            state_manager.update_url_status(current_country=country_name)
+                            if country_banks_hrefs:
+                                current_urls = state_manager.url_collection_status['collected_urls']
+                                state_manager.update_url_status(
+                                    collected_urls=current_urls + len(country_banks_hrefs)
+                                )
+                                logger.info("Collected %d URLs from %s", len(country_banks_hrefs), country_name, extra={'country': country_name})
+                            else:
+                                fail_country(country_name)
+                                logger.info("No URLs found for %s", country_name, extra={'country': country_name})
+                            
+                            current_processed = state_manager.url_collection_status['processed_countries']
+                            state_manager.update_url_status(processed_countries=current_processed + 1)
+                        
+                    except Exception as e:
+                        logger.error("Error processing %s: %s", country_name, e, extra={'country': country_name})
+                        with lock:
+                            fail_country(country_name)
+                        continue
+            finally:
+                db.close()
+
+        # Fetching blocks on HTTP and SQLite; keep it off the event loop
+        await asyncio.to_thread(for_each_source, sources, collect, threading.Event())
                 
     finally:
         state_manager.update_url_status(
             is_running=False,
             current_country=''
         )
-        db.close()
-        scraper.logger.info("URL collection completed")
\ No newline at end of file
+        logger.info("URL collection completed")
@@ -1,21 +1,72 @@
 import os
+from typing import Dict, Optional
+
 import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_BASE_URL = "https://bin-ip-checker.p.rapidapi.com"
+DEFAULT_IP = "2.56.188.79"
+
+
+class QuotaExceeded(Exception):
+    """Raised when the checker API answers 429 Too Many Requests."""
+
 
 class BinChecker:
-    def __init__(self):
-        self.base_url = "https://bin-ip-checker.p.rapidapi.com"
+    def __init__(self, base_url: Optional[str] = None, pool_size: int = 10):
+        # BIN_CHECKER_URL points the checker at another server, e.g. checker_stub
+        self.base_url = (base_url or os.getenv("BIN_CHECKER_URL") or DEFAULT_BASE_URL).rstrip('/')
+        api_key = os.getenv("RAPIDAPI_KEY")
         # check if key is set
-        if not os.getenv("RAPIDAPI_KEY"):
+        if not api_key and self.base_url == DEFAULT_BASE_URL:
             raise Exception("RAPIDAPI_KEY environment variable not set. Please set it to your bin-ip-checker.p.rapidapi.com api key.")
-        
+
         self.headers = {
-            "x-rapidapi-key": os.getenv("RAPIDAPI_KEY"),
+            "x-rapidapi-key": api_key or "",
             "x-rapidapi-host": "bin-ip-checker.p.rapidapi.com",
             "Content-Type": "application/json"
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
-    def get_info_by_bin(self, bin_number, ip="2.56.188.79"):
+    def get_info_by_bin(self, bin_number, ip=DEFAULT_IP):
         response = self.session.post(f"{self.base_url}/?bin={bin_number}&ip={ip}")
         return response.json()
+
+    def lookup(self, bin_number: str, timeout: float = 15) -> Dict:
+        """Query one BIN and return the normalized answer (see normalize_response)."""
+        response = self.session.post(f"{self.base_url}/?bin={bin_number}&ip={DEFAULT_IP}", timeout=timeout)
+        if response.status_code == 429:
+            raise QuotaExceeded(response.headers.get("Retry-After", "quota exhausted"))
+        response.raise_for_status()
+        return normalize_response(bin_number, response.json())
+
+    def check_bin(self, bin_number: str) -> None:
+        """Print what the checker API knows about a BIN."""
+        result = self.lookup(bin_number)
+        if not result['valid']:
+            print(f"\nBIN {bin_number} is not known to the checker")
+            return
+        print(f"\nChecker result for {bin_number}:")
+        for field in ('scheme', 'card_type', 'level', 'issuer', 'country', 'country_code'):
+            print(f"{field}: {result[field] or '-'}")
+
+
+def normalize_response(bin_number: str, payload: Dict) -> Dict:
+    """Flatten a bin-ip-checker answer into the columns of the bin_checks cache."""
+    info = payload.get("BIN") or {}
+    issuer = info.get("issuer") or {}
+    country = info.get("country") or {}
+    return {
+        'bin_number': bin_number,
+        'valid': bool(payload.get("success")) and bool(info.get("valid", bool(info))),
+        'scheme': info.get("scheme") or info.get("brand"),
+        'card_type': info.get("type"),
+        'level': info.get("level"),
+        'issuer': issuer.get("name"),
+        'country': country.get("name"),
+        'country_code': country.get("alpha2"),
+    }
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Local stand-in for the bin-ip-checker API, answering from a BIN database.
+
+Lets --verify run without spending RapidAPI quota:
+
+    python -m bin_manager.cli.checker_stub --db bin_database.db --port 8099 --quota 500
+    BIN_CHECKER_URL=http://127.0.0.1:8099 bin-cli --verify --sample 1000
+"""
+import argparse
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from bin_manager.db.database import default_db_path
+
+
+class StubState:
+    """Settings and the request counter shared by all handler threads."""
+
+    def __init__(self, db_path: str, mismatch_rate: float = 0.0, latency_ms: float = 0.0,
+                 quota: Optional[int] = None):
+        self.db_path = db_path
+        self.mismatch_rate = mismatch_rate
+        self.latency = latency_ms / 1000
+        self.quota = quota
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def take_request(self) -> bool:
+        """Count a request; False once the quota is used up."""
+        with self.lock:
+            self.requests += 1
+            return self.quota is None or self.requests <= self.quota
+
+    def connection(self) -> sqlite3.Connection:
+        # One read-only connection per handler thread
+        if not hasattr(self.local, 'conn'):
+            self.local.conn = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True)
+        return self.local.conn
+
+    def answer(self, bin_number: str) -> Dict:
+        row = self.connection().execute('''
+            SELECT pays, emetteur, marque_carte, type_carte, niveau_carte
+            FROM bin_cards WHERE bin_number = ? LIMIT 1
+        ''', (bin_number,)).fetchone()
+        if row is None:
+            return {"success": False, "code": 404, "message": "BIN not found"}
+        country, issuer, scheme, card_type, level = row
+        # The same BINs disagree on every run, so reports are reproducible
+        if zlib.crc32(bin_number.encode()) % 10_000 < self.mismatch_rate * 10_000:
+            issuer = 'OTHER BANK'
+            level = 'STANDARD' if level != 'STANDARD' else 'CLASSIC'
+        return {
+            "success": True,
+            "code": 200,
+            "BIN": {
+                "valid": True,
+                "number": bin_number,
+                "scheme": scheme,
+                "type": card_type,
+                "level": level,
+                "issuer": {"name": issuer},
+                "country": {"name": country, "alpha2": None},
+            },
+        }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    state: StubState
+
+    def do_POST(self):
+        if not self.state.take_request():
+            self._send(429, {"message": "You have exceeded the rate limit per month for your plan"},
+                       {"Retry-After": "60"})
+            return
+        bin_number = (parse_qs(urlsplit(self.path).query).get('bin') or [''])[0]
+        if not bin_number.isdigit():
+            self._send(400, {"success": False, "code": 400, "message": "Invalid BIN"})
+            return
+        if self.state.latency:
+            time.sleep(self.state.latency)
+        self._send(200, self.state.answer(bin_number))
+
+    def _send(self, status: int, body: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(db_path: str, port: int = 8099, mismatch_rate: float = 0.0, latency_ms: float = 0.0,
+                quota: Optional[int] = None) -> ThreadingHTTPServer:
+    """Build a stub server bound to 127.0.0.1:`port`."""
+    handler = type('BoundStubHandler', (StubHandler,),
+                   {'state': StubState(db_path, mismatch_rate, latency_ms, quota)})
+    return ThreadingHTTPServer(('127.0.0.1', port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve bin-ip-checker style answers from a BIN database')
+    parser.add_argument('--db', default=default_db_path(),
+                        help='Database to answer from (default: $BIN_DB_PATH or bin_database.db)')
+    parser.add_argument('--port', type=int, default=8099, help='Port to listen on (default: 8099)')
+    parser.add_argument('--mismatch-rate', type=float, default=0.0,
+                        help='Share of BINs answered with a different issuer and level (0-1)')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Delay added to every answer')
+    parser.add_argument('--quota', type=int, help='Answer 429 after this many requests')
+    args = parser.parse_args()
+
+    server = make_server(args.db, args.port, args.mismatch_rate, args.latency_ms, args.quota)
+    print(f"Checker stub on http://127.0.0.1:{args.port} answering from {args.db}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
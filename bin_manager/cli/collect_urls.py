@@ -1,15 +1,24 @@
 #!/usr/bin/env python3
 from bin_manager.db.database import BinDatabase
+from bin_manager.scraper.crawl import for_each_source
 from bin_manager.scraper.scraper import BinScraper, ScraperConfig
+from bin_manager.scraper.sources import load_sources
 from tqdm import tqdm
 from datetime import datetime
 import sys
-from urllib.parse import urljoin
+import threading
 
-def collect_bank_urls():
+def collect_bank_urls(sources: str = None):
     start_time = datetime.now()
     print(f"\nStarting bank URL collection at {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
     
+    # Resolve the sources before opening the database, which sys.exit would leave open
+    try:
+        sources = load_sources(sources)
+    except (ValueError, ImportError, AttributeError) as e:
+        print(f"\nError: {e}")
+        sys.exit(1)
+
     # Initialize database and scraper with optimized configuration
     db = BinDatabase()
     config = ScraperConfig(
@@ -18,57 +27,71 @@ def collect_bank_urls():
         timeout=15,
         delay=0.0  # Balanced delay for reliability
     )
-    scraper = BinScraper(config)
+    stop_event = threading.Event()
+    lock = threading.Lock()
+    
+    # Track collection statistics
+    stats = {
+        'total_countries': 0,
+        'total_banks': 0,
+        'successful_countries': 0,
+        'failed_countries': []
+    }
     
     try:
-        print("\nFetching country list...")
-        country_hrefs = scraper.get_countries_list()
-        total_countries = len(country_hrefs)
-        
-        if not country_hrefs:
-            print("Error: No countries found. Please check the connection or source website.")
-            return
-        
-        print(f"Found {total_countries:,} countries to process")
-        
-        # Track collection statistics
-        stats = {
-            'total_banks': 0,
-            'successful_countries': 0,
-            'failed_countries': []
-        }
-        
-        with tqdm(total=total_countries, 
+        with tqdm(total=0,
                  desc="Collecting bank URLs", 
                  unit="country",
                  bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} countries "
                            "[{elapsed}<{remaining}, {rate_fmt}]") as pbar:
-            
-            for href in country_hrefs:
+
+            def collect(source):
+                # Each source lists its countries on its own thread and connection
+                scraper = BinScraper(config, source)
+                source_db = BinDatabase()
                 try:
-                    country_name = href.split('/')[-1]
-                    pbar.set_postfix_str(f"Processing: {country_name}")
-                    
-                    country_url = urljoin(config.base_url, href)
-                    country_banks_hrefs = scraper.get_country_banks(country_url)
-                    
-                    if country_banks_hrefs:
-                        db.insert_bank_urls(country_banks_hrefs)
-                        stats['total_banks'] += len(country_banks_hrefs)
-                        stats['successful_countries'] += 1
-                    else:
-                        stats['failed_countries'].append(country_name)
-                    
-                    pbar.update(1)
-                    
-                except KeyboardInterrupt:
-                    print("\nCollection interrupted by user. Saving progress...")
-                    break
-                    
-                except Exception as e:
-                    print(f"\nError processing {country_name}: {str(e)}")
-                    stats['failed_countries'].append(country_name)
-                    continue
+                    source_db.register_source(source.name, source.priority, scraper.base_url)
+                    country_hrefs = scraper.get_countries_list()
+                    if not country_hrefs:
+                        pbar.write(f"Error: No countries found on {source.name}. "
+                                   "Please check the connection or source website.")
+                        return
+                    with lock:
+                        stats['total_countries'] += len(country_hrefs)
+                        pbar.total += len(country_hrefs)
+                        pbar.refresh()
+
+                    for href in country_hrefs:
+                        if stop_event.is_set():
+                            break
+                        country_name = f"{source.name}/{href.split('/')[-1]}"
+                        try:
+                            country_banks_hrefs = scraper.get_country_banks(scraper.country_url(href))
+                            if country_banks_hrefs:
+                                source_db.insert_bank_urls(country_banks_hrefs, source.name)
+                        except Exception as e:
+                            pbar.write(f"Error processing {country_name}: {str(e)}")
+                            country_banks_hrefs = []
+
+                        with lock:
+                            if country_banks_hrefs:
+                                stats['total_banks'] += len(country_banks_hrefs)
+                                stats['successful_countries'] += 1
+                            else:
+                                stats['failed_countries'].append(country_name)
+                            pbar.set_postfix_str(f"Processing: {country_name}")
+                            pbar.update(1)
+                finally:
+                    source_db.close()
+
+            print(f"\nFetching country lists of {', '.join(source.name for source in sources)}...")
+            try:
+                for_each_source(sources, collect, stop_event)
+            except KeyboardInterrupt:
+                print("\nCollection interrupted by user. Saving progress...")
+        
+        if not stats['total_countries']:
+            return
         
         # Display collection summary
         end_time = datetime.now()
@@ -76,7 +99,7 @@ def collect_bank_urls():
         
         print("\nCollection Summary:")
         print(f"Time elapsed: {elapsed_time}")
-        print(f"Successfully processed countries: {stats['successful_countries']:,}/{total_countries:,}")
+        print(f"Successfully processed countries: {stats['successful_countries']:,}/{stats['total_countries']:,}")
         print(f"Total bank URLs collected: {stats['total_banks']:,}")
         
         if stats['failed_countries']:
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Persistent bin-cli query daemon over a Unix socket.
+
+Protocol: one request per line, `<method>\\t<arg>[\\t<arg>...]\\n`, answered
+with one JSON line `{"ok": true, "result": ...}` or
+`{"ok": false, "error": "..."}`. Clients may keep the connection open and
+pipeline any number of requests.
+"""
+import json
+import os
+import socket
+import socketserver
+import threading
+from typing import Dict, List, Optional
+
+from bin_manager.cli.main import BinCLI
+from bin_manager.db.database import default_db_path
+
+# Methods of BinCLI the daemon answers, with their expected argument count
+METHODS = {
+    'find_bin_info': 1,
+    'list_bank_bins': 1,
+    'list_country_bank_bins': 2,
+    'list_country_banks': 1,
+    'get_statistics': 0,
+    'get_changes_since': 2,
+    'ping': 0,
+}
+
+
+class _QueryHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for raw in self.rfile:
+            line = raw.decode('utf-8').rstrip('\n')
+            if not line:
+                continue
+            method, *args = line.split('\t')
+            try:
+                result = self.server.dispatch(method, args)
+                response = {'ok': True, 'result': result}
+            except Exception as e:
+                response = {'ok': False, 'error': str(e)}
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class BinDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Answer BinCLI queries from a single warm SQLite connection."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, db_path: Optional[str] = None):
+        self.socket_path = socket_path
+        self._remove_stale_socket()
+        self.cli = BinCLI(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        super().__init__(socket_path, _QueryHandler)
+        os.chmod(socket_path, 0o600)
+
+    def _remove_stale_socket(self) -> None:
+        if not os.path.exists(self.socket_path):
+            return
+        if DaemonClient.is_running(self.socket_path):
+            raise RuntimeError(f"A daemon is already listening on {self.socket_path}")
+        os.unlink(self.socket_path)
+
+    def dispatch(self, method: str, args: List[str]):
+        if method not in METHODS:
+            raise ValueError(f"Unknown method: {method}")
+        if len(args) != METHODS[method]:
+            raise ValueError(f"{method} expects {METHODS[method]} argument(s)")
+        if method == 'ping':
+            return 'pong'
+        with self._lock:
+            return getattr(self.cli, method)(*args)
+
+    def server_close(self):
+        super().server_close()
+        self.cli.close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class DaemonError(Exception):
+    """Raised when the daemon reports a failed query."""
+
+
+class DaemonClient:
+    """Drop-in replacement for BinCLI that forwards queries to a running daemon."""
+
+    def __init__(self, socket_path: str, timeout: float = 5.0):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(socket_path)
+        self.reader = self.sock.makefile('rb')
+
+    @classmethod
+    def is_running(cls, socket_path: str) -> bool:
+        try:
+            client = cls(socket_path, timeout=1.0)
+        except OSError:
+            return False
+        try:
+            return client.call('ping') == 'pong'
+        except (OSError, DaemonError):
+            return False
+        finally:
+            client.close()
+
+    def call(self, method: str, *args: str):
+        self.sock.sendall('\t'.join((method,) + args).encode('utf-8') + b'\n')
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Daemon closed the connection")
+        response = json.loads(line)
+        if not response['ok']:
+            raise DaemonError(response['error'])
+        return response['result']
+
+    def find_bin_info(self, bin_number: str) -> List[Dict]:
+        return self.call('find_bin_info', bin_number)
+
+    def list_bank_bins(self, bank_name: str) -> List[Dict]:
+        return self.call('list_bank_bins', bank_name)
+
+    def list_country_bank_bins(self, country: str, bank_name: str) -> List[Dict]:
+        return self.call('list_country_bank_bins', country, bank_name)
+
+    def list_country_banks(self, country: str) -> List[str]:
+        return self.call('list_country_banks', country)
+
+    def get_statistics(self) -> Dict:
+        return self.call('get_statistics')
+
+    def get_changes_since(self, change_id, limit) -> List[Dict]:
+        return self.call('get_changes_since', str(change_id), str(limit))
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+
+def serve(socket_path: str, db_path: Optional[str] = None) -> None:
+    """Run the daemon in the foreground until interrupted."""
+    db_path = db_path or default_db_path()
+    server = BinDaemon(socket_path, db_path)
+    print(f"bin-cli daemon listening on {socket_path} (database: {db_path})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down daemon...")
+    finally:
+        server.server_close()
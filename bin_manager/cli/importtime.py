@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Measure bin-cli startup imports with `python -X importtime`.
+
+Run `python -m bin_manager.cli.importtime` to print the slowest imports of
+the query path. It exits non-zero if a heavy scraping dependency is loaded
+or the cumulative import time exceeds the budget, so it can gate CI.
+"""
+import argparse
+import re
+import subprocess
+import sys
+from typing import List, Tuple
+
+# Modules the query path (--bin, --bank, --country, --stats) must not import
+FORBIDDEN_MODULES = ('requests', 'bs4', 'tqdm', 'bin_manager.scraper', 'bin_manager.cli.scrap_bins')
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+def measure(target: str = 'bin_manager.cli.main') -> List[Tuple[str, int, int]]:
+    """Return (module, self_us, cumulative_us) for every import of `target`."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {target}'],
+        capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2))))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description='bin-cli import-time benchmark')
+    parser.add_argument('--budget-ms', type=float, default=100.0,
+                       help='Fail when cumulative import time exceeds this (default: 100)')
+    parser.add_argument('--top', type=int, default=15, help='Number of slowest imports to show')
+    args = parser.parse_args()
+
+    target = 'bin_manager.cli.main'
+    rows = measure(target)
+    total_us = next((cumulative for name, _, cumulative in rows if name == target), 0)
+    offenders = sorted({name for name, _, _ in rows
+                        if any(name == m or name.startswith(m + '.') for m in FORBIDDEN_MODULES)})
+
+    print(f"\n{target} cumulative import time: {total_us / 1000:.1f} ms")
+    print(f"\nTop {args.top} imports by self time:")
+    for name, self_us, cumulative in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+        print(f"{self_us / 1000:>8.2f} ms  {cumulative / 1000:>8.2f} ms  {name}")
+
+    failed = False
+    if offenders:
+        print("\nHeavy modules imported on the query path:")
+        for name in offenders:
+            print(f"- {name}")
+        failed = True
+    if total_us / 1000 > args.budget_ms:
+        print(f"\nImport time exceeds budget of {args.budget_ms:.0f} ms")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
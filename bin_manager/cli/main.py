@@ -1,64 +1,75 @@
 #!/usr/bin/env python3
 import argparse
+import importlib
+import os
 import sqlite3
-from typing import List, Dict
+from typing import List, Dict, Optional
 import sys
-from prettytable import PrettyTable
 
-from bin_manager.cli.check_bin import BinChecker
-from bin_manager.cli.collect_urls import collect_bank_urls
-from bin_manager.cli.scrap_bins import scrap_bins
-from bin_manager.db.database import BinDatabase
+from bin_manager.db import queries
+from bin_manager.db.database import default_db_path
+from bin_manager.db.ranges import BinRangeIndex, MIN_LOOKUP_DIGITS
+
+# Commands that pull in requests/bs4/tqdm are resolved on demand, so the
+# query paths (--bin, --bank, --country, --stats) only import sqlite3.
+COMMANDS = {
+    'check': 'bin_manager.cli.check_bin:BinChecker',
+    'verify': 'bin_manager.cli.verify_bins:verify_bins',
+    'collect_urls': 'bin_manager.cli.collect_urls:collect_bank_urls',
+    'scrape': 'bin_manager.cli.scrap_bins:scrap_bins',
+    'export_to_csv': 'bin_manager.db.database:BinDatabase',
+    'import': 'bin_manager.db.importer:import_bins',
+    'reparse': 'bin_manager.scraper.reparse:reparse_pages',
+    'serve': 'bin_manager.cli.daemon:serve',
+    'maintain': 'bin_manager.db.maintenance:maintain',
+}
+
+# Changes listed by --changes-since unless --limit says otherwise
+CHANGES_PAGE_SIZE = 1000
+
+# Keys of the rows returned by BinCLI, in queries.BIN_COLUMNS order
+RESULT_KEYS = ('bin_number', 'pays', 'emetteur', 'marque', 'type', 'niveau')
+
+def load_command(name: str):
+    """Import and return the callable registered for a command."""
+    module_name, attr = COMMANDS[name].split(':')
+    return getattr(importlib.import_module(module_name), attr)
 
 class BinCLI:
-    def __init__(self, db_path: str = 'bin_database.db'):
-        self.conn = sqlite3.connect(db_path)
+    def __init__(self, db_path: Optional[str] = None, check_same_thread: bool = True):
+        self.conn = sqlite3.connect(db_path or default_db_path(), check_same_thread=check_same_thread)
         self.conn.row_factory = sqlite3.Row
+        self._ranges = None
+
+    @property
+    def ranges(self):
+        if self._ranges is None:
+            self._ranges = BinRangeIndex(self.conn)
+        return self._ranges
 
     def find_bin_info(self, bin_number: str) -> Dict:
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT bin_number, pays, emetteur, marque_carte as marque, 
-                   type_carte as type, niveau_carte as niveau
-            FROM bin_cards 
-            WHERE bin_number LIKE ?
-        ''', (f"{bin_number}%",))
-        results = cursor.fetchall()
-        return [dict(row) for row in results]
+        # Every stored BIN under the prefix, 8-digit ones included
+        results = self._as_dicts(queries.find_by_prefix(self.conn, bin_number))
+        if results or len(bin_number) < MIN_LOOKUP_DIGITS or not bin_number.isdigit():
+            return results
+        # Longer than any stored BIN, e.g. a PAN: resolve the covering range
+        try:
+            return self.ranges.lookup(bin_number)
+        except sqlite3.OperationalError:
+            # Database predates bin_ranges and the change log
+            return []
+
+    def _as_dicts(self, rows) -> List[Dict]:
+        return [dict(zip(RESULT_KEYS, row)) for row in rows]
 
     def list_bank_bins(self, bank_name: str) -> List[Dict]:
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT bin_number, pays, emetteur, marque_carte as marque, 
-                   type_carte as type, niveau_carte as niveau
-            FROM bin_cards 
-            WHERE emetteur LIKE ?
-            ORDER BY bin_number
-        ''', (f"%{bank_name}%",))
-        results = cursor.fetchall()
-        return [dict(row) for row in results]
+        return self._as_dicts(queries.bank_bins(self.conn, bank_name))
 
     def list_country_bank_bins(self, country: str, bank_name: str) -> List[Dict]:
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT bin_number, pays, emetteur, marque_carte as marque, 
-                   type_carte as type, niveau_carte as niveau
-            FROM bin_cards 
-            WHERE pays LIKE ? AND emetteur LIKE ?
-            ORDER BY bin_number
-        ''', (f"%{country}%", f"%{bank_name}%"))
-        results = cursor.fetchall()
-        return [dict(row) for row in results]
+        return self._as_dicts(queries.country_bank_bins(self.conn, country, bank_name))
 
     def list_country_banks(self, country: str) -> List[str]:
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT DISTINCT emetteur
-            FROM bin_cards 
-            WHERE pays LIKE ?
-            ORDER BY emetteur
-        ''', (f"%{country}%",))
-        return [row[0] for row in cursor.fetchall()]
+        return queries.country_banks(self.conn, country)
 
     def get_statistics(self) -> Dict:
         cursor = self.conn.cursor()
@@ -84,9 +95,29 @@ class BinCLI:
             ORDER BY count DESC
         ''')
         stats['brand_distribution'] = dict(cursor.fetchall())
+
+        # Which source each BIN was last taken from; NULL for imported rows
+        try:
+            cursor.execute('SELECT source, COUNT(*) FROM bin_cards GROUP BY source ORDER BY COUNT(*) DESC')
+            stats['source_distribution'] = {source or 'import': count for source, count in cursor.fetchall()}
+        except sqlite3.OperationalError:
+            # Database predates source attribution
+            stats['source_distribution'] = {}
         
         return stats
 
+    def get_changes_since(self, change_id, limit=CHANGES_PAGE_SIZE) -> List[Dict]:
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT id, generation_id as generation, change_type as change, bin_number, pays,
+                   emetteur, marque_carte as marque, type_carte as type, niveau_carte as niveau
+            FROM bin_changes
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+        ''', (int(change_id), int(limit)))
+        return [dict(row) for row in cursor.fetchall()]
+
     def close(self):
         self.conn.close()
 
@@ -95,6 +126,7 @@ def display_results(results: List[Dict], title: str = "Results"):
         print("No results found.")
         return
 
+    from prettytable import PrettyTable
     table = PrettyTable()
     table.field_names = results[0].keys()
     for row in results:
@@ -113,26 +145,24 @@ def display_statistics(stats: Dict):
     for brand, count in stats['brand_distribution'].items():
         print(f"{brand}: {count:,}")
 
-def main():
-    parser = argparse.ArgumentParser(description='BIN Database Query Tool')
-    parser.add_argument('--bin', help='Find information for a specific BIN')
-    parser.add_argument('--bank', help='List all BINs for a specific bank')
-    parser.add_argument('--country', help='List all banks in a specific country')
-    parser.add_argument('--country-bank', nargs=2, metavar=('COUNTRY', 'BANK'),
-                       help='List all BINs for a specific bank in a specific country')
-    parser.add_argument('--stats', action='store_true', help='Show database statistics')
-    parser.add_argument('--check', help='Check if a bin is correct using bin-ip-checker', nargs=1, metavar=('BIN'))
-    parser.add_argument('--collect-urls', action='store_true', help='Collect bank URLs for scraping')
-    parser.add_argument('--scrape', action='store_true', help='Scrape BIN data from bank URLs')
-    parser.add_argument('--export-to-csv', help='Export BIN data to CSV', nargs=1, metavar=('FILENAME'))
-    
-    args = parser.parse_args()
-    
-    if len(sys.argv) == 1:
-        parser.print_help()
-        return
+    if stats.get('source_distribution'):
+        print("\nBINs by Source:")
+        for source, count in stats['source_distribution'].items():
+            print(f"{source}: {count:,}")
 
-    cli = BinCLI()
+def open_backend(socket_path: str = None):
+    """Use the query daemon when one is listening, otherwise open the database."""
+    if socket_path and os.path.exists(socket_path):
+        from bin_manager.cli.daemon import DaemonClient
+        try:
+            return DaemonClient(socket_path)
+        except OSError:
+            pass
+    return BinCLI()
+
+def run_query(args):
+    """Handle the read-only query flags against the daemon or local database."""
+    cli = open_backend(args.socket)
 
     try:
         if args.bin:
@@ -160,22 +190,153 @@ def main():
         elif args.stats:
             stats = cli.get_statistics()
             display_statistics(stats)
+
+        elif args.changes_since is not None:
+            results = cli.get_changes_since(args.changes_since, args.limit)
+            display_results(results, f"Changes after change {args.changes_since}")
+            if len(results) == args.limit:
+                print(f"\nMore changes follow: --changes-since {results[-1]['id']}")
+
+    finally:
+        cli.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='BIN Database Query Tool')
+    parser.add_argument('--bin', help='Find information for a specific BIN')
+    parser.add_argument('--bank', help='List all BINs for a specific bank')
+    parser.add_argument('--country', help='List all banks in a specific country')
+    parser.add_argument('--country-bank', nargs=2, metavar=('COUNTRY', 'BANK'),
+                       help='List all BINs for a specific bank in a specific country')
+    parser.add_argument('--stats', action='store_true', help='Show database statistics')
+    parser.add_argument('--changes-since', type=int, metavar='ID',
+                       help='List BINs added, updated or removed by scrapes/imports after change ID '
+                            '(0 for the oldest kept)')
+    parser.add_argument('--limit', type=int, default=CHANGES_PAGE_SIZE, metavar='N',
+                       help=f'With --changes-since, maximum changes listed (default: {CHANGES_PAGE_SIZE})')
+    parser.add_argument('--check', help='Check if a bin is correct using bin-ip-checker', nargs=1, metavar=('BIN'))
+    parser.add_argument('--verify', action='store_true',
+                       help='Cross-check stored BINs against bin-ip-checker and write a mismatch report')
+    parser.add_argument('--sample', type=int, metavar='N',
+                       help='With --verify, check N random BINs not checked before (default: all of them)')
+    parser.add_argument('--concurrency', type=int, default=8, metavar='N',
+                       help='With --verify, requests in flight at once (default: 8)')
+    parser.add_argument('--rate', type=float, default=5.0, metavar='R',
+                       help='With --verify, maximum requests per second, 0 for no limit (default: 5)')
+    parser.add_argument('--quota', type=int, metavar='N',
+                       help='With --verify, maximum requests for this run')
+    parser.add_argument('--report', default='bin_mismatches.csv', metavar='FILE',
+                       help='With --verify, CSV file for the mismatches (default: bin_mismatches.csv)')
+    parser.add_argument('--collect-urls', action='store_true', help='Collect bank URLs for scraping')
+    parser.add_argument('--scrape', action='store_true', help='Scrape BIN data from bank URLs')
+    parser.add_argument('--sources', metavar='NAMES',
+                       help='With --collect-urls/--scrape, comma-separated sources crawled in parallel; '
+                            'with --reparse, the source the pages came from (default: $BIN_SOURCES or bincheck)')
+    parser.add_argument('--retry-failed', action='store_true',
+                       help='With --scrape, retry bank URLs that failed in earlier runs')
+    parser.add_argument('--save-pages', metavar='DIR',
+                       help='With --scrape, keep a copy of every fetched page in DIR for --reparse')
+    parser.add_argument('--reparse', metavar='DIR',
+                       help='Re-parse pages saved with --save-pages and merge their BINs')
+    parser.add_argument('--workers', type=int, metavar='N',
+                       help='Parser processes for --reparse (default: one per CPU)')
+    parser.add_argument('--export-to-csv', help='Export BIN data to CSV', nargs=1, metavar=('FILENAME'))
+    parser.add_argument('--import', dest='import_file', metavar='FILE',
+                       help='Bulk load BINs from a CSV or JSONL file (e.g. a previous export)')
+    parser.add_argument('--maintain', action='store_true',
+                       help='Check integrity, release free pages, refresh planner statistics and report sizes')
+    parser.add_argument('--integrity-full', action='store_true',
+                       help='With --maintain, run the slower integrity_check instead of quick_check')
+    parser.add_argument('--vacuum-full', action='store_true',
+                       help='With --maintain, rewrite the database once to enable incremental vacuum '
+                            '(blocks writers while it runs)')
+    parser.add_argument('--keep-changes', type=float, default=90, metavar='DAYS',
+                       help='With --maintain, prune change feed entries older than DAYS (default: 90)')
+    parser.add_argument('--profile', action='store_true',
+                       help='Print per-phase timings (fetch, parse, DB) when the command finishes')
+    parser.add_argument('--profile-out', metavar='DIR',
+                       help='With --scrape, write cProfile/tracemalloc reports to DIR')
+    parser.add_argument('--profile-every', type=int, default=100, metavar='N',
+                       help='Number of banks per profiling report (default: 100)')
+    parser.add_argument('--socket', metavar='PATH', default=os.getenv('BIN_CLI_SOCKET'),
+                       help='Forward queries to a running bin-cli daemon (default: $BIN_CLI_SOCKET)')
+
+    subparsers = parser.add_subparsers(dest='command', metavar='COMMAND')
+    serve_parser = subparsers.add_parser('serve', help='Run a persistent query daemon on a Unix socket')
+    serve_parser.add_argument('--socket', metavar='PATH', required=True, help='Unix socket path to listen on')
+    serve_parser.add_argument('--db', metavar='PATH',
+                              help='SQLite database to serve (default: $BIN_DB_PATH or bin_database.db)')
+    
+    args = parser.parse_args()
+    
+    if len(sys.argv) == 1:
+        parser.print_help()
+        return
+
+    try:
+        if args.command == 'serve':
+            load_command('serve')(args.socket, args.db)
+
+        elif (args.bin or args.bank or args.country_bank or args.country or args.stats
+              or args.changes_since is not None):
+            run_query(args)
         
         elif args.check:
-            BinChecker().check_bin(args.check[0])
+            load_command('check')().check_bin(args.check[0])
+
+        elif args.verify:
+            stats = load_command('verify')(sample=args.sample, concurrency=args.concurrency, rate=args.rate,
+                                           quota=args.quota, report=args.report)
+            print(f"\nQueried {stats['queued']:,} unchecked BINs: {stats['checked']:,} answered, "
+                  f"{stats['errors']:,} failed")
+            if stats['quota_exhausted']:
+                print("Checker quota exhausted; run again later to check the remaining BINs")
+            print(f"Mismatches among all checked BINs: {stats['mismatches']:,} (written to {args.report})")
         
         elif args.collect_urls:
-            collect_bank_urls()
+            load_command('collect_urls')(sources=args.sources)
             
         elif args.scrape:
-            scrap_bins()
+            load_command('scrape')(profile_out=args.profile_out, profile_every=args.profile_every,
+                                   retry_failed=args.retry_failed, save_pages=args.save_pages,
+                                   sources=args.sources)
         
         elif args.export_to_csv:
-            db = BinDatabase()
+            db = load_command('export_to_csv')()
             db.export_bins_to_csv(args.export_to_csv[0])
 
+        elif args.import_file:
+            stats = load_command('import')(args.import_file)
+            print(f"\nImported {args.import_file} in {stats['seconds']:.1f}s")
+            print(f"Rows read: {stats['read']:,}")
+            print(f"Rows merged into bin_cards: {stats['merged']:,}")
+            print(f"Rows skipped (missing BIN, country, issuer or brand, or malformed BIN): {stats['skipped']:,}")
+            print(f"Changes recorded under generation {stats['generation']} "
+                  f"(see --changes-since {stats['changes_after']})")
+
+        elif args.reparse:
+            stats = load_command('reparse')(args.reparse, workers=args.workers, source=args.sources or 'bincheck')
+            print(f"\nReparsed {stats['pages']:,} pages from {args.reparse} in {stats['seconds']:.1f}s")
+            print(f"Pages without a BIN table: {stats['pages_without_table']:,}")
+            if stats['pages_bad_layout']:
+                print(f"Pages with an unrecognized table layout: {stats['pages_bad_layout']:,}")
+                for error, count in stats['layout_errors'].items():
+                    print(f"  {count:,} x {error}")
+            print(f"Rows parsed: {stats['read']:,}, merged into bin_cards: {stats['merged']:,}")
+            print(f"Changes recorded under generation {stats['generation']} "
+                  f"(see --changes-since {stats['changes_after']})")
+
+        elif args.maintain:
+            report = load_command('maintain')(full_check=args.integrity_full, convert=args.vacuum_full,
+                                              keep_changes_days=args.keep_changes)
+            from bin_manager.db.maintenance import format_report
+            print(format_report(report))
+            if report['integrity']:
+                sys.exit(1)
+
     finally:
-        cli.close()
+        if args.profile:
+            from bin_manager.metrics import metrics
+            print(metrics.summary())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
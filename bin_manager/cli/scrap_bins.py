@@ -1,11 +1,20 @@
 #!/usr/bin/env python3
-from bin_manager.scraper.scraper import BinScraper, ScraperConfig
+from bin_manager.scraper.crawl import crawl_sources
+from bin_manager.scraper.scraper import ScraperConfig, NO_BINS_ERROR
+from bin_manager.scraper.sources import load_sources
 from tqdm import tqdm
+import threading
 import time
+from collections import Counter, deque
 from datetime import datetime, timedelta
 import sys
 
-from bin_manager.db.database import BinDatabase
+from bin_manager.db.database import BinDatabase, URL_DONE, URL_FAILED
+from bin_manager.db.ranges import BinRangeIndex
+from bin_manager.profiling import ScrapeProfiler
+
+# Failed URLs listed in the session summary
+RECENT_FAILURES = 50
 
 def format_time(seconds: float) -> str:
     """Convert seconds to human-readable time format."""
@@ -17,69 +26,92 @@ def format_bank_name(name: str, max_length: int = 20) -> str:
         return name.ljust(max_length)
     return name[:max_length-3] + "..."
 
-def scrap_bins():
+def scrap_bins(profile_out: str = None, profile_every: int = 100, retry_failed: bool = False,
+               save_pages: str = None, sources: str = None):
     # Initialize scraper with custom configuration
     config = ScraperConfig(
         retry_attempts=5,
         retry_backoff=2,
         timeout=15,
-        delay=0.8
+        delay=0.8,
+        save_pages_dir=save_pages
     )
     
-    scraper = BinScraper(config)
+    try:
+        sources = load_sources(sources)
+    except (ValueError, ImportError, AttributeError) as e:
+        print(f"\nError: {e}")
+        sys.exit(1)
     db = BinDatabase()
+    if profile_out and len(sources) > 1:
+        # cProfile only sees the calling thread; each source crawls on its own
+        print("\nProfiling needs a single source (--sources NAME); profiling disabled")
+        profile_out = None
+    profiler = ScrapeProfiler(profile_out, every=profile_every) if profile_out else None
     
     try:
-        total_urls = db.get_total_urls_count()
-        processed_urls = db.get_processed_urls_count()
+        recovered = db.recover_interrupted_urls()
+        if recovered:
+            print(f"\nRecovered {recovered:,} URLs left in progress by an interrupted run")
+        if retry_failed:
+            print(f"\nRequeued {db.requeue_failed_urls():,} failed URLs for retry")
+
+        changes_after = db.get_change_range()[1]
+        generation_id = db.start_generation('scrape')
+        names = {source.name for source in sources}
+        url_counts = [entry['urls'] for entry in db.get_source_stats() if entry['source'] in names]
+        total_urls = sum(sum(counts.values()) for counts in url_counts)
+        processed_urls = sum(counts[URL_DONE] + counts[URL_FAILED] for counts in url_counts)
         start_time = time.time()
         
         print(f"\n{'='*60}")
         print(f"Starting BIN scraping session at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"Sources: {', '.join(source.name for source in sources)}")
         print(f"Total URLs to process: {total_urls - processed_urls:,} of {total_urls:,}")
         print(f"{'='*60}\n")
         
         session_stats = {
             'processed_bins': 0,
-            'failed_urls': [],
-            'successful_banks': 0
+            # Only the latest failures are kept; bank_urls records all of them
+            'failed_urls': deque(maxlen=RECENT_FAILURES),
+            'failed_count': 0,
+            'successful_banks': 0,
+            'bins_by_source': Counter()
         }
+        stats_lock = threading.Lock()
         
         with tqdm(total=total_urls, 
                  initial=processed_urls,
                  desc="Scraping BINs",
                  unit="bank",
                  bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}] {postfix}") as pbar:
-            
-            unprocessed_urls = db.get_unprocessed_urls()
-            for url_data in unprocessed_urls:
-                try:
-                    bank_name = url_data['url'].split('/')[-1]
-                    formatted_name = format_bank_name(bank_name)
-                    pbar.set_postfix_str(f"Bank: {formatted_name}")
-                    
-                    # Scrape bank data (this will also display the pretty table)
-                    bank_table = scraper.get_bank_bins(url_data['url'])
-                    
+
+            def on_bank(source, url_data, bank_table, error):
+                # Called from every source's crawl thread
+                with stats_lock:
                     if bank_table:
-                        db.insert_bank_data(bank_table, url_data['id'])
                         session_stats['processed_bins'] += len(bank_table)
                         session_stats['successful_banks'] += 1
+                        session_stats['bins_by_source'][source.name] += len(bank_table)
                     else:
+                        if error != NO_BINS_ERROR:
+                            pbar.write(f"Error processing {url_data['url']}: {error}")
                         session_stats['failed_urls'].append(url_data['url'])
-                    
-                    db.mark_url_processed(url_data['id'])
+                        session_stats['failed_count'] += 1
+
+                    bank_name = url_data['url'].split('/')[-1]
+                    pbar.set_postfix_str(f"Bank: {format_bank_name(bank_name)}")
                     pbar.update(1)
-                    
-                except KeyboardInterrupt:
-                    print("\n\nScraping interrupted by user. Saving progress...")
-                    break
-                    
-                except Exception as e:
-                    print(f"\nError processing {url_data['url']}: {str(e)}")
-                    session_stats['failed_urls'].append(url_data['url'])
-                    continue
-        
+                    if profiler:
+                        profiler.tick()
+
+            if profiler:
+                profiler.start()
+            try:
+                crawl_sources(sources, config, on_bank=on_bank, generation_id=generation_id)
+            except KeyboardInterrupt:
+                print("\n\nScraping interrupted by user. Saving progress...")
+
         # Display final statistics
         elapsed_time = time.time() - start_time
         
@@ -89,14 +121,21 @@ def scrap_bins():
         print(f"Time elapsed: {format_time(elapsed_time)}")
         print(f"Successfully processed banks: {session_stats['successful_banks']:,}")
         print(f"Total BINs collected: {session_stats['processed_bins']:,}")
-        print(f"Failed URLs: {len(session_stats['failed_urls']):,}")
+        if len(sources) > 1:
+            for source in sources:
+                print(f"  {source.name}: {session_stats['bins_by_source'][source.name]:,}")
+        print(f"Failed URLs: {session_stats['failed_count']:,}")
         
         if session_stats['failed_urls']:
-            print("\nFailed URLs:")
+            print(f"\nLast {len(session_stats['failed_urls'])} failed URLs:")
             for url in session_stats['failed_urls']:
                 print(f"- {url}")
+            print("\nRun with --retry-failed to retry them.")
         
-        print(f"\nOverall progress: {db.get_processed_urls_count():,} / {total_urls:,} banks processed")
+        print(f"\nOverall progress: {db.get_processed_urls_count():,} / {db.get_total_urls_count():,} banks processed")
+        db.finish_generation(generation_id)
+        BinRangeIndex(db.conn).refresh()
+        print(f"Changes recorded under generation {generation_id} (see --changes-since {changes_after})")
         
     except KeyboardInterrupt:
         print("\n\nScraping terminated by user.")
@@ -107,6 +146,9 @@ def scrap_bins():
         sys.exit(1)
         
     finally:
+        if profiler:
+            profiler.stop()
+            print(f"\nProfiling reports written to {profile_out}")
         db.close()
 
 if __name__ == "__main__":
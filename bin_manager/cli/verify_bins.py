@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+import csv
+import threading
+import time
+import unicodedata
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Optional
+
+from tqdm import tqdm
+
+from bin_manager.cli.check_bin import BinChecker, QuotaExceeded
+from bin_manager.db.database import BinDatabase
+
+# Checker answers are written to the cache in batches of this size
+SAVE_BATCH_SIZE = 100
+
+# bin_cards column -> bin_checks column compared for the mismatch report.
+# Countries are reported but not compared: bincheck.io names them in French.
+COMPARED_FIELDS = {
+    'marque_carte': 'scheme',
+    'type_carte': 'card_type',
+    'niveau_carte': 'level',
+    'emetteur': 'issuer',
+}
+
+
+class RateLimiter:
+    """Space calls at least 1/rate seconds apart across threads."""
+
+    def __init__(self, rate: Optional[float]):
+        self.interval = 1 / rate if rate else 0.0
+        self.next_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_at)
+            self.next_at = slot + self.interval
+        time.sleep(slot - now)
+
+
+def _normalize(value: Optional[str]) -> str:
+    value = unicodedata.normalize('NFKD', value or '')
+    return ''.join(c for c in value if not unicodedata.combining(c)).casefold().strip()
+
+
+def _matches(field: str, db_value: Optional[str], checker_value: Optional[str]) -> bool:
+    db_value, checker_value = _normalize(db_value), _normalize(checker_value)
+    if not db_value or not checker_value:
+        # Nothing to compare against
+        return True
+    if field == 'emetteur':
+        # Issuer names differ in suffixes ("BNP PARIBAS" vs "BNP PARIBAS S.A.")
+        return db_value in checker_value or checker_value in db_value
+    return db_value == checker_value
+
+
+def write_mismatch_report(db: BinDatabase, path: str) -> int:
+    """Write every cached BIN disagreeing with bin_cards to a CSV; return the row count."""
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['bin_number', 'field', 'db_value', 'checker_value', 'db_country', 'checker_country'])
+        for row in db.get_checked_bins():
+            if not row['valid']:
+                writer.writerow([row['bin_number'], 'valid', 'listed', 'unknown', row['pays'], ''])
+                count += 1
+                continue
+            for db_field, checker_field in COMPARED_FIELDS.items():
+                if not _matches(db_field, row[db_field], row[checker_field]):
+                    writer.writerow([row['bin_number'], db_field, row[db_field], row[checker_field],
+                                     row['pays'], row['country']])
+                    count += 1
+    return count
+
+
+def verify_bins(sample: Optional[int] = None, concurrency: int = 8, rate: Optional[float] = 5.0,
+                quota: Optional[int] = None, report: str = 'bin_mismatches.csv',
+                db: Optional[BinDatabase] = None, checker: Optional[BinChecker] = None) -> Dict:
+    """Cross-check bin_cards against the checker API and write a mismatch report.
+
+    Only BINs missing from the bin_checks cache are queried: a random `sample`
+    of them, or all of them. At most `concurrency` requests are in flight,
+    `rate` caps requests per second and `quota` the requests of this run.
+    """
+    own_db = db is None
+    db = db or BinDatabase()
+    checker = checker or BinChecker(pool_size=concurrency)
+    limiter = RateLimiter(rate)
+    stats = {'queued': 0, 'checked': 0, 'errors': 0, 'quota_exhausted': False, 'mismatches': 0}
+
+    def check(bin_number: str) -> Dict:
+        limiter.wait()
+        return checker.lookup(bin_number)
+
+    try:
+        limit = sample if quota is None else min(sample or quota, quota)
+        bins = db.get_unchecked_bins(limit=limit, sample=sample is not None)
+        stats['queued'] = len(bins)
+        pending_saves = []
+        queue = iter(bins)
+        in_flight = {}
+
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor, \
+                    tqdm(total=len(bins), desc="Verifying BINs", unit="bin") as pbar:
+                while True:
+                    # Keep at most `concurrency` requests outstanding
+                    while not stats['quota_exhausted'] and len(in_flight) < concurrency:
+                        bin_number = next(queue, None)
+                        if bin_number is None:
+                            break
+                        in_flight[executor.submit(check, bin_number)] = bin_number
+                    if not in_flight:
+                        break
+
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        in_flight.pop(future)
+                        pbar.update(1)
+                        try:
+                            pending_saves.append(future.result())
+                            stats['checked'] += 1
+                        except QuotaExceeded:
+                            stats['quota_exhausted'] = True
+                            stats['errors'] += 1
+                        except Exception:
+                            # Not cached, so the BIN is retried on the next run
+                            stats['errors'] += 1
+
+                    # The main thread is the only writer of the cache
+                    if len(pending_saves) >= SAVE_BATCH_SIZE:
+                        db.save_bin_checks(pending_saves)
+                        pending_saves = []
+        finally:
+            # Keep what was checked even if the run is interrupted
+            if pending_saves:
+                db.save_bin_checks(pending_saves)
+
+        stats['mismatches'] = write_mismatch_report(db, report)
+    finally:
+        if own_db:
+            db.close()
+    return stats
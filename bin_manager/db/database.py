@@ -1,18 +1,141 @@
 import sqlite3
-from typing import List, Dict
+from typing import Iterator, List, Dict, Optional, Tuple
 import os
+from time import monotonic, perf_counter
+
+from bin_manager.metrics import metrics
+from bin_manager.records import BinRecord, EXPORT_HEADERS, RECORD_FIELDS, REQUIRED_COLUMNS
+
+# URL processing states persisted in bank_urls.status
+URL_PENDING = 'pending'
+URL_IN_PROGRESS = 'in_progress'
+URL_DONE = 'done'
+URL_FAILED = 'failed'
+
+# Database used when no path is given and BIN_DB_PATH is not set
+DEFAULT_DB_PATH = 'bin_database.db'
+
+# Number of pending URLs claimed per round trip by claim_pending_urls
+CLAIM_BATCH_SIZE = 100
+
+# A claimed URL whose updated_at is older than this is taken to belong to a
+# killed run. Live runs renew the lease of the batch they hold well before.
+CLAIM_LEASE_SECONDS = 600
+
+# Source of URLs and rows stored before sources existed
+DEFAULT_SOURCE = 'bincheck'
+
+# Old bin_changes rows deleted per transaction by prune_changes
+CHANGES_PRUNE_CHUNK = 10_000
+
+# ON CONFLICT ... DO UPDATE condition shared by every bin_cards upsert: a row
+# stored from another source is only overwritten if that source's priority
+# is not higher. Rows without a source (imports) rank at priority 0.
+SOURCE_PRIORITY_WINS = '''
+    bin_cards.source IS excluded.source
+    OR bin_cards.source IS NULL
+    OR COALESCE((SELECT priority FROM bin_sources WHERE name = excluded.source), 0)
+       >= COALESCE((SELECT priority FROM bin_sources WHERE name = bin_cards.source), 0)
+'''
+
+# Seconds a connection waits on another writer's lock before failing.
+# Concurrent source crawls each write through their own connection.
+BUSY_TIMEOUT_SECONDS = 30
+
+# Columns added after the first release, applied to existing databases before
+# schema.sql runs: table -> [(column, definition, backfill SQL or None)]
+COLUMN_MIGRATIONS = {
+    'bank_urls': [
+        ('status', "TEXT NOT NULL DEFAULT 'pending'",
+         "UPDATE bank_urls SET status = 'done' WHERE processed = TRUE"),
+        ('attempts', "INTEGER NOT NULL DEFAULT 0", None),
+        ('last_error', "TEXT", None),
+        ('started_at', "TIMESTAMP", None),
+        ('updated_at', "TIMESTAMP", None),
+        ('scraped_at', "TIMESTAMP",
+         "UPDATE bank_urls SET scraped_at = updated_at WHERE status = 'done'"),
+        ('query_count', "INTEGER NOT NULL DEFAULT 0", None),
+        ('source', f"TEXT NOT NULL DEFAULT '{DEFAULT_SOURCE}'", None),
+    ],
+    'bin_cards': [
+        ('source', "TEXT",
+         "UPDATE bin_cards SET source = (SELECT source FROM bank_urls WHERE id = bank_url_id) "
+         "WHERE bank_url_id IS NOT NULL"),
+    ],
+}
+
+# Data rewrites of existing databases, applied once each and in order before
+# schema.sql runs; PRAGMA user_version counts those already applied
+DATA_MIGRATIONS = [
+    # Empty optional cells were stored as '' before record_from_cells made them NULL
+    [f"UPDATE bin_cards SET {column} = NULL WHERE {column} = ''"
+     for column in RECORD_FIELDS if column not in REQUIRED_COLUMNS],
+]
+
+# bin_changes triggers, old and current names; dropped while DATA_MIGRATIONS
+# run so rewrites are not logged as changes, schema.sql creates them again
+CHANGE_TRIGGERS = ('trg_bin_cards_added', 'trg_bin_cards_updated', 'trg_bin_cards_removed',
+                   'trg_bin_changes_added', 'trg_bin_changes_updated', 'trg_bin_changes_removed')
+
+def default_db_path() -> str:
+    """Database of every entry point given no path: BIN_DB_PATH, read on each call, or DEFAULT_DB_PATH."""
+    return os.getenv('BIN_DB_PATH', DEFAULT_DB_PATH)
 
 class BinDatabase:
-    def __init__(self, db_name: str = 'bin_database.db'):
+    def __init__(self, db_name: Optional[str] = None, check_same_thread: bool = True):
         """Initialize database connection and ensure schema is created."""
-        self.conn = sqlite3.connect(db_name)
+        db_name = db_name or default_db_path()
+        self.conn = sqlite3.connect(db_name, timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=check_same_thread)
+        # Generation this connection's bin_cards writes are logged under (see tag_changes)
+        self.generation_id: Optional[int] = None
+        # Takes effect on new databases only, older ones are converted by
+        # `bin-cli --maintain --vacuum-full` (see bin_manager/db/maintenance.py)
+        self.conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        # WAL lets the API read while crawls write; the setting persists in the file
+        self.conn.execute('PRAGMA journal_mode = WAL')
         self._init_schema()
         
+    def _migrate_schema(self):
+        """Add columns introduced since the database was created and apply pending DATA_MIGRATIONS."""
+        cursor = self.conn.cursor()
+        # bin_ranges is derived data; its first layout (rowid table plus index)
+        # is dropped and rebuilt from bin_cards by the next range sync
+        if 'id' in {row[1] for row in cursor.execute('PRAGMA table_info(bin_ranges)')}:
+            cursor.execute('DROP TABLE bin_ranges')
+            cursor.execute("DELETE FROM bin_ranges_meta WHERE key = 'change_id'")
+        for table, columns in COLUMN_MIGRATIONS.items():
+            existing = {row[1] for row in cursor.execute(f'PRAGMA table_info({table})')}
+            if not existing:
+                # Fresh database, schema.sql creates the full table
+                continue
+            for column, definition, backfill in columns:
+                if column in existing:
+                    continue
+                cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+                if backfill:
+                    cursor.execute(backfill)
+
+        version = cursor.execute('PRAGMA user_version').fetchone()[0]
+        tables = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if version < len(DATA_MIGRATIONS) and 'bin_cards' in tables:
+            for trigger in CHANGE_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+            for statements in DATA_MIGRATIONS[version:]:
+                for statement in statements:
+                    cursor.execute(statement)
+            # bin_ranges copies the rewritten columns, rebuild it on the next sync
+            if 'bin_ranges_meta' in tables:
+                cursor.execute("DELETE FROM bin_ranges_meta WHERE key = 'change_id'")
+        cursor.execute(f'PRAGMA user_version = {len(DATA_MIGRATIONS)}')
+        self.conn.commit()
+
     def _init_schema(self):
         """Initialize the database schema from the SQL file."""
         schema_path = os.path.join(os.path.dirname(__file__), 'schema.sql')
         
         try:
+            self._migrate_schema()
+
             with open(schema_path, 'r', encoding='utf-8') as f:
                 schema_sql = f.read()
                 
@@ -23,56 +146,295 @@ class BinDatabase:
             print(f"Error initializing schema: {e}")
             raise
         
-    def insert_bank_urls(self, urls: List[str]) -> None:
-        """Insert new bank URLs into the database."""
+    def insert_bank_urls(self, urls: List[str], source: str = DEFAULT_SOURCE) -> None:
+        """Insert new bank URLs discovered on `source` into the database."""
         cursor = self.conn.cursor()
         cursor.executemany(
-            'INSERT OR IGNORE INTO bank_urls (url) VALUES (?)',
-            [(url,) for url in urls]
+            'INSERT OR IGNORE INTO bank_urls (url, source) VALUES (?, ?)',
+            [(url, source) for url in urls]
         )
         self.conn.commit()
+
+    def register_source(self, name: str, priority: int, base_url: Optional[str] = None) -> None:
+        """Record a source's merge priority; rows of higher priority sources win."""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            INSERT INTO bin_sources (name, priority, base_url) VALUES (?, ?, ?)
+            ON CONFLICT (name) DO UPDATE SET
+                priority = excluded.priority,
+                base_url = excluded.base_url,
+                updated_at = CURRENT_TIMESTAMP
+        ''', (name, priority, base_url))
+        self.conn.commit()
     
     def get_unprocessed_urls(self) -> List[Dict]:
-        """Get all unprocessed bank URLs."""
+        """Get all bank URLs waiting to be scraped (prefer claim_pending_urls for large backlogs)."""
         cursor = self.conn.cursor()
-        cursor.execute('SELECT id, url FROM bank_urls WHERE processed = FALSE')
+        cursor.execute('SELECT id, url FROM bank_urls WHERE status = ?', (URL_PENDING,))
         return [{'id': row[0], 'url': row[1]} for row in cursor.fetchall()]
     
     def mark_url_processed(self, url_id: int) -> None:
         """Mark a bank URL as processed."""
         cursor = self.conn.cursor()
-        cursor.execute('UPDATE bank_urls SET processed = TRUE WHERE id = ?', (url_id,))
+        cursor.execute('''
+            UPDATE bank_urls SET processed = TRUE, status = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (URL_DONE, url_id))
+        self.conn.commit()
+
+    def recover_interrupted_urls(self, lease_seconds: float = CLAIM_LEASE_SECONDS) -> int:
+        """Return URLs left in_progress by a killed run to pending.
+
+        Only claims whose lease expired are recovered, so URLs another live
+        process (the app's scheduler, a second bin-cli) is working on are kept.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            UPDATE bank_urls SET status = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE status = ? AND (updated_at IS NULL OR updated_at < datetime('now', ?))
+        ''', (URL_PENDING, URL_IN_PROGRESS, f'-{int(lease_seconds)} seconds'))
+        self.conn.commit()
+        return cursor.rowcount
+
+    def requeue_failed_urls(self) -> int:
+        """Make failed URLs pending again so the next run retries them."""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            UPDATE bank_urls SET status = ?, processed = FALSE, updated_at = CURRENT_TIMESTAMP
+            WHERE status = ?
+        ''', (URL_PENDING, URL_FAILED))
+        self.conn.commit()
+        return cursor.rowcount
+
+    def claim_pending_urls(self, batch_size: int = CLAIM_BATCH_SIZE, source: Optional[str] = None) -> Iterator[Dict]:
+        """Yield pending bank URLs (of `source` only, if given) in id order, claiming them a batch at a time.
+
+        Each batch is marked in_progress (and its attempt counted) before it is
+        yielded, so concurrent workers never receive the same URL. Only one
+        batch is held in memory, and its lease is renewed while it is worked
+        through. When the consumer stops early, the URLs of the current batch it
+        has not finished (including the one it last received, unless it was
+        already marked done or failed) go back to pending.
+        """
+        last_id = 0
+        while True:
+            batch = self._claim_batch(last_id, batch_size, source)
+            if not batch:
+                return
+            last_id = batch[-1]['id']
+            renewed = monotonic()
+            # A URL counts as consumed once the consumer asks for the next one;
+            # closing the generator instead hands the URL it holds back too
+            consumed = 0
+            try:
+                for url_data in batch:
+                    if monotonic() - renewed > CLAIM_LEASE_SECONDS / 4:
+                        self._renew_claims([held['id'] for held in batch[consumed:]])
+                        renewed = monotonic()
+                    yield url_data
+                    consumed += 1
+            finally:
+                # URLs already marked done or failed are left alone by _release_urls
+                unconsumed = [url_data['id'] for url_data in batch[consumed:]]
+                if unconsumed:
+                    self._release_urls(unconsumed)
+
+    def _claim_batch(self, after_id: int, batch_size: int, source: Optional[str] = None) -> List[Dict]:
+        """Atomically move the next pending URLs after `after_id` to in_progress."""
+        cursor = self.conn.cursor()
         self.conn.commit()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            cursor.execute('''
+                SELECT id, url FROM bank_urls
+                WHERE status = ? AND id > ? AND (? IS NULL OR source = ?)
+                ORDER BY id LIMIT ?
+            ''', (URL_PENDING, after_id, source, source, batch_size))
+            batch = [{'id': row[0], 'url': row[1]} for row in cursor.fetchall()]
+            cursor.executemany('''
+                UPDATE bank_urls
+                SET status = ?, attempts = attempts + 1,
+                    started_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', [(URL_IN_PROGRESS, url_data['id']) for url_data in batch])
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return batch
+
+    def _renew_claims(self, url_ids: List[int]) -> None:
+        """Extend the lease of URLs this process still holds in_progress."""
+        cursor = self.conn.cursor()
+        cursor.executemany('''
+            UPDATE bank_urls SET updated_at = CURRENT_TIMESTAMP WHERE id = ? AND status = ?
+        ''', [(url_id, URL_IN_PROGRESS) for url_id in url_ids])
+        self.conn.commit()
+
+    def _release_urls(self, url_ids: List[int]) -> None:
+        """Hand claimed but unprocessed URLs back to pending."""
+        cursor = self.conn.cursor()
+        cursor.executemany('''
+            UPDATE bank_urls SET status = ?, attempts = attempts - 1, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND status = ?
+        ''', [(URL_PENDING, url_id, URL_IN_PROGRESS) for url_id in url_ids])
+        self.conn.commit()
+
+    def complete_url(self, url_id: int, bank_data: List[BinRecord]) -> None:
+        """Store a bank's BINs and mark its URL done in a single transaction.
+
+        attempts goes back to 0, so it counts the failures in a row since the
+        last success that claim_refresh_url's max_attempts limits.
+        """
+        cursor = self.conn.cursor()
+        try:
+            self._insert_rows(cursor, bank_data, url_id)
+            self._remove_stale_rows(cursor, bank_data, url_id)
+            cursor.execute('''
+                UPDATE bank_urls
+                SET processed = TRUE, status = ?, attempts = 0, last_error = NULL,
+                    updated_at = CURRENT_TIMESTAMP, scraped_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (URL_DONE, url_id))
+            with metrics.timer('db_commit'):
+                self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        metrics.inc('bins', len(bank_data))
+
+    def fail_url(self, url_id: int, error: str) -> None:
+        """Record a failed attempt; the URL is skipped until failures are requeued."""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            UPDATE bank_urls
+            SET processed = TRUE, status = ?, last_error = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (URL_FAILED, error, url_id))
+        self.conn.commit()
+
+    def get_failed_urls(self) -> List[Dict]:
+        """Get failed bank URLs with their attempt count and last error."""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT id, url, attempts, last_error, updated_at
+            FROM bank_urls WHERE status = ? ORDER BY id
+        ''', (URL_FAILED,))
+        return [
+            {'id': row[0], 'url': row[1], 'attempts': row[2], 'last_error': row[3], 'updated_at': row[4]}
+            for row in cursor.fetchall()
+        ]
+
+    def get_source_stats(self) -> List[Dict]:
+        """Per source: merge priority, bank URLs per status and the BINs attributed to it.
+
+        Imported rows are counted under the source None.
+        """
+        cursor = self.conn.cursor()
+        stats: Dict = {}
+
+        def entry(name: Optional[str]) -> Dict:
+            if name not in stats:
+                stats[name] = {'source': name, 'priority': None, 'bins': 0,
+                               'urls': dict.fromkeys((URL_PENDING, URL_IN_PROGRESS, URL_DONE, URL_FAILED), 0)}
+            return stats[name]
+
+        for name, priority in cursor.execute('SELECT name, priority FROM bin_sources ORDER BY priority DESC'):
+            entry(name)['priority'] = priority
+        for name, status, count in cursor.execute('SELECT source, status, COUNT(*) FROM bank_urls GROUP BY source, status'):
+            entry(name)['urls'][status] = count
+        for name, count in cursor.execute('SELECT source, COUNT(*) FROM bin_cards GROUP BY source'):
+            entry(name)['bins'] = count
+        return list(stats.values())
+
+    def get_url_status_counts(self) -> Dict[str, int]:
+        """Count bank URLs per processing status."""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT status, COUNT(*) FROM bank_urls GROUP BY status')
+        counts = {status: 0 for status in (URL_PENDING, URL_IN_PROGRESS, URL_DONE, URL_FAILED)}
+        counts.update(dict(cursor.fetchall()))
+        return counts
         
-    def insert_bank_data(self, bank_data: List[Dict], bank_url_id: int):
+    def insert_bank_data(self, bank_data: List[BinRecord], bank_url_id: int):
         """Insert or update bank BIN data."""
         cursor = self.conn.cursor()
-        for row in bank_data:
-            cursor.execute('''
-            INSERT INTO bin_cards (
-                bin_number,
-                pays,
-                emetteur,
-                marque_carte,
-                type_carte,
-                niveau_carte,
-                bank_url_id
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT (bin_number, pays) 
+        self._insert_rows(cursor, bank_data, bank_url_id)
+        with metrics.timer('db_commit'):
+            self.conn.commit()
+        metrics.inc('bins', len(bank_data))
+
+    def _insert_rows(self, cursor: sqlite3.Cursor, bank_data: List[BinRecord], bank_url_id: int):
+        """Upsert bank BIN rows without committing.
+
+        A BIN and country already stored from another source is only
+        overwritten if that source's priority is not higher than this one's.
+        """
+        insert_start = perf_counter()
+        self.tag_changes(cursor)
+        cursor.execute('SELECT source FROM bank_urls WHERE id = ?', (bank_url_id,))
+        row = cursor.fetchone()
+        source = row[0] if row else None
+        cursor.executemany(f'''
+            INSERT INTO bin_cards ({', '.join(RECORD_FIELDS)}, bank_url_id, source)
+            VALUES ({', '.join('?' * len(RECORD_FIELDS))}, ?, ?)
+            ON CONFLICT (bin_number, pays)
             DO UPDATE SET
                 emetteur=excluded.emetteur,
                 marque_carte=excluded.marque_carte,
                 type_carte=excluded.type_carte,
-                niveau_carte=excluded.niveau_carte
-            ''', (
-                row['Numéro BIN/IIN'],
-                row['Pays'],
-                row['Nom de l\'émetteur / Banque'],
-                row['Marque de carte'],
-                row['Type de carte'],
-                row['Niveau de carte'],
-                bank_url_id
-            ))
+                niveau_carte=excluded.niveau_carte,
+                bank_url_id=excluded.bank_url_id,
+                source=excluded.source
+            WHERE {SOURCE_PRIORITY_WINS}
+        ''', [(*record, bank_url_id, source) for record in bank_data])
+        metrics.observe('db_insert', perf_counter() - insert_start)
+
+    def claim_refresh_url(self, since: str, min_age_days: float, max_attempts: int,
+                          source: Optional[str] = None) -> Optional[Dict]:
+        """Move the bank URL (of `source` only, if given) most in need of a scrape to in_progress and return it.
+
+        Failed URLs under `max_attempts` come first, then never scraped ones,
+        then banks last scraped over `min_age_days` ago, most queried and
+        stalest first. URLs claimed at or after `since` (this run) are skipped.
+        """
+        cursor = self.conn.cursor()
+        self.conn.commit()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            cursor.execute('''
+                SELECT id, url, status FROM bank_urls
+                WHERE (started_at IS NULL OR started_at < :since)
+                  AND (:source IS NULL OR source = :source)
+                  AND ((status = :failed AND attempts < :max_attempts)
+                       OR status = :pending
+                       OR (status = :done AND (scraped_at IS NULL
+                                               OR scraped_at < datetime('now', :min_age))))
+                ORDER BY CASE status WHEN :failed THEN 0 WHEN :pending THEN 1 ELSE 2 END,
+                         query_count DESC, scraped_at
+                LIMIT 1
+            ''', {'since': since, 'failed': URL_FAILED, 'pending': URL_PENDING, 'done': URL_DONE,
+                  'max_attempts': max_attempts, 'min_age': f'-{min_age_days} days', 'source': source})
+            row = cursor.fetchone()
+            if row:
+                cursor.execute('''
+                    UPDATE bank_urls
+                    SET status = ?, attempts = attempts + 1,
+                        started_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (URL_IN_PROGRESS, row[0]))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return {'id': row[0], 'url': row[1], 'status': row[2]} if row else None
+
+    def add_bank_query_counts(self, counts: Dict[str, int]) -> None:
+        """Credit API hits, keyed by issuer name, to the bank pages listing that issuer."""
+        cursor = self.conn.cursor()
+        cursor.executemany('''
+            UPDATE bank_urls SET query_count = query_count + ?
+            WHERE id IN (SELECT DISTINCT bank_url_id FROM bin_cards WHERE emetteur = ?)
+        ''', [(count, name) for name, count in counts.items()])
         self.conn.commit()
 
     def get_total_urls_count(self) -> int:
@@ -81,27 +443,216 @@ class BinDatabase:
         cursor.execute('SELECT COUNT(*) FROM bank_urls')
         return cursor.fetchone()[0]
 
+    def _remove_stale_rows(self, cursor: sqlite3.Cursor, bank_data: List[BinRecord], bank_url_id: int):
+        """Delete this bank's BINs that are no longer listed on its page."""
+        current = {(record.bin_number, record.pays) for record in bank_data}
+        cursor.execute('SELECT bin_number, pays FROM bin_cards WHERE bank_url_id = ?', (bank_url_id,))
+        stale = [key for key in cursor.fetchall() if key not in current]
+        cursor.executemany('DELETE FROM bin_cards WHERE bin_number = ? AND pays = ?', stale)
+
+    def start_generation(self, kind: str) -> int:
+        """Open a new scrape generation; this connection's bin_cards changes are logged under it."""
+        cursor = self.conn.cursor()
+        cursor.execute('INSERT INTO scrape_generations (kind) VALUES (?)', (kind,))
+        self.conn.commit()
+        self.generation_id = cursor.lastrowid
+        return cursor.lastrowid
+
+    def tag_changes(self, cursor: sqlite3.Cursor) -> None:
+        """Attribute the bin_cards writes of the open transaction to this connection's generation.
+
+        Call it inside the write transaction, before the first bin_cards write.
+        """
+        cursor.execute('''
+            INSERT INTO bin_changes_context (id, generation_id) VALUES (1, ?)
+            ON CONFLICT (id) DO UPDATE SET generation_id = excluded.generation_id
+        ''', (self.generation_id or 0,))
+
+    def finish_generation(self, generation_id: int) -> None:
+        """Record when a generation's run ended."""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            UPDATE scrape_generations SET finished_at = CURRENT_TIMESTAMP WHERE id = ?
+        ''', (generation_id,))
+        self.conn.commit()
+
+    def get_latest_generation(self) -> int:
+        """Get the id of the most recent generation (0 before the first run)."""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT COALESCE(MAX(id), 0) FROM scrape_generations')
+        return cursor.fetchone()[0]
+
+    def get_changes(self, after_id: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        """Get bin_cards changes logged after change `after_id`, in id order.
+
+        The change id is the feed cursor: SQLite commits one writer at a time,
+        so ids become visible in order and passing the last id seen never
+        skips a change, even while a generation is still running.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT id, generation_id, change_type, bin_number, pays, emetteur,
+                   marque_carte, type_carte, niveau_carte, changed_at
+            FROM bin_changes
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+        ''', (after_id, -1 if limit is None else limit))
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def get_change_range(self) -> Tuple[int, int]:
+        """Ids of the oldest and newest change still logged ((0, 0) before the first)."""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM bin_changes')
+        return cursor.fetchone()
+
+    def prune_changes(self, keep_days: float, chunk_size: int = CHANGES_PRUNE_CHUNK) -> int:
+        """Delete changes logged more than `keep_days` ago and return how many.
+
+        Rows go oldest first, a chunk per transaction so crawls can write in
+        between. The newest change is always kept, so its id stays the latest
+        cursor for the feed and the range/suggestion indexes.
+        """
+        cursor = self.conn.cursor()
+        pruned = 0
+        while True:
+            cursor.execute('''
+                SELECT MAX(id), COUNT(*) FROM (
+                    SELECT id, changed_at FROM bin_changes
+                    WHERE id < (SELECT MAX(id) FROM bin_changes)
+                    ORDER BY id LIMIT ?
+                ) WHERE changed_at < datetime('now', ?)
+            ''', (chunk_size, f'-{keep_days} days'))
+            last_id, count = cursor.fetchone()
+            if not count:
+                break
+            cursor.execute('DELETE FROM bin_changes WHERE id <= ?', (last_id,))
+            self.conn.commit()
+            pruned += cursor.rowcount
+            if count < chunk_size:
+                break
+        return pruned
+
+    def acquire_job_lease(self, job: str, owner: str, seconds: float) -> bool:
+        """Take or extend the lease on a scheduler job; False if another owner holds it."""
+        cursor = self.conn.cursor()
+        cursor.execute('INSERT OR IGNORE INTO scheduler_jobs (name) VALUES (?)', (job,))
+        cursor.execute('''
+            UPDATE scheduler_jobs SET lease_owner = ?, lease_expires = datetime('now', ?)
+            WHERE name = ? AND (lease_owner IS NULL OR lease_owner = ? OR lease_expires < datetime('now'))
+        ''', (owner, f'+{int(seconds)} seconds', job, owner))
+        self.conn.commit()
+        return cursor.rowcount == 1
+
+    def release_job_lease(self, job: str, owner: str) -> None:
+        """Give up a scheduler job lease held by `owner`."""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            UPDATE scheduler_jobs SET lease_owner = NULL, lease_expires = NULL
+            WHERE name = ? AND lease_owner = ?
+        ''', (job, owner))
+        self.conn.commit()
+
+    def get_job_cursor(self, job: str) -> Optional[str]:
+        """Get where a scheduler job's last budget-limited run stopped."""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT cursor FROM scheduler_jobs WHERE name = ?', (job,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def set_job_cursor(self, job: str, position: Optional[str]) -> None:
+        """Record where a scheduler job should resume; None starts the next run over."""
+        cursor = self.conn.cursor()
+        cursor.execute('INSERT OR IGNORE INTO scheduler_jobs (name) VALUES (?)', (job,))
+        cursor.execute('UPDATE scheduler_jobs SET cursor = ? WHERE name = ?', (position, job))
+        self.conn.commit()
+
+    def start_scheduler_run(self, job: str, trigger: str) -> int:
+        """Record the start of a scheduler run."""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            INSERT INTO scheduler_runs (job, trigger, status) VALUES (?, ?, 'running')
+        ''', (job, trigger))
+        self.conn.commit()
+        return cursor.lastrowid
+
+    def finish_scheduler_run(self, run_id: int, status: str, processed: int = 0, failed: int = 0,
+                             note: Optional[str] = None) -> None:
+        """Record how a scheduler run ended."""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            UPDATE scheduler_runs
+            SET status = ?, processed = ?, failed = ?, note = ?, finished_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (status, processed, failed, note, run_id))
+        self.conn.commit()
+
+    def get_scheduler_runs(self, limit: int = 20) -> List[Dict]:
+        """Get the most recent scheduler runs, newest first."""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT id, job, trigger, status, processed, failed, note, started_at, finished_at
+            FROM scheduler_runs ORDER BY id DESC LIMIT ?
+        ''', (limit,))
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def get_unchecked_bins(self, limit: Optional[int] = None, sample: bool = False) -> List[str]:
+        """Get BINs without a cached checker answer, in BIN order or a random sample."""
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+            SELECT DISTINCT bin_number FROM bin_cards AS c
+            WHERE NOT EXISTS (SELECT 1 FROM bin_checks AS k WHERE k.bin_number = c.bin_number)
+            ORDER BY {'RANDOM()' if sample else 'bin_number'}
+            LIMIT ?
+        ''', (-1 if limit is None else limit,))
+        return [row[0] for row in cursor.fetchall()]
+
+    def save_bin_checks(self, checks: List[Dict]) -> None:
+        """Cache checker answers (see check_bin.normalize_response)."""
+        cursor = self.conn.cursor()
+        cursor.executemany('''
+            INSERT OR REPLACE INTO bin_checks
+                (bin_number, valid, scheme, card_type, level, issuer, country, country_code)
+            VALUES (:bin_number, :valid, :scheme, :card_type, :level, :issuer, :country, :country_code)
+        ''', checks)
+        self.conn.commit()
+
+    def get_checked_bins(self) -> Iterator[Dict]:
+        """Yield every bin_cards row that has a cached checker answer, side by side."""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT c.bin_number, c.pays, c.emetteur, c.marque_carte, c.type_carte, c.niveau_carte,
+                   k.valid, k.scheme, k.card_type, k.level, k.issuer, k.country
+            FROM bin_cards AS c JOIN bin_checks AS k ON k.bin_number = c.bin_number
+            ORDER BY c.bin_number
+        ''')
+        columns = [description[0] for description in cursor.description]
+        for row in cursor:
+            yield dict(zip(columns, row))
+
     def get_processed_urls_count(self) -> int:
         """Get the count of processed bank URLs."""
         cursor = self.conn.cursor()
         cursor.execute('SELECT COUNT(*) FROM bank_urls WHERE processed = TRUE')
         return cursor.fetchone()[0]
     
+    def iter_bin_records(self) -> Iterator[BinRecord]:
+        """Stream every stored BIN as a BinRecord, in storage order."""
+        cursor = self.conn.cursor()
+        cursor.execute(f'SELECT {", ".join(RECORD_FIELDS)} FROM bin_cards')
+        for row in cursor:
+            yield BinRecord._make(row)
+
     def export_bins_to_csv(self, csv_path: str) -> None:
         """Export all BIN data to a CSV file."""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT bin_number, pays, emetteur, marque_carte, type_carte, niveau_carte 
-            FROM bin_cards
-        ''')
-        
         import csv
         with open(csv_path, 'w', newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
-            # Write headers
-            writer.writerow(['BIN', 'Pays', 'Emetteur', 'Marque', 'Type', 'Niveau'])
-            # Write data
-            writer.writerows(cursor.fetchall())
+            writer.writerow(EXPORT_HEADERS)
+            # Streamed from the cursor rather than fetched whole
+            writer.writerows(self.iter_bin_records())
     
     def close(self):
         """Close the database connection."""
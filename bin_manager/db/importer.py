@@ -0,0 +1,172 @@
+import csv
+import json
+import os
+import time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from bin_manager.db.database import SOURCE_PRIORITY_WINS, BinDatabase
+from bin_manager.db.ranges import BinRangeIndex
+from bin_manager.records import BinRecord, RECORD_FIELDS, header_positions, is_valid, resolve_columns
+# Header aliases and required columns now live with BinRecord; kept importable from here
+from bin_manager.records import FIELD_ALIASES, REQUIRED_COLUMNS  # noqa: F401
+
+# bin_cards columns loaded by the importer, in staging table order
+IMPORT_COLUMNS = RECORD_FIELDS
+
+DEFAULT_BATCH_SIZE = 100_000
+
+# Drop and rebuild secondary indexes only when the import is at least this
+# large relative to bin_cards; small merges are cheaper with indexes in place
+INDEX_REBUILD_RATIO = 0.1
+
+# Any RECORD_FIELDS-ordered tuple; BinRecord is one
+Row = Tuple[Optional[str], ...]
+
+
+def _clean(value) -> Optional[str]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def iter_csv(path: str) -> Iterator[BinRecord]:
+    """Stream rows from a CSV file with a header line."""
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        headers = next(reader, None)
+        if headers is None:
+            return
+        positions = header_positions(headers)
+        for record in reader:
+            yield BinRecord._make(
+                _clean(record[pos]) if pos is not None and pos < len(record) else None
+                for pos in positions
+            )
+
+
+def iter_jsonl(path: str) -> Iterator[BinRecord]:
+    """Stream rows from a JSON Lines file, one object per line."""
+    mapping = None
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if mapping is None:
+                mapping = resolve_columns(record.keys())
+            yield BinRecord._make(_clean(record.get(mapping[c])) if c in mapping else None for c in IMPORT_COLUMNS)
+
+
+def iter_records(path: str) -> Iterator[BinRecord]:
+    """Pick the reader from the file extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.ndjson', '.json'):
+        return iter_jsonl(path)
+    return iter_csv(path)
+
+
+def import_bins(path: str, db: Optional[BinDatabase] = None, batch_size: int = DEFAULT_BATCH_SIZE) -> Dict:
+    """Bulk load a CSV/JSONL BIN dataset into bin_cards."""
+    return import_rows(iter_records(path), db, batch_size)
+
+
+def import_rows(records: Iterable[Row], db: Optional[BinDatabase] = None,
+                batch_size: int = DEFAULT_BATCH_SIZE, kind: str = 'import',
+                source: Optional[str] = None) -> Dict:
+    """Merge BinRecords (or IMPORT_COLUMNS-ordered tuples) into bin_cards as one generation.
+
+    Rows are streamed into a temporary staging table, the secondary bin_cards
+    indexes are dropped, and everything is merged with a single
+    INSERT ... ON CONFLICT before the indexes are rebuilt. bin_ranges is
+    brought up to date afterwards.
+
+    Rows are attributed to `source` (None for plain imports) and, like
+    scraped rows, only replace rows of sources with no higher priority.
+    """
+    own_db = db is None
+    db = db or BinDatabase()
+    conn = db.conn
+    stats = {'read': 0, 'skipped': 0, 'merged': 0, 'rebuilt_indexes': False, 'seconds': 0.0,
+             # Feed cursor to list this import's changes from (--changes-since)
+             'changes_after': db.get_change_range()[1],
+             'generation': db.start_generation(kind)}
+    start = time.time()
+    synchronous = conn.execute('PRAGMA synchronous').fetchone()[0]
+
+    try:
+        conn.execute('PRAGMA synchronous = OFF')
+        conn.execute('DROP TABLE IF EXISTS temp.bin_import_staging')
+        conn.execute(f'CREATE TEMP TABLE bin_import_staging ({", ".join(IMPORT_COLUMNS)}, source)')
+
+        records = iter(records)
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+            stats['read'] += len(batch)
+            valid = [(*row, source) for row in batch if is_valid(row)]
+            stats['skipped'] += len(batch) - len(valid)
+            conn.executemany(
+                f'INSERT INTO bin_import_staging VALUES ({", ".join("?" * (len(IMPORT_COLUMNS) + 1))})',
+                valid
+            )
+        conn.commit()
+
+        staged = stats['read'] - stats['skipped']
+        existing = conn.execute('SELECT COUNT(*) FROM bin_cards').fetchone()[0]
+
+        # Secondary indexes are cheaper to rebuild once than to maintain per row.
+        # The UNIQUE(bin_number, pays) autoindex stays, ON CONFLICT needs it.
+        # Explicit BEGIN so the DROP/CREATE INDEX statements roll back on failure.
+        conn.execute('BEGIN')
+        db.tag_changes(conn.cursor())
+        indexes = []
+        if staged >= existing * INDEX_REBUILD_RATIO:
+            indexes = conn.execute('''
+                SELECT name, sql FROM sqlite_master
+                WHERE type = 'index' AND tbl_name = 'bin_cards' AND sql IS NOT NULL
+            ''').fetchall()
+            stats['rebuilt_indexes'] = bool(indexes)
+        for name, _ in indexes:
+            conn.execute(f'DROP INDEX {name}')
+
+        # rowcount, unlike total_changes, leaves out the bin_changes trigger rows
+        # and the rows kept for a higher priority source. Staged rows have no
+        # bank URL, so a row changing source loses its link; a reparse of the
+        # row's own source keeps it.
+        merge = conn.execute(f'''
+            INSERT INTO bin_cards ({", ".join(IMPORT_COLUMNS)}, source)
+            SELECT {", ".join(IMPORT_COLUMNS)}, source FROM bin_import_staging
+            ORDER BY bin_number, pays
+            ON CONFLICT (bin_number, pays)
+            DO UPDATE SET
+                emetteur=excluded.emetteur,
+                marque_carte=excluded.marque_carte,
+                type_carte=excluded.type_carte,
+                niveau_carte=excluded.niveau_carte,
+                bank_url_id=CASE WHEN bin_cards.source IS excluded.source
+                                 THEN bin_cards.bank_url_id END,
+                source=excluded.source
+            WHERE {SOURCE_PRIORITY_WINS}
+        ''')
+        stats['merged'] = merge.rowcount
+
+        for _, sql in indexes:
+            conn.execute(sql)
+        conn.commit()
+        db.finish_generation(stats['generation'])
+        BinRangeIndex(conn).refresh()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute('DROP TABLE IF EXISTS temp.bin_import_staging')
+        conn.execute(f'PRAGMA synchronous = {synchronous}')
+        if own_db:
+            db.close()
+
+    stats['seconds'] = time.time() - start
+    return stats
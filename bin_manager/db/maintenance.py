@@ -0,0 +1,279 @@
+"""Keep a long-lived BIN database compact and its query plans informed.
+
+Upserts and resets leave free pages behind, and without ANALYZE the planner
+guesses at index selectivity. `maintain` checks integrity, hands free pages
+back to the file system with incremental vacuum, refreshes the planner
+statistics and records page counts before and after in maintenance_runs.
+
+Readers are never blocked: in WAL mode they keep reading their snapshot,
+and the vacuum runs in short steps so crawls only wait for one step.
+
+    bin-cli --maintain
+    python -m bin_manager.app.scheduler --run maintenance
+"""
+import os
+import sqlite3
+import time
+from typing import Callable, Dict, List, Optional
+
+from bin_manager.db.database import BinDatabase
+
+# PRAGMA auto_vacuum values
+AUTO_VACUUM_MODES = {0: 'none', 1: 'full', 2: 'incremental'}
+AUTO_VACUUM_INCREMENTAL = 2
+
+# Pages released per incremental_vacuum step; each step holds the write lock
+# (about 50 ms for 500 pages)
+VACUUM_STEP_PAGES = 500
+
+# Rows ANALYZE samples per index (PRAGMA analysis_limit); bounds its run time
+ANALYSIS_LIMIT = 1000
+
+# Tables are re-analyzed once their row count moved this much since the last
+# ANALYZE, and by at least STATS_MIN_CHANGE rows so small tables stay quiet
+STATS_DRIFT = 0.2
+STATS_MIN_CHANGE = 1000
+
+# bin_changes rows older than this are pruned; feed clients and the range
+# index must have read them by then
+CHANGES_RETENTION_DAYS = 90
+
+# Integrity problems reported at most
+MAX_INTEGRITY_ERRORS = 100
+
+# Objects listed in the size report
+TOP_OBJECTS = 10
+
+
+def _pragma(conn: sqlite3.Connection, name: str):
+    return conn.execute(f'PRAGMA {name}').fetchone()[0]
+
+
+def size_report(conn: sqlite3.Connection) -> Dict:
+    """Page counts, file and WAL sizes, and the space used by each table and index."""
+    page_size = _pragma(conn, 'page_size')
+    page_count = _pragma(conn, 'page_count')
+    freelist_count = _pragma(conn, 'freelist_count')
+    path = conn.execute('PRAGMA database_list').fetchone()[2]
+    wal_path = f'{path}-wal'
+    report = {
+        'page_size': page_size,
+        'page_count': page_count,
+        'freelist_count': freelist_count,
+        'bytes': page_count * page_size,
+        'free_bytes': freelist_count * page_size,
+        'wal_bytes': os.path.getsize(wal_path) if path and os.path.exists(wal_path) else 0,
+        'auto_vacuum': AUTO_VACUUM_MODES.get(_pragma(conn, 'auto_vacuum'), 'unknown'),
+        'objects': [],
+    }
+    try:
+        # Unused bytes inside the pages show how fragmented a table or index has become
+        report['objects'] = [
+            {'name': name, 'type': kind or 'internal', 'pages': pages, 'bytes': size, 'unused_bytes': unused}
+            for name, kind, pages, size, unused in conn.execute('''
+                SELECT s.name, m.type, COUNT(*), SUM(s.pgsize), SUM(s.unused)
+                FROM dbstat AS s LEFT JOIN sqlite_master AS m ON m.name = s.name
+                GROUP BY s.name ORDER BY SUM(s.pgsize) DESC
+            ''')
+        ]
+    except sqlite3.OperationalError:
+        # SQLite built without the dbstat virtual table
+        pass
+    return report
+
+
+def check_integrity(conn: sqlite3.Connection, full: bool = False) -> List[str]:
+    """Problems found by quick_check (or integrity_check, which also verifies index contents)."""
+    check = 'integrity_check' if full else 'quick_check'
+    rows = [row[0] for row in conn.execute(f'PRAGMA {check}({MAX_INTEGRITY_ERRORS})')]
+    return [] if rows == ['ok'] else rows
+
+
+def convert_to_incremental(conn: sqlite3.Connection) -> None:
+    """Switch a database created without incremental auto_vacuum; rewrites it with a full VACUUM.
+
+    The VACUUM blocks writers for its whole run and needs free disk space
+    for a copy of the database.
+    """
+    conn.commit()
+    conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    conn.execute('VACUUM')
+
+
+def incremental_vacuum(conn: sqlite3.Connection, should_stop: Callable[[], bool] = lambda: False,
+                       step_pages: int = VACUUM_STEP_PAGES) -> int:
+    """Release free pages to the file system in short steps; return the pages released."""
+    if _pragma(conn, 'auto_vacuum') != AUTO_VACUUM_INCREMENTAL:
+        return 0
+    conn.commit()
+    released = 0
+    while not should_stop():
+        free = _pragma(conn, 'freelist_count')
+        if not free:
+            break
+        conn.execute(f'PRAGMA incremental_vacuum({min(free, step_pages)})').fetchall()
+        released += free - _pragma(conn, 'freelist_count')
+    return released
+
+
+def stale_tables(conn: sqlite3.Connection) -> List[str]:
+    """Tables without planner statistics, or whose row count drifted past STATS_DRIFT since."""
+    tables = [row[0] for row in conn.execute('''
+        SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'
+    ''')]
+    analyzed = {}
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+        # The first number of each index's stat is the table's row count at ANALYZE time
+        for table, stat in conn.execute('SELECT tbl, stat FROM sqlite_stat1'):
+            analyzed[table] = max(analyzed.get(table, 0), int(stat.split()[0]))
+    stale = []
+    for table in tables:
+        rows = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+        if table not in analyzed:
+            if rows:
+                stale.append(table)
+        elif abs(rows - analyzed[table]) > max(STATS_DRIFT * analyzed[table], STATS_MIN_CHANGE):
+            stale.append(table)
+    return stale
+
+
+def analyze(conn: sqlite3.Connection) -> List[str]:
+    """Refresh planner statistics of the stale tables; return the tables analyzed.
+
+    PRAGMA optimize alone only looks at tables queried on its own connection,
+    which is a fresh one here, so staleness is judged from row counts first.
+    """
+    conn.commit()
+    conn.execute(f'PRAGMA analysis_limit = {ANALYSIS_LIMIT}')
+    tables = stale_tables(conn)
+    for table in tables:
+        conn.execute(f'ANALYZE "{table}"')
+    conn.execute('PRAGMA optimize')
+    return tables
+
+
+def maintain(db: Optional[BinDatabase] = None, full_check: bool = False, convert: bool = False,
+             should_stop: Callable[[], bool] = lambda: False,
+             keep_changes_days: float = CHANGES_RETENTION_DAYS) -> Dict:
+    """Prune old changes, then check, vacuum and analyze the database, recording the run in maintenance_runs.
+
+    A database failing its integrity check is reported but left untouched.
+    `convert` runs the one-off full VACUUM that enables incremental vacuum
+    on databases created before it was the default.
+    """
+    own_db = db is None
+    db = db or BinDatabase()
+    conn = db.conn
+    start = time.time()
+    try:
+        conn.commit()
+        previous = conn.execute('''
+            SELECT finished_at, free_pages_after FROM maintenance_runs
+            WHERE finished_at IS NOT NULL ORDER BY id DESC LIMIT 1
+        ''').fetchone()
+        started_at = conn.execute('SELECT CURRENT_TIMESTAMP').fetchone()[0]
+        report = {
+            'before': size_report(conn),
+            'previous_run': previous[0] if previous else None,
+            'previous_free_pages': previous[1] if previous else None,
+            'integrity': check_integrity(conn, full_check),
+            'integrity_check': 'integrity_check' if full_check else 'quick_check',
+            'converted': False,
+            'pruned_changes': 0,
+            'keep_changes_days': keep_changes_days,
+            'released_pages': 0,
+            'analyzed': None,
+            'stopped': False,
+        }
+
+        if not report['integrity']:
+            if convert and _pragma(conn, 'auto_vacuum') != AUTO_VACUUM_INCREMENTAL:
+                convert_to_incremental(conn)
+                report['converted'] = True
+            # Pruned first, so the vacuum below releases the pages they held
+            report['pruned_changes'] = db.prune_changes(keep_changes_days)
+            report['released_pages'] = incremental_vacuum(conn, should_stop)
+            if not should_stop():
+                report['analyzed'] = analyze(conn)
+            report['stopped'] = should_stop()
+            # Copy what fits back into the database file without waiting on readers.
+            # The VACUUM copied the whole database through the WAL; shrink it back.
+            checkpoint = 'TRUNCATE' if report['converted'] else 'PASSIVE'
+            conn.execute(f'PRAGMA wal_checkpoint({checkpoint})').fetchall()
+
+        report['after'] = size_report(conn)
+        report['seconds'] = time.time() - start
+        conn.execute('''
+            INSERT INTO maintenance_runs
+                (started_at, finished_at, page_size, pages_before, pages_after,
+                 free_pages_before, free_pages_after, integrity, analyzed)
+            VALUES (?, CURRENT_TIMESTAMP, ?, ?, ?, ?, ?, ?, ?)
+        ''', (started_at, report['after']['page_size'], report['before']['page_count'],
+              report['after']['page_count'], report['before']['freelist_count'],
+              report['after']['freelist_count'], '; '.join(report['integrity']) or 'ok',
+              None if report['analyzed'] is None else ', '.join(report['analyzed'])))
+        conn.commit()
+    finally:
+        if own_db:
+            db.close()
+    return report
+
+
+def _mb(size: int) -> str:
+    return f"{size / 1024 / 1024:,.1f} MB"
+
+
+def _analyzed(report: Dict) -> str:
+    if report['analyzed'] is None:
+        return 'skipped'
+    return f"analyzed {', '.join(report['analyzed'])}" if report['analyzed'] else 'up to date'
+
+
+def summary(report: Dict) -> str:
+    """One line for logs and scheduler run notes."""
+    before, after = report['before'], report['after']
+    if report['integrity']:
+        return f"integrity check failed: {report['integrity'][0]}"
+    return (f"{report['pruned_changes']:,} old changes pruned, "
+            f"{report['released_pages']:,} pages released, {_mb(before['bytes'])} -> {_mb(after['bytes'])}, "
+            f"{after['freelist_count']:,} free pages left, statistics {_analyzed(report)}")
+
+
+def format_report(report: Dict) -> str:
+    """The before/after report printed by `bin-cli --maintain`."""
+    before, after = report['before'], report['after']
+    lines = [
+        f"Finished in {report['seconds']:.1f}s (auto_vacuum: {after['auto_vacuum']})",
+        "",
+        f"{'':<14}{'before':>14}{'after':>14}",
+        f"{'Pages':<14}{before['page_count']:>14,}{after['page_count']:>14,}",
+        f"{'Free pages':<14}{before['freelist_count']:>14,}{after['freelist_count']:>14,}",
+        f"{'Size':<14}{_mb(before['bytes']):>14}{_mb(after['bytes']):>14}",
+        f"{'WAL':<14}{_mb(before['wal_bytes']):>14}{_mb(after['wal_bytes']):>14}",
+        "",
+    ]
+    if report['previous_run']:
+        growth = before['freelist_count'] - report['previous_free_pages']
+        lines.append(f"Free pages since the last run ({report['previous_run']}): {growth:+,}")
+    if report['integrity']:
+        lines.append(f"Integrity ({report['integrity_check']}): {len(report['integrity'])} problem(s), "
+                     "nothing was changed")
+        lines.extend(f"  {problem}" for problem in report['integrity'])
+        return '\n'.join(lines)
+    lines.append(f"Integrity ({report['integrity_check']}): ok")
+    if report['converted']:
+        lines.append("Converted to incremental auto_vacuum with a full VACUUM")
+    elif after['auto_vacuum'] != 'incremental':
+        lines.append("Free pages are only reused, not released: run once with --vacuum-full "
+                     "to enable incremental vacuum")
+    lines.append(f"Changes older than {report['keep_changes_days']:g} days pruned: {report['pruned_changes']:,}")
+    lines.append(f"Pages released: {report['released_pages']:,}"
+                 + (" (stopped early)" if report['stopped'] else ""))
+    lines.append(f"Planner statistics: {_analyzed(report)}")
+    if after['objects']:
+        lines.append("")
+        lines.append("Largest tables and indexes:")
+        for obj in after['objects'][:TOP_OBJECTS]:
+            lines.append(f"  {obj['name']:<34} {obj['type']:<8}{_mb(obj['bytes']):>12}"
+                         f"  ({_mb(obj['unused_bytes'])} unused)")
+    return '\n'.join(lines)
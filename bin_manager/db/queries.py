@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Parameterized read queries shared by bin-cli and the web API.
+
+Substring filters (`bank`, `country`) are resolved to exact issuer/country
+names with a scan of a narrow covering index, then rows are fetched by
+equality on the (pays, emetteur, bin_number) / (emetteur, bin_number)
+indexes, already ordered by BIN. When the filters are empty or match more
+than FAN_OUT_LIMIT names, a single query walks the BIN index in order and
+stops at the LIMIT instead. Run `python -m bin_manager.db.queries` to print
+every query plan; it exits non-zero if one scans the bin_cards table (other
+than through a covering index or an intended BIN-order walk) or sorts
+through a temporary B-tree.
+"""
+import argparse
+import heapq
+import sqlite3
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+BIN_COLUMNS = 'bin_number, pays, emetteur, marque_carte, type_carte, niveau_carte'
+
+# LIMIT value meaning "no limit"
+NO_LIMIT = -1
+
+# Most issuers or (country, issuer) pairs fetched with one query each; broader
+# filters use a single bins_matching query in BIN order
+FAN_OUT_LIMIT = 32
+
+QUERIES = {
+    'bins_by_prefix': f'''
+        SELECT {BIN_COLUMNS} FROM bin_cards
+        WHERE bin_number >= ? AND bin_number < ?
+        ORDER BY bin_number LIMIT ?
+    ''',
+    'search_by_prefix': f'''
+        SELECT {BIN_COLUMNS} FROM bin_cards
+        WHERE bin_number >= ? AND bin_number < ? AND emetteur LIKE ? AND pays LIKE ?
+        ORDER BY bin_number LIMIT ?
+    ''',
+    'bins_matching': f'''
+        SELECT {BIN_COLUMNS} FROM bin_cards
+        WHERE emetteur LIKE ? AND pays LIKE ?
+        ORDER BY bin_number LIMIT ?
+    ''',
+    'bins_by_issuer': f'''
+        SELECT {BIN_COLUMNS} FROM bin_cards
+        WHERE emetteur = ?
+        ORDER BY bin_number LIMIT ?
+    ''',
+    'bins_by_country_issuer': f'''
+        SELECT {BIN_COLUMNS} FROM bin_cards
+        WHERE pays = ? AND emetteur = ?
+        ORDER BY bin_number LIMIT ?
+    ''',
+    'issuers_by_country': '''
+        SELECT DISTINCT emetteur FROM bin_cards
+        WHERE pays = ?
+        ORDER BY emetteur
+    ''',
+    'matching_issuers': '''
+        SELECT DISTINCT emetteur FROM bin_cards
+        WHERE emetteur LIKE ?
+    ''',
+    'matching_countries': '''
+        SELECT DISTINCT pays FROM bin_cards
+        WHERE pays LIKE ?
+    ''',
+    'matching_country_issuers': '''
+        SELECT DISTINCT pays, emetteur FROM bin_cards
+        WHERE pays LIKE ? AND emetteur LIKE ?
+    ''',
+}
+
+# Sample parameters used to EXPLAIN each query
+SAMPLE_PARAMS = {
+    'bins_by_prefix': ('4111', '4112', NO_LIMIT),
+    'search_by_prefix': ('4111', '4112', '%', '%', 50),
+    'bins_matching': ('%bnp%', '%', 50),
+    'bins_by_issuer': ('BNP PARIBAS', NO_LIMIT),
+    'bins_by_country_issuer': ('FRANCE', 'BNP PARIBAS', NO_LIMIT),
+    'issuers_by_country': ('FRANCE',),
+    'matching_issuers': ('%bnp%',),
+    'matching_countries': ('%fra%',),
+    'matching_country_issuers': ('%fra%', '%bnp%'),
+}
+
+# Queries expected to walk a whole index in BIN order, stopping at the LIMIT
+INDEX_WALKS = {'bins_matching'}
+
+BinRow = Tuple
+
+
+def contains(text: Optional[str]) -> str:
+    """LIKE pattern matching `text` anywhere (everything when empty)."""
+    return f"%{text}%" if text else '%'
+
+
+def prefix_bounds(prefix: str) -> Tuple[str, str]:
+    """Half-open [low, high) bin_number range covering every BIN starting with `prefix`."""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _rows(conn: sqlite3.Connection, name: str, params: Iterable) -> List[BinRow]:
+    return conn.execute(QUERIES[name], tuple(params)).fetchall()
+
+
+def _merge_by_bin(groups: Iterable[List[BinRow]], limit: int = NO_LIMIT) -> List[BinRow]:
+    merged = heapq.merge(*groups, key=lambda row: row[0])
+    if limit == NO_LIMIT:
+        return list(merged)
+    return [row for _, row in zip(range(limit), merged)]
+
+
+def find_by_prefix(conn: sqlite3.Connection, prefix: str, limit: int = NO_LIMIT) -> List[BinRow]:
+    """BINs starting with `prefix`, ordered by BIN."""
+    if not prefix:
+        return []
+    return _rows(conn, 'bins_by_prefix', (*prefix_bounds(prefix), limit))
+
+
+def bank_bins(conn: sqlite3.Connection, bank: str, limit: int = NO_LIMIT) -> List[BinRow]:
+    """BINs of every issuer whose name contains `bank`, ordered by BIN."""
+    if not bank:
+        return _rows(conn, 'bins_matching', ('%', '%', limit))
+    issuers = [row[0] for row in _rows(conn, 'matching_issuers', (contains(bank),))]
+    if len(issuers) > FAN_OUT_LIMIT:
+        return _rows(conn, 'bins_matching', (contains(bank), '%', limit))
+    return _merge_by_bin(
+        (_rows(conn, 'bins_by_issuer', (issuer, limit)) for issuer in issuers), limit)
+
+
+def country_bank_bins(conn: sqlite3.Connection, country: Optional[str], bank: Optional[str],
+                      limit: int = NO_LIMIT) -> List[BinRow]:
+    """BINs whose country and issuer contain the given texts, ordered by BIN."""
+    if not country and not bank:
+        return _rows(conn, 'bins_matching', ('%', '%', limit))
+    pairs = _rows(conn, 'matching_country_issuers', (contains(country), contains(bank)))
+    if len(pairs) > FAN_OUT_LIMIT:
+        return _rows(conn, 'bins_matching', (contains(bank), contains(country), limit))
+    return _merge_by_bin(
+        (_rows(conn, 'bins_by_country_issuer', (pays, issuer, limit)) for pays, issuer in pairs), limit)
+
+
+def country_banks(conn: sqlite3.Connection, country: str) -> List[str]:
+    """Sorted issuer names of every country whose name contains `country`."""
+    countries = [row[0] for row in _rows(conn, 'matching_countries', (contains(country),))]
+    issuers = set()
+    for pays in countries:
+        issuers.update(row[0] for row in _rows(conn, 'issuers_by_country', (pays,)))
+    return sorted(issuers)
+
+
+def search(conn: sqlite3.Connection, bin_prefix: Optional[str] = None, bank: Optional[str] = None,
+           country: Optional[str] = None, limit: int = 50) -> List[BinRow]:
+    """Combined API search; every filter is optional."""
+    if bin_prefix:
+        return _rows(conn, 'search_by_prefix',
+                     (*prefix_bounds(bin_prefix), contains(bank), contains(country), limit))
+    return country_bank_bins(conn, country, bank, limit)
+
+
+def explain(conn: sqlite3.Connection, name: str) -> List[str]:
+    """EXPLAIN QUERY PLAN detail lines for a named query."""
+    return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {QUERIES[name]}', SAMPLE_PARAMS[name])]
+
+
+def plan_problems(plan: List[str], index_walk: bool = False) -> List[str]:
+    """Plan steps that read the whole bin_cards table or sort in a temp B-tree.
+
+    Scans of a covering index are allowed; with `index_walk`, so is a scan of
+    the BIN index itself.
+    """
+    def is_problem(step: str) -> bool:
+        if step.startswith('USE TEMP B-TREE'):
+            return True
+        if not step.startswith('SCAN bin_cards'):
+            return False
+        if 'USING COVERING INDEX' in step:
+            return False
+        return not (index_walk and 'USING INDEX sqlite_autoindex_bin_cards_1' in step)
+    return [step for step in plan if is_problem(step)]
+
+
+def check_plans(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    """Map each query name to its plan problems (empty when the plan is fine)."""
+    return {name: plan_problems(explain(conn, name), name in INDEX_WALKS) for name in QUERIES}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the query plans of the shared BIN queries')
+    parser.add_argument('--db', default=':memory:',
+                       help='Database to EXPLAIN against (default: a fresh in-memory schema)')
+    args = parser.parse_args()
+
+    from bin_manager.db.database import BinDatabase
+    db = BinDatabase(args.db)
+    try:
+        failed = False
+        for name in QUERIES:
+            plan = explain(db.conn, name)
+            problems = plan_problems(plan, name in INDEX_WALKS)
+            failed = failed or bool(problems)
+            print(f"{'FAIL' if problems else 'ok':>4}  {name}")
+            for step in plan:
+                print(f"        {step}")
+    finally:
+        db.close()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
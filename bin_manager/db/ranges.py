@@ -0,0 +1,229 @@
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Longest run of consecutive BINs stored as one range. Lookups only scan
+# ranges starting at most this far below the key, so it bounds the search.
+MAX_RANGE_SPAN = 1000
+
+# Shortest number routed to the range index; shorter prefixes use LIKE
+MIN_LOOKUP_DIGITS = 6
+
+# Pending changes above this fraction of the stored ranges trigger a full
+# rebuild instead of patching the affected ranges one by one
+FULL_REBUILD_RATIO = 0.2
+
+# Seconds between syncs of bin_ranges by the web app's background task
+SYNC_INTERVAL = 10.0
+
+# (synced change id, BIN lengths stored) of the ranges last read by lookup();
+# the lengths only change when a sync moves the change id
+_digits_cache: Tuple[Optional[int], List[int]] = (None, [])
+
+RANGE_COLUMNS = ('digits', 'range_start', 'range_end', 'pays', 'emetteur',
+                 'marque_carte', 'type_carte', 'niveau_carte', 'bin_count')
+
+CARD_COLUMNS = 'bin_number, pays, emetteur, marque_carte, type_carte, niveau_carte'
+
+Range = Tuple
+
+
+def merge_runs(rows: Iterable[Tuple]) -> Iterator[Range]:
+    """Collapse bin_cards rows into ranges, in RANGE_COLUMNS order.
+
+    Rows must be sorted by BIN length, the metadata columns and then
+    bin_number; BINs that are not all digits are skipped.
+    """
+    current = None
+    for bin_number, *details in rows:
+        if not (bin_number.isascii() and bin_number.isdigit()):
+            continue
+        key = (len(bin_number), *details)
+        value = int(bin_number)
+        if (current and current[0] == key and value == current[2] + 1
+                and value - current[1] < MAX_RANGE_SPAN):
+            current[2] = value
+            current[3] += 1
+            continue
+        if current:
+            yield (current[0][0], current[1], current[2], *current[0][1:], current[3])
+        current = [key, value, value, 1]
+    if current:
+        yield (current[0][0], current[1], current[2], *current[0][1:], current[3])
+
+
+class BinRangeIndex:
+    """Interval lookup over bin_cards stored as merged [start, end] BIN ranges.
+
+    The ranges are kept in step with bin_cards through the bin_changes log by
+    the writers: `refresh()` applies the changes recorded since the last sync
+    and runs after scrapes and imports and in the web app's background.
+    Lookups only read; while the ranges are behind bin_cards they answer
+    from bin_cards directly. The tables are created by schema.sql.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self._synced: Optional[int] = None
+
+    def _latest_change(self) -> int:
+        return self.conn.execute('SELECT COALESCE(MAX(id), 0) FROM bin_changes').fetchone()[0]
+
+    def _stored_change(self) -> Optional[int]:
+        row = self.conn.execute("SELECT value FROM bin_ranges_meta WHERE key = 'change_id'").fetchone()
+        return row[0] if row else None
+
+    def refresh(self) -> None:
+        """Bring bin_ranges up to date with bin_cards if it fell behind (writes)."""
+        latest = self._latest_change()
+        if latest == self._synced:
+            return
+        stored = self._stored_change()
+        if stored != latest:
+            ranges = self.conn.execute('SELECT COUNT(*) FROM bin_ranges').fetchone()[0]
+            # Changes after `stored` may have been pruned (BinDatabase.prune_changes)
+            oldest = self.conn.execute('SELECT COALESCE(MIN(id), 0) FROM bin_changes').fetchone()[0]
+            if (stored is None or stored > latest or stored < oldest - 1
+                    or latest - stored > ranges * FULL_REBUILD_RATIO):
+                self.rebuild()
+            else:
+                self._apply_changes(stored, latest)
+        self._synced = latest
+
+    def rebuild(self) -> int:
+        """Recompute every range from bin_cards and return the range count."""
+        latest = self._latest_change()
+        cursor = self.conn.cursor()
+        self.conn.commit()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            cursor.execute('DELETE FROM bin_ranges')
+            rows = self.conn.execute(f'''
+                SELECT {CARD_COLUMNS} FROM bin_cards
+                ORDER BY length(bin_number), pays, emetteur, marque_carte,
+                         type_carte, niveau_carte, bin_number
+            ''')
+            self._insert_ranges(cursor, merge_runs(rows))
+            self._store_change(cursor, latest)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return self.conn.execute('SELECT COUNT(*) FROM bin_ranges').fetchone()[0]
+
+    def _apply_changes(self, after_id: int, latest: int) -> None:
+        """Re-merge only the ranges around BINs changed after `after_id`."""
+        cursor = self.conn.cursor()
+        self.conn.commit()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            changed = set(cursor.execute('''
+                SELECT bin_number, pays FROM bin_changes WHERE id > ? AND id <= ?
+            ''', (after_id, latest)).fetchall())
+            for bin_number, pays in changed:
+                if bin_number.isascii() and bin_number.isdigit():
+                    self._remerge(cursor, len(bin_number), int(bin_number), pays)
+            self._store_change(cursor, latest)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def _remerge(self, cursor: sqlite3.Cursor, digits: int, value: int, pays: str) -> None:
+        # Widen the window to every range of this country touching the BIN or
+        # its neighbours, so the rebuilt ranges can merge across it
+        low, high = value - 1, value + 1
+        cursor.execute('''
+            SELECT range_start, range_end FROM bin_ranges
+            WHERE digits = ? AND range_start BETWEEN ? AND ? AND range_end >= ? AND pays = ?
+        ''', (digits, low - MAX_RANGE_SPAN + 1, high, low, pays))
+        touching = cursor.fetchall()
+        for start, end in touching:
+            low, high = min(low, start), max(high, end)
+        cursor.executemany('''
+            DELETE FROM bin_ranges WHERE digits = ? AND range_start = ? AND pays = ?
+        ''', [(digits, start, pays) for start, _ in touching])
+
+        # +pays keeps the planner on the bin_number index instead of a pays index
+        rows = cursor.execute(f'''
+            SELECT {CARD_COLUMNS} FROM bin_cards
+            WHERE bin_number BETWEEN ? AND ? AND length(bin_number) = ? AND +pays = ?
+            ORDER BY emetteur, marque_carte, type_carte, niveau_carte, bin_number
+        ''', (str(max(low, 0)).zfill(digits), str(high).zfill(digits), digits, pays)).fetchall()
+        self._insert_ranges(cursor, merge_runs(rows))
+
+    def _insert_ranges(self, cursor: sqlite3.Cursor, ranges: Iterable[Range]) -> None:
+        cursor.executemany(f'''
+            INSERT INTO bin_ranges ({", ".join(RANGE_COLUMNS)})
+            VALUES ({", ".join("?" * len(RANGE_COLUMNS))})
+        ''', ranges)
+
+    def _store_change(self, cursor: sqlite3.Cursor, change_id: int) -> None:
+        cursor.execute('''
+            INSERT INTO bin_ranges_meta (key, value) VALUES ('change_id', ?)
+            ON CONFLICT (key) DO UPDATE SET value = excluded.value
+        ''', (change_id,))
+
+    def _stored_digits(self) -> Optional[List[int]]:
+        """BIN lengths in bin_ranges, longest first; None while behind bin_cards."""
+        global _digits_cache
+        stored = self._stored_change()
+        if stored is None or stored != self._latest_change():
+            return None
+        if _digits_cache[0] != stored:
+            _digits_cache = (stored, [row[0] for row in self.conn.execute(
+                'SELECT DISTINCT digits FROM bin_ranges ORDER BY digits DESC')])
+        return _digits_cache[1]
+
+    def lookup(self, number: str) -> List[Dict]:
+        """Find the most specific ranges covering a BIN or PAN (6 digits or more)."""
+        digits_stored = self._stored_digits()
+        if digits_stored is None:
+            return self._lookup_cards(number)
+        for digits in digits_stored:
+            if digits > len(number):
+                continue
+            key = int(number[:digits])
+            rows = self.conn.execute('''
+                SELECT digits, range_start, range_end, pays, emetteur, marque_carte,
+                       type_carte, niveau_carte
+                FROM bin_ranges
+                WHERE digits = ? AND range_start BETWEEN ? AND ? AND range_end >= ?
+                ORDER BY pays
+            ''', (digits, key - MAX_RANGE_SPAN + 1, key, key)).fetchall()
+            if rows:
+                return [{
+                    'bin_number': number[:digits],
+                    'pays': row[3],
+                    'emetteur': row[4],
+                    'marque': row[5],
+                    'type': row[6],
+                    'niveau': row[7],
+                    'range': f"{str(row[1]).zfill(row[0])}-{str(row[2]).zfill(row[0])}",
+                } for row in rows]
+        return []
+
+    def _lookup_cards(self, number: str) -> List[Dict]:
+        """Answer from bin_cards: the longest stored BIN that the number starts with."""
+        candidates = [number[:digits] for digits in range(MIN_LOOKUP_DIGITS, len(number) + 1)]
+        rows = self.conn.execute(f'''
+            SELECT {CARD_COLUMNS} FROM bin_cards
+            WHERE bin_number IN ({", ".join("?" * len(candidates))})
+            ORDER BY length(bin_number) DESC, pays
+        ''', candidates).fetchall()
+        longest = len(rows[0][0]) if rows else 0
+        return [{
+            'bin_number': row[0],
+            'pays': row[1],
+            'emetteur': row[2],
+            'marque': row[3],
+            'type': row[4],
+            'niveau': row[5],
+            'range': f"{row[0]}-{row[0]}",
+        } for row in rows if len(row[0]) == longest]
+
+    def stats(self) -> Dict:
+        """Count stored ranges against the BINs they cover."""
+        self.refresh()
+        ranges, bins = self.conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(bin_count), 0) FROM bin_ranges').fetchone()
+        return {'ranges': ranges, 'bins': bins}
@@ -1,10 +1,23 @@
 -- Database schema for BIN management system
 
 -- Table for storing bank URLs and their processing status
+-- status moves pending -> in_progress -> done | failed; processed is TRUE once
+-- a URL reached done or failed and is kept for progress reporting
 CREATE TABLE IF NOT EXISTS bank_urls (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     url TEXT UNIQUE NOT NULL,
+    -- Name of the scraper source the URL was discovered on (see bin_sources)
+    source TEXT NOT NULL DEFAULT 'bincheck',
     processed BOOLEAN DEFAULT FALSE,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    started_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    -- Last successful scrape, and how often the API returned this bank's BINs;
+    -- the scheduler refreshes the stalest and most queried banks first
+    scraped_at TIMESTAMP,
+    query_count INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -18,16 +31,36 @@ CREATE TABLE IF NOT EXISTS bin_cards (
     type_carte TEXT,
     niveau_carte TEXT,
     bank_url_id INTEGER,
+    -- Source whose page the row came from; NULL for imported rows
+    source TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (bank_url_id) REFERENCES bank_urls(id),
     UNIQUE(bin_number, pays)
 );
 
--- Indexes for improved query performance
-CREATE INDEX IF NOT EXISTS idx_bin_number ON bin_cards(bin_number);
-CREATE INDEX IF NOT EXISTS idx_pays ON bin_cards(pays);
-CREATE INDEX IF NOT EXISTS idx_emetteur ON bin_cards(emetteur);
+-- Indexes for improved query performance. BIN lookups and BIN-ordered scans
+-- use the UNIQUE(bin_number, pays) index, which made idx_bin_number redundant.
+DROP INDEX IF EXISTS idx_bin_number;
+-- Composite indexes serving bin_manager/db/queries.py: equality on country
+-- and/or issuer, rows already in BIN order. They supersede the former
+-- single-column idx_pays / idx_emetteur.
+DROP INDEX IF EXISTS idx_pays;
+DROP INDEX IF EXISTS idx_emetteur;
+CREATE INDEX IF NOT EXISTS idx_pays_emetteur_bin ON bin_cards(pays, emetteur, bin_number);
+CREATE INDEX IF NOT EXISTS idx_emetteur_bin ON bin_cards(emetteur, bin_number);
+CREATE INDEX IF NOT EXISTS idx_bin_bank_url ON bin_cards(bank_url_id);
 CREATE INDEX IF NOT EXISTS idx_bank_url_processed ON bank_urls(processed);
+CREATE INDEX IF NOT EXISTS idx_bank_url_status ON bank_urls(status);
+CREATE INDEX IF NOT EXISTS idx_bank_url_source ON bank_urls(source, status);
+
+-- Scraper sources seen by this database. When two sources list the same
+-- BIN and country, the row of the higher priority source is kept.
+CREATE TABLE IF NOT EXISTS bin_sources (
+    name TEXT PRIMARY KEY,
+    priority INTEGER NOT NULL DEFAULT 0,
+    base_url TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
 
 -- Views for common queries
 CREATE VIEW IF NOT EXISTS bank_stats AS
@@ -38,3 +71,142 @@ SELECT
     GROUP_CONCAT(DISTINCT marque_carte) as card_brands
 FROM bin_cards
 GROUP BY emetteur, pays;
+
+-- One row per scrape or import run; bin_cards changes are attributed to the
+-- generation of the writer that made them (see bin_changes_context)
+CREATE TABLE IF NOT EXISTS scrape_generations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+-- Append-only change log of bin_cards, written by the triggers below
+CREATE TABLE IF NOT EXISTS bin_changes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    generation_id INTEGER NOT NULL,
+    change_type TEXT NOT NULL,
+    bin_number TEXT NOT NULL,
+    pays TEXT NOT NULL,
+    emetteur TEXT,
+    marque_carte TEXT,
+    type_carte TEXT,
+    niveau_carte TEXT,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_bin_changes_generation ON bin_changes(generation_id);
+
+-- Generation of the transaction writing bin_cards. SQLite runs one write
+-- transaction at a time, so each writer sets it before touching bin_cards
+-- (BinDatabase.tag_changes) and the triggers below read it back; overlapping
+-- runs (scheduler refresh, --scrape, --import) keep their own changes apart.
+CREATE TABLE IF NOT EXISTS bin_changes_context (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    generation_id INTEGER NOT NULL DEFAULT 0
+);
+
+-- The first triggers credited every change to the latest generation
+DROP TRIGGER IF EXISTS trg_bin_cards_added;
+DROP TRIGGER IF EXISTS trg_bin_cards_updated;
+DROP TRIGGER IF EXISTS trg_bin_cards_removed;
+
+CREATE TRIGGER IF NOT EXISTS trg_bin_changes_added AFTER INSERT ON bin_cards
+BEGIN
+    INSERT INTO bin_changes (generation_id, change_type, bin_number, pays, emetteur, marque_carte, type_carte, niveau_carte)
+    VALUES (COALESCE((SELECT generation_id FROM bin_changes_context WHERE id = 1), 0), 'added',
+            NEW.bin_number, NEW.pays, NEW.emetteur, NEW.marque_carte, NEW.type_carte, NEW.niveau_carte);
+END;
+
+-- ON CONFLICT DO UPDATE rewrites every row; only log real changes
+CREATE TRIGGER IF NOT EXISTS trg_bin_changes_updated AFTER UPDATE ON bin_cards
+WHEN OLD.emetteur IS NOT NEW.emetteur
+  OR OLD.marque_carte IS NOT NEW.marque_carte
+  OR OLD.type_carte IS NOT NEW.type_carte
+  OR OLD.niveau_carte IS NOT NEW.niveau_carte
+BEGIN
+    INSERT INTO bin_changes (generation_id, change_type, bin_number, pays, emetteur, marque_carte, type_carte, niveau_carte)
+    VALUES (COALESCE((SELECT generation_id FROM bin_changes_context WHERE id = 1), 0), 'updated',
+            NEW.bin_number, NEW.pays, NEW.emetteur, NEW.marque_carte, NEW.type_carte, NEW.niveau_carte);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_bin_changes_removed AFTER DELETE ON bin_cards
+BEGIN
+    INSERT INTO bin_changes (generation_id, change_type, bin_number, pays, emetteur, marque_carte, type_carte, niveau_carte)
+    VALUES (COALESCE((SELECT generation_id FROM bin_changes_context WHERE id = 1), 0), 'removed',
+            OLD.bin_number, OLD.pays, OLD.emetteur, OLD.marque_carte, OLD.type_carte, OLD.niveau_carte);
+END;
+
+-- Consecutive BINs of one length sharing country and card metadata, derived
+-- from bin_cards by bin_manager/db/ranges.py. WITHOUT ROWID: the primary key
+-- is the lookup index, nothing is stored twice.
+CREATE TABLE IF NOT EXISTS bin_ranges (
+    digits INTEGER NOT NULL,
+    range_start INTEGER NOT NULL,
+    range_end INTEGER NOT NULL,
+    pays TEXT NOT NULL,
+    emetteur TEXT,
+    marque_carte TEXT,
+    type_carte TEXT,
+    niveau_carte TEXT,
+    bin_count INTEGER NOT NULL,
+    PRIMARY KEY (digits, range_start, pays)
+) WITHOUT ROWID;
+
+-- bin_changes id the ranges were last synced to
+CREATE TABLE IF NOT EXISTS bin_ranges_meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+
+-- Cached bin-ip-checker answers, one per BIN, so a BIN is only checked once
+CREATE TABLE IF NOT EXISTS bin_checks (
+    bin_number TEXT PRIMARY KEY,
+    valid BOOLEAN NOT NULL,
+    scheme TEXT,
+    card_type TEXT,
+    level TEXT,
+    issuer TEXT,
+    country TEXT,
+    country_code TEXT,
+    checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- One row per scheduled job; the lease keeps two app processes from running
+-- the same job at once, the cursor lets budget-limited runs resume
+CREATE TABLE IF NOT EXISTS scheduler_jobs (
+    name TEXT PRIMARY KEY,
+    cursor TEXT,
+    lease_owner TEXT,
+    lease_expires TIMESTAMP
+);
+
+-- History of scheduler runs
+CREATE TABLE IF NOT EXISTS scheduler_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job TEXT NOT NULL,
+    trigger TEXT NOT NULL,
+    status TEXT NOT NULL,
+    processed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    note TEXT,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_scheduler_runs_job ON scheduler_runs(job, id);
+
+-- History of bin_manager/db/maintenance.py runs, to follow free-page growth
+CREATE TABLE IF NOT EXISTS maintenance_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    page_size INTEGER,
+    pages_before INTEGER,
+    pages_after INTEGER,
+    free_pages_before INTEGER,
+    free_pages_after INTEGER,
+    integrity TEXT,
+    -- Tables whose planner statistics were refreshed
+    analyzed TEXT
+);
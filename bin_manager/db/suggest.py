@@ -0,0 +1,182 @@
+import sqlite3
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left
+from heapq import nlargest
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Most suggestions returned per query
+MAX_SUGGESTIONS = 50
+
+# Prefixes matching more names than this get their top suggestions cached.
+# Only short prefixes are that broad, so the cache stays small.
+SCAN_LIMIT = 256
+
+# Seconds between checks of bin_changes for a newer dataset
+REFRESH_INTERVAL = 5.0
+
+# Least seconds between two rebuilds. A rebuild reads all of bin_cards, and a
+# running crawl moves bin_changes every few seconds; changes made meanwhile
+# are picked up by the next rebuild once the interval has passed.
+MIN_REBUILD_INTERVAL = 300.0
+
+# Sorts after every character, closing the bisect range of a prefix
+_PREFIX_END = '\U0010ffff'
+
+Suggestion = Dict
+
+
+def normalize(text: str) -> str:
+    """Casefold and strip accents so 'societe' finds 'SOCIÉTÉ GÉNÉRALE'."""
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in text if not unicodedata.combining(c)).casefold().strip()
+
+
+class NameIndex:
+    """Names searchable by the start of any of their words, ranked by BIN count.
+
+    Every word suffix of a name ('bnp paribas', 'paribas') is a key of one
+    sorted array; a prefix query is a bisect range over it.
+    """
+
+    def __init__(self, counts: Sequence[Tuple[str, int]]):
+        self.names = [name for name, _ in counts]
+        self.counts = array('Q', (count for _, count in counts))
+        keys = []
+        for i, name in enumerate(self.names):
+            key = normalize(name)
+            start = 0
+            while start < len(key):
+                keys.append((key[start:], i))
+                space = key.find(' ', start)
+                if space < 0:
+                    break
+                start = space + 1
+        keys.sort()
+        self.keys = [key for key, _ in keys]
+        self.ids = array('I', (i for _, i in keys))
+        self._top: Dict[str, List[int]] = {}
+
+    def _ranked(self, query: str) -> List[int]:
+        lo = bisect_left(self.keys, query)
+        hi = bisect_left(self.keys, query + _PREFIX_END, lo)
+        if hi - lo > SCAN_LIMIT and query in self._top:
+            return self._top[query]
+        # A name matches once per word starting with the query
+        ids = set(self.ids[lo:hi])
+        ranked = nlargest(MAX_SUGGESTIONS, ids, key=lambda i: (self.counts[i], -i))
+        if hi - lo > SCAN_LIMIT:
+            self._top[query] = ranked
+        return ranked
+
+    def suggest(self, query: str, limit: int) -> List[Suggestion]:
+        query = normalize(query)
+        if not query:
+            return []
+        return [{'value': self.names[i], 'count': self.counts[i]} for i in self._ranked(query)[:limit]]
+
+
+class BinPrefixIndex:
+    """Sorted integer arrays of the stored BINs, one per BIN length."""
+
+    def __init__(self, bin_numbers):
+        by_length: Dict[int, array] = {}
+        for bin_number in bin_numbers:
+            if bin_number.isascii() and bin_number.isdigit():
+                by_length.setdefault(len(bin_number), array('Q')).append(int(bin_number))
+        for values in by_length.values():
+            if any(a > b for a, b in zip(values, values[1:])):
+                values[:] = array('Q', sorted(values))
+        self.by_length = by_length
+
+    def count(self, prefix: str) -> int:
+        """Number of stored BINs starting with the digit string `prefix`."""
+        total = 0
+        value = int(prefix)
+        for length, values in self.by_length.items():
+            if length < len(prefix):
+                continue
+            scale = 10 ** (length - len(prefix))
+            lo = bisect_left(values, value * scale)
+            total += bisect_left(values, (value + 1) * scale, lo) - lo
+        return total
+
+    def suggest(self, prefix: str, limit: int) -> List[Suggestion]:
+        """Extensions of `prefix` by one digit, the most populated first.
+
+        A prefix that is itself a stored BIN comes first, marked `exact`.
+        """
+        if not (prefix.isascii() and prefix.isdigit()):
+            return []
+        suggestions = []
+        value = int(prefix)
+        values = self.by_length.get(len(prefix))
+        if values is not None:
+            i = bisect_left(values, value)
+            if i < len(values) and values[i] == value:
+                suggestions.append({'value': prefix, 'count': 1, 'exact': True})
+        extensions = [(prefix + digit, self.count(prefix + digit)) for digit in '0123456789']
+        extensions.sort(key=lambda item: -item[1])
+        suggestions.extend({'value': value, 'count': count} for value, count in extensions if count)
+        return suggestions[:limit]
+
+
+class SuggestIndex:
+    """In-memory typeahead over bin_cards: BIN prefixes, issuers and countries."""
+
+    def __init__(self, conn: sqlite3.Connection, version: int):
+        self.version = version
+        start = time.perf_counter()
+        # Both GROUP BY queries are answered from covering indexes
+        self.issuers = NameIndex(conn.execute('''
+            SELECT emetteur, COUNT(*) FROM bin_cards
+            WHERE emetteur IS NOT NULL AND emetteur != ''
+            GROUP BY emetteur
+        ''').fetchall())
+        self.countries = NameIndex(conn.execute('''
+            SELECT pays, COUNT(*) FROM bin_cards GROUP BY pays
+        ''').fetchall())
+        # The UNIQUE(bin_number, pays) index yields the BINs already sorted within each length
+        self.bins = BinPrefixIndex(
+            row[0] for row in conn.execute('SELECT bin_number FROM bin_cards ORDER BY bin_number')
+        )
+        self.build_seconds = time.perf_counter() - start
+
+    def suggest(self, kind: str, query: str, limit: int = 10) -> List[Suggestion]:
+        """Top `limit` suggestions of `kind` ('bin', 'issuer' or 'country') for `query`."""
+        limit = min(limit, MAX_SUGGESTIONS)
+        if kind == 'bin':
+            return self.bins.suggest(query.strip(), limit)
+        if kind == 'issuer':
+            return self.issuers.suggest(query, limit)
+        if kind == 'country':
+            return self.countries.suggest(query, limit)
+        raise ValueError(f"Unknown suggestion kind: {kind}")
+
+
+class SuggestCache:
+    """Holds the current SuggestIndex and rebuilds it when bin_cards changes."""
+
+    def __init__(self, min_rebuild_interval: float = MIN_REBUILD_INTERVAL):
+        self.index: Optional[SuggestIndex] = None
+        self.min_rebuild_interval = min_rebuild_interval
+        self._built_at = 0.0
+
+    def refresh(self, conn: sqlite3.Connection) -> bool:
+        """Rebuild the index if bin_changes moved since it was built; True if rebuilt.
+
+        After a rebuild the next one waits at least `min_rebuild_interval`.
+        """
+        if self.index is not None and time.monotonic() - self._built_at < self.min_rebuild_interval:
+            return False
+        version = conn.execute('SELECT COALESCE(MAX(id), 0) FROM bin_changes').fetchone()[0]
+        if self.index is not None and self.index.version == version:
+            return False
+        # Readers keep using the previous index until the new one is swapped in
+        self.index = SuggestIndex(conn, version)
+        self._built_at = time.monotonic()
+        return True
+
+
+suggest_cache = SuggestCache()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Generate a synthetic BIN database for load testing.
+
+Issuers and countries follow Zipf-like distributions (a few large banks and
+countries hold most BINs) and BINs come in contiguous runs per issuer, like
+the scraped tables. Example:
+
+    python -m bin_manager.db.synthetic --rows 1000000 --out bench.db
+"""
+import argparse
+import os
+import random
+import time
+from itertools import accumulate, islice
+from typing import Dict, Iterator, List, Tuple
+
+from bin_manager.db.database import BinDatabase
+from bin_manager.db.ranges import BinRangeIndex
+
+COUNTRY_NAMES = (
+    'UNITED STATES', 'BRAZIL', 'UNITED KINGDOM', 'FRANCE', 'GERMANY', 'INDIA', 'CANADA', 'MEXICO',
+    'TURKEY', 'SPAIN', 'ITALY', 'RUSSIAN FEDERATION', 'CHINA', 'JAPAN', 'KOREA, REPUBLIC OF',
+    'AUSTRALIA', 'POLAND', 'NETHERLANDS', 'ARGENTINA', 'COLOMBIA', 'SOUTH AFRICA', 'SAUDI ARABIA',
+    'INDONESIA', 'SWITZERLAND', 'SWEDEN', 'BELGIUM', 'CHILE', 'PERU', 'MOROCCO', 'EGYPT',
+)
+ISSUER_WORDS = ('NATIONAL', 'FIRST', 'UNITED', 'CREDIT', 'SAVINGS', 'COMMERCIAL', 'CITIZENS',
+                'CENTRAL', 'POPULAR', 'COOPERATIVE', 'FEDERAL', 'MUTUAL')
+CARD_TYPES = (('CREDIT', 50), ('DEBIT', 45), ('PREPAID', 5))
+CARD_LEVELS = (('CLASSIC', 45), ('GOLD', 20), ('PLATINUM', 15), ('BUSINESS', 10),
+               ('STANDARD', 7), ('WORLD ELITE', 3))
+# Brand by leading digit; BINs are drawn from the 2xxx-6xxx space
+BRANDS = {'2': 'MASTERCARD', '3': 'AMERICAN EXPRESS', '4': 'VISA', '5': 'MASTERCARD', '6': 'DISCOVER'}
+FIRST_LEADING_DIGIT = 2
+LEADING_DIGITS = 5
+
+MEAN_RUN_LENGTH = 16
+
+Row = Tuple[str, str, str, str, str, str]
+
+
+def zipf_weights(count: int, skew: float) -> List[float]:
+    """Cumulative weights of ranks 1..count proportional to 1 / rank**skew."""
+    return list(accumulate(1 / rank ** skew for rank in range(1, count + 1)))
+
+
+def make_issuers(rng: random.Random, issuers: int, countries: int, skew: float) -> List[Tuple[str, str]]:
+    """(issuer, country) pairs, most issuers landing in the largest countries."""
+    names = list(COUNTRY_NAMES[:countries]) + [f'COUNTRY {i:03d}' for i in range(len(COUNTRY_NAMES), countries)]
+    country_weights = zipf_weights(len(names), skew)
+    result = []
+    for i in range(issuers):
+        # The largest issuers go one per country, biggest countries first
+        if i < len(names):
+            country = names[i]
+        else:
+            country = rng.choices(names, cum_weights=country_weights)[0]
+        words = rng.sample(ISSUER_WORDS, 2)
+        result.append((f'{words[0]} {words[1]} BANK {i:05d}', country))
+    return result
+
+
+def generate_rows(rows: int, seed: int = 0, issuers: int = 5000, countries: int = 100,
+                  skew: float = 1.1, digits: int = 8) -> Iterator[Row]:
+    """Yield `rows` unique bin_cards rows in BIN order."""
+    space = LEADING_DIGITS * 10 ** (digits - 1)
+    if rows > space:
+        raise ValueError(f"{rows:,} rows do not fit in {digits}-digit BINs (max {space:,})")
+    rng = random.Random(seed)
+    issuer_list = make_issuers(rng, issuers, countries, skew)
+    issuer_weights = zipf_weights(len(issuer_list), skew)
+    types, type_weights = zip(*CARD_TYPES)
+    levels, level_weights = zip(*CARD_LEVELS)
+
+    # Spread the runs over the whole space with random gaps in between
+    runs = max(1, rows // MEAN_RUN_LENGTH)
+    mean_gap = (space - rows) / runs
+    value = FIRST_LEADING_DIGIT * 10 ** (digits - 1)
+    remaining = rows
+    while remaining:
+        length = min(remaining, max(1, int(rng.expovariate(1 / MEAN_RUN_LENGTH))))
+        # Never leave fewer free BINs than rows still to place
+        free = FIRST_LEADING_DIGIT * 10 ** (digits - 1) + space - value
+        gap = min(int(rng.uniform(0, 2 * mean_gap)), free - remaining)
+        value += gap
+        issuer, country = rng.choices(issuer_list, cum_weights=issuer_weights)[0]
+        card_type = rng.choices(types, weights=type_weights)[0]
+        level = rng.choices(levels, weights=level_weights)[0]
+        for _ in range(length):
+            bin_number = str(value)
+            yield (bin_number, country, issuer, BRANDS[bin_number[0]], card_type, level)
+            value += 1
+        remaining -= length
+
+
+def generate(db_path: str, rows: int, seed: int = 0, issuers: int = 5000, countries: int = 100,
+             skew: float = 1.1, digits: int = 8, batch_size: int = 100_000) -> Dict:
+    """Create `db_path` filled with synthetic BINs, indexes and BIN ranges."""
+    if os.path.exists(db_path):
+        raise FileExistsError(f"{db_path} already exists")
+    start = time.time()
+    db = BinDatabase(db_path)
+    conn = db.conn
+    try:
+        # Load without the change-log triggers and secondary indexes; reopening
+        # the database below recreates both from schema.sql
+        for kind, name in conn.execute('''
+            SELECT type, name FROM sqlite_master
+            WHERE tbl_name = 'bin_cards' AND type IN ('trigger', 'index') AND sql IS NOT NULL
+        ''').fetchall():
+            conn.execute(f'DROP {kind.upper()} {name}')
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+
+        generated = generate_rows(rows, seed, issuers, countries, skew, digits)
+        while True:
+            batch = list(islice(generated, batch_size))
+            if not batch:
+                break
+            conn.executemany('''
+                INSERT INTO bin_cards (bin_number, pays, emetteur, marque_carte, type_carte, niveau_carte)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', batch)
+            conn.commit()
+    finally:
+        db.close()
+
+    db = BinDatabase(db_path)
+    try:
+        db.conn.execute('ANALYZE')
+        ranges = BinRangeIndex(db.conn).rebuild()
+    finally:
+        db.close()
+    return {'rows': rows, 'ranges': ranges, 'seconds': time.time() - start,
+            'size_mb': os.path.getsize(db_path) / 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic BIN database for load testing')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Number of BINs (default: 1,000,000)')
+    parser.add_argument('--out', default='bench.db', help='Database file to create (default: bench.db)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for reproducible datasets')
+    parser.add_argument('--issuers', type=int, default=5000, help='Number of distinct issuers')
+    parser.add_argument('--countries', type=int, default=100, help='Number of distinct countries')
+    parser.add_argument('--skew', type=float, default=1.1,
+                       help='Zipf exponent of the issuer and country distributions')
+    parser.add_argument('--digits', type=int, default=8, choices=(6, 8),
+                       help='BIN length; 6 digits hold at most 500,000 rows')
+    parser.add_argument('--force', action='store_true', help='Overwrite --out if it exists')
+    args = parser.parse_args()
+
+    if args.force and os.path.exists(args.out):
+        os.remove(args.out)
+    stats = generate(args.out, args.rows, args.seed, args.issuers, args.countries, args.skew, args.digits)
+    print(f"Wrote {stats['rows']:,} BINs ({stats['ranges']:,} ranges) to {args.out} "
+          f"in {stats['seconds']:.1f}s, {stats['size_mb']:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
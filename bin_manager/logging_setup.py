@@ -0,0 +1,114 @@
+# bin_manager/logging_setup.py
+import atexit
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
+LOGGER_NAME = 'bin_scraper'
+LOG_DIR = 'logs'
+LOG_FILE = 'scraper.log'
+
+# Keep 1 in N per-URL INFO lines (records logged with extra={'sampled': True})
+DEFAULT_SAMPLE_RATE = int(os.getenv('BIN_LOG_SAMPLE_RATE', '10'))
+
+# Attributes every LogRecord has; anything else came from `extra=`
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_lock = threading.Lock()
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'ts': datetime.fromtimestamp(record.created).strftime('%Y-%m-%d %H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and key != 'sampled':
+                payload[key] = value
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Drop all but 1 in `rate` INFO records flagged as sampled."""
+
+    def __init__(self, rate: int = DEFAULT_SAMPLE_RATE):
+        super().__init__()
+        self.rate = max(1, rate)
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or not getattr(record, 'sampled', False):
+            return True
+        return next(self._counter) % self.rate == 0
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queue the record untouched so message formatting happens on the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(sample_rate: int = DEFAULT_SAMPLE_RATE) -> logging.Logger:
+    """Configure the scraper logger once per process and return it.
+
+    The calling thread only enqueues records; a QueueListener thread formats
+    them as JSON and writes them to the rotating log file.
+    """
+    global _listener
+    logger = logging.getLogger(LOGGER_NAME)
+
+    with _lock:
+        if _listener is not None:
+            return logger
+
+        os.makedirs(LOG_DIR, exist_ok=True)
+        file_handler = RotatingFileHandler(
+            os.path.join(LOG_DIR, LOG_FILE),
+            maxBytes=5*1024*1024,
+            backupCount=3,
+            encoding='utf-8'
+        )
+        file_handler.setFormatter(JsonFormatter())
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = _DeferredQueueHandler(log_queue)
+        queue_handler.addFilter(SamplingFilter(sample_rate))
+
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(queue_handler)
+
+        _listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+    return logger
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        _listener = None
+        logger = logging.getLogger(LOGGER_NAME)
+        for handler in list(logger.handlers):
+            if isinstance(handler, _DeferredQueueHandler):
+                logger.removeHandler(handler)
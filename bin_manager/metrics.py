@@ -0,0 +1,163 @@
+# bin_manager/metrics.py
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+# Upper bounds (seconds) shared by every phase histogram
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Scraper phases we time, with the help text exported on /metrics
+PHASES = {
+    'fetch_ttfb': 'Time from sending the request to receiving response headers',
+    'fetch_download': 'Time spent reading the response body',
+    'parse_soup': 'Time spent building the BeautifulSoup tree',
+    'parse_table': 'Time spent in parse_bank_table',
+    'db_insert': 'Time spent executing bin_cards inserts',
+    'db_commit': 'Time spent committing scrape transactions',
+}
+
+COUNTERS = {
+    'pages': 'Pages fetched successfully',
+    'bytes': 'Response bytes downloaded',
+    'retries': 'HTTP retries performed by the transport',
+    'errors': 'Failed page fetches',
+    'bins': 'BIN rows written to the database',
+    'invalid_rows': 'Scraped BIN rows rejected by validation',
+}
+
+
+class Histogram:
+    """Fixed-bucket histogram compatible with the Prometheus text format."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile from bucket upper bounds."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float('inf')
+
+
+class MetricsRegistry:
+    """Thread-safe store for scraper timings and counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = time.monotonic()
+            self.histograms: Dict[str, Histogram] = {name: Histogram() for name in PHASES}
+            self.counters: Dict[str, int] = {name: 0 for name in COUNTERS}
+            self.gauges: Dict[str, Tuple[str, float]] = {}
+
+    def observe(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            self.histograms[phase].observe(seconds)
+
+    def inc(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[counter] += amount
+
+    def set_gauge(self, name: str, value: float, help_text: str = '') -> None:
+        with self._lock:
+            self.gauges[name] = (help_text, value)
+
+    @contextmanager
+    def timer(self, phase: str):
+        """Time the enclosed block and record it under `phase`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - start)
+
+    def rates(self) -> Dict[str, float]:
+        """Pages and bytes per second since the registry was reset."""
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        return {
+            'pages_per_second': self.counters['pages'] / elapsed,
+            'bytes_per_second': self.counters['bytes'] / elapsed,
+        }
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            for name, help_text in PHASES.items():
+                metric = f"bin_scraper_{name}_seconds"
+                hist = self.histograms[name]
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} histogram")
+                cumulative = 0
+                for bound, count in zip(hist.buckets, hist.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{le="+Inf"}} {hist.count}')
+                lines.append(f"{metric}_sum {hist.sum}")
+                lines.append(f"{metric}_count {hist.count}")
+
+            for name, help_text in COUNTERS.items():
+                metric = f"bin_scraper_{name}_total"
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {self.counters[name]}")
+
+            gauges = dict(self.gauges)
+
+        for name, value in self.rates().items():
+            gauges[name] = (name.replace('_', ' ').capitalize(), value)
+        for name, (help_text, value) in gauges.items():
+            metric = f"bin_scraper_{name}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """Human readable summary used by `bin-cli --profile`."""
+        rates = self.rates()
+        lines = [
+            "",
+            "Profile Summary",
+            f"{'Phase':<16}{'Count':>8}{'Total (s)':>12}{'Mean (ms)':>12}{'p50 (ms)':>10}{'p95 (ms)':>10}",
+        ]
+        with self._lock:
+            for name in PHASES:
+                hist = self.histograms[name]
+                mean = (hist.sum / hist.count * 1000) if hist.count else 0.0
+                lines.append(
+                    f"{name:<16}{hist.count:>8,}{hist.sum:>12.3f}{mean:>12.2f}"
+                    f"{hist.quantile(0.5) * 1000:>10.1f}{hist.quantile(0.95) * 1000:>10.1f}"
+                )
+            counters = dict(self.counters)
+
+        lines.append("")
+        for name, value in counters.items():
+            lines.append(f"{name.capitalize()}: {value:,}")
+        lines.append(f"Pages/sec: {rates['pages_per_second']:.2f}")
+        lines.append(f"Bytes/sec: {rates['bytes_per_second']:,.0f}")
+        return "\n".join(lines)
+
+
+# Process-wide registry shared by the scraper, database layer and app
+metrics = MetricsRegistry()
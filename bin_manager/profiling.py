@@ -0,0 +1,103 @@
+# bin_manager/profiling.py
+import cProfile
+import io
+import os
+import pstats
+import tracemalloc
+from datetime import datetime
+from typing import Optional
+
+
+class ScrapeProfiler:
+    """Capture cProfile stats and tracemalloc snapshots per window of banks.
+
+    Call `tick()` once per processed bank. Every `every` banks the current
+    window is written to `out_dir` and a new one starts, until `max_windows`
+    reports have been written.
+    """
+
+    def __init__(self, out_dir: str, every: int = 100, max_windows: int = 10, top: int = 25):
+        self.out_dir = out_dir
+        self.every = max(1, every)
+        self.max_windows = max_windows
+        self.top = top
+        self.window = 0
+        self.banks_in_window = 0
+        self._profiler: Optional[cProfile.Profile] = None
+        self._started_tracemalloc = False
+
+    @property
+    def active(self) -> bool:
+        return self._profiler is not None
+
+    def start(self) -> None:
+        """Begin the first profiling window."""
+        os.makedirs(self.out_dir, exist_ok=True)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._begin_window()
+
+    def _begin_window(self) -> None:
+        self.banks_in_window = 0
+        tracemalloc.clear_traces()
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    def tick(self) -> None:
+        """Record one processed bank, flushing the window when it is full."""
+        if not self.active:
+            return
+        self.banks_in_window += 1
+        if self.banks_in_window >= self.every:
+            self._flush()
+            if self.window < self.max_windows:
+                self._begin_window()
+            else:
+                self._stop_tracing()
+
+    def stop(self) -> None:
+        """Write the partial window, if any, and stop tracing."""
+        if self.active and self.banks_in_window:
+            self._flush()
+        elif self.active:
+            self._profiler.disable()
+            self._profiler = None
+        self._stop_tracing()
+
+    def _flush(self) -> None:
+        self._profiler.disable()
+        # Snapshot before building reports so their allocations don't show up
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+
+        self.window += 1
+        prefix = os.path.join(self.out_dir, f"window_{self.window:04d}")
+
+        # Raw stats can be loaded with pstats/snakeviz and diffed across versions
+        self._profiler.dump_stats(f"{prefix}.prof")
+
+        stream = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=stream)
+        stats.sort_stats('cumulative').print_stats(self.top)
+
+        with open(f"{prefix}.txt", 'w', encoding='utf-8') as f:
+            f.write(f"Window {self.window} - {self.banks_in_window} banks - "
+                    f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            f.write(f"Traced memory: current={current:,} B peak={peak:,} B\n\n")
+            f.write(f"Top {self.top} allocations by line:\n")
+            for stat in snapshot.statistics('lineno')[:self.top]:
+                f.write(f"{stat}\n")
+            f.write(f"\nTop {self.top} functions by cumulative time:\n")
+            f.write(stream.getvalue())
+
+        self._profiler = None
+
+    def _stop_tracing(self) -> None:
+        if self._started_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started_tracemalloc = False
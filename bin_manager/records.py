@@ -0,0 +1,101 @@
+# bin_manager/records.py
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# Header names accepted for each column (compared lowercased): our own CSV
+# export, the scraper's French table headers, the API's English keys
+FIELD_ALIASES = {
+    'bin_number': ('bin', 'bin_number', 'iin', 'numéro bin/iin'),
+    'pays': ('pays', 'country'),
+    'emetteur': ('emetteur', 'émetteur', 'bank', 'issuer', "nom de l'émetteur / banque"),
+    'marque_carte': ('marque', 'marque_carte', 'brand', 'scheme', 'marque de carte'),
+    'type_carte': ('type', 'type_carte', 'type de carte'),
+    'niveau_carte': ('niveau', 'niveau_carte', 'level', 'niveau de carte'),
+}
+
+# Columns that are NOT NULL in bin_cards; records missing one are rejected
+REQUIRED_COLUMNS = ('bin_number', 'pays', 'emetteur', 'marque_carte')
+
+# ISO/IEC 7812 issuer identification numbers are 6 or 8 digits
+MIN_BIN_DIGITS = 6
+MAX_BIN_DIGITS = 8
+
+# Headers of the CSV written by BinDatabase.export_bins_to_csv, in field order
+EXPORT_HEADERS = ('BIN', 'Pays', 'Emetteur', 'Marque', 'Type', 'Niveau')
+
+
+class BinRecord(NamedTuple):
+    """One bin_cards row on its way from a parser to the database or an export.
+
+    A plain tuple underneath: no per-row dict, small to pickle between the
+    reparse worker processes, and usable as SQL parameters as it is.
+    """
+    bin_number: Optional[str]
+    pays: Optional[str]
+    emetteur: Optional[str]
+    marque_carte: Optional[str]
+    type_carte: Optional[str] = None
+    niveau_carte: Optional[str] = None
+
+    def problems(self) -> List[str]:
+        """Reasons this record cannot be stored; empty when it is valid."""
+        problems = [f"missing {column}" for column in REQUIRED_COLUMNS if not getattr(self, column)]
+        if self.bin_number and not _valid_bin(self.bin_number):
+            problems.append(f"malformed BIN {self.bin_number!r}")
+        return problems
+
+
+RECORD_FIELDS = BinRecord._fields
+
+_REQUIRED_POSITIONS = tuple(RECORD_FIELDS.index(column) for column in REQUIRED_COLUMNS)
+
+Positions = Tuple[Optional[int], ...]
+
+# Column -> accepted header names, like FIELD_ALIASES
+Aliases = Dict[str, Sequence[str]]
+
+
+def _valid_bin(bin_number: str) -> bool:
+    return bin_number.isascii() and bin_number.isdigit() and MIN_BIN_DIGITS <= len(bin_number) <= MAX_BIN_DIGITS
+
+
+def is_valid(record: Sequence[Optional[str]]) -> bool:
+    """Fast form of `not record.problems()` for any RECORD_FIELDS-ordered tuple."""
+    return all(record[i] for i in _REQUIRED_POSITIONS) and _valid_bin(record[0])
+
+
+def resolve_columns(headers: Iterable[str], aliases: Optional[Aliases] = None) -> Dict[str, str]:
+    """Map each bin_cards column to the matching header in the source."""
+    lookup = {header.strip().lower(): header for header in headers}
+    mapping = {}
+    for column, names in (aliases or FIELD_ALIASES).items():
+        for alias in names:
+            if alias in lookup:
+                mapping[column] = lookup[alias]
+                break
+    missing = [column for column in REQUIRED_COLUMNS if column not in mapping]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    return mapping
+
+
+def header_positions(headers: Sequence[str], aliases: Optional[Aliases] = None) -> Positions:
+    """Index of each record field among `headers` (None if absent), resolved once per table."""
+    headers = list(headers)
+    mapping = resolve_columns(headers, aliases)
+    return tuple(headers.index(mapping[field]) if field in mapping else None for field in RECORD_FIELDS)
+
+
+def record_from_cells(cells: Sequence[Optional[str]], positions: Positions) -> BinRecord:
+    """Build a record from one table row, cells already cleaned ('' or None when empty)."""
+    return BinRecord._make(
+        (cells[pos] or None) if pos is not None and pos < len(cells) else None
+        for pos in positions
+    )
+
+
+def split_valid(records: Iterable[BinRecord]) -> Tuple[List[BinRecord], List[BinRecord]]:
+    """Separate storable records from rejected ones."""
+    valid, rejected = [], []
+    for record in records:
+        (valid if is_valid(record) else rejected).append(record)
+    return valid, rejected
@@ -0,0 +1,103 @@
+"""Scrape several sources at once, one thread per source.
+
+Each source gets its own BinScraper (session, retries, delay) and its own
+database connection, so a slow or rate-limited site never holds up the
+others. Writes are serialized by SQLite: WAL plus the busy timeout set in
+BinDatabase.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+from bin_manager.db.database import BinDatabase
+from bin_manager.records import BinRecord
+from bin_manager.scraper.scraper import BinScraper, FetchError, ScraperConfig, NO_BINS_ERROR
+from bin_manager.scraper.sources import BinSource
+
+# claims(db, source) yields the source's bank URLs to scrape, already claimed
+Claims = Callable[[BinDatabase, BinSource], Iterator[Dict]]
+
+# on_bank(source, url_data, records, error) is called after each bank is stored
+# (records) or failed (error); it runs on the source's thread
+BankCallback = Callable[[BinSource, Dict, List[BinRecord], Optional[str]], None]
+
+
+def pending_claims(db: BinDatabase, source: BinSource) -> Iterator[Dict]:
+    """The source's pending bank URLs, claimed a batch at a time."""
+    return db.claim_pending_urls(source=source.name)
+
+
+def for_each_source(sources: Sequence[BinSource], work: Callable[[BinSource], None],
+                    stop_event: threading.Event) -> None:
+    """Run `work(source)` for every source at once, one thread each.
+
+    A single source runs in the calling thread, where profilers see it.
+    When the caller is interrupted, `stop_event` is set so the threads end
+    after their current page. The first failure is raised once all are done.
+    """
+    if len(sources) == 1:
+        work(sources[0])
+        return
+    with ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix='crawl') as executor:
+        futures = [executor.submit(work, source) for source in sources]
+        try:
+            wait(futures)
+        except BaseException:
+            stop_event.set()
+            raise
+    for future in futures:
+        future.result()
+
+
+def crawl_source(source: BinSource, config: ScraperConfig, claims: Claims = pending_claims,
+                 on_bank: Optional[BankCallback] = None,
+                 should_stop: Callable[[], bool] = lambda: False,
+                 generation_id: Optional[int] = None) -> None:
+    """Scrape the bank URLs `claims` hands out for one source, storing each bank's BINs.
+
+    Changes are logged under `generation_id`, the caller's run.
+    """
+    scraper = BinScraper(config, source)
+    db = BinDatabase()
+    db.generation_id = generation_id
+    db.register_source(source.name, source.priority, scraper.base_url)
+    urls = claims(db, source)
+    try:
+        # Checked before claiming the next URL, so none is left in progress
+        while not should_stop():
+            url_data = next(urls, None)
+            if url_data is None:
+                break
+            try:
+                records = scraper.get_bank_bins(url_data['url'])
+                error = None if records else NO_BINS_ERROR
+                if records:
+                    db.complete_url(url_data['id'], records)
+                else:
+                    db.fail_url(url_data['id'], error)
+            except Exception as e:
+                if not isinstance(e, FetchError):
+                    # Fetch errors were logged by the scraper
+                    scraper.logger.error("Error processing %s: %s", url_data['url'], e, extra={'url': url_data['url']})
+                db.fail_url(url_data['id'], str(e))
+                records, error = [], str(e)
+            if on_bank:
+                on_bank(source, url_data, records, error)
+    finally:
+        # Hands the rest of a claimed batch back to pending
+        urls.close()
+        db.close()
+
+
+def crawl_sources(sources: Sequence[BinSource], config: ScraperConfig, claims: Claims = pending_claims,
+                  on_bank: Optional[BankCallback] = None,
+                  should_stop: Callable[[], bool] = lambda: False,
+                  generation_id: Optional[int] = None) -> None:
+    """Crawl every source concurrently until their URLs run out or `should_stop()`."""
+    stop_event = threading.Event()
+
+    def stopped() -> bool:
+        return stop_event.is_set() or should_stop()
+
+    for_each_source(sources, lambda source: crawl_source(source, config, claims, on_bank, stopped, generation_id),
+                    stop_event)
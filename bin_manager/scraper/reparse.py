@@ -0,0 +1,76 @@
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from bin_manager.db.database import BinDatabase
+from bin_manager.db.importer import import_rows
+from bin_manager.records import BinRecord
+from bin_manager.scraper.sources import TableLayoutError, load_source
+
+# Saved pages handed to a worker process per task
+DEFAULT_CHUNK_SIZE = 50
+
+
+def _parse_chunk(task: Tuple[str, List[str]]) -> Tuple[List[BinRecord], int, Counter]:
+    """Worker task: parse a chunk of pages.
+
+    Returns the records, the count of pages without a table, and the
+    TableLayoutError messages of pages whose table layout is not recognized.
+    """
+    source_spec, paths = task
+    source = load_source(source_spec)
+    rows: List[BinRecord] = []
+    empty = 0
+    layout_errors: Counter = Counter()
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            try:
+                parsed = source.parse_bank_page(f.read())
+            except TableLayoutError as e:
+                layout_errors[str(e)] += 1
+                continue
+        if not parsed:
+            empty += 1
+        rows.extend(parsed)
+    return rows, empty, layout_errors
+
+
+def reparse_pages(directory: str, db: Optional[BinDatabase] = None, workers: Optional[int] = None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, source: str = 'bincheck') -> Dict:
+    """Re-parse every saved page in `directory` with `source` and merge the BINs into bin_cards.
+
+    Pages are parsed in chunks on a process pool; this process is the only
+    writer and streams the returned records through the bulk importer, which validates them.
+    The rows are attributed to `source` and merged by its priority, like scraped rows.
+    """
+    paths = sorted(glob.glob(os.path.join(directory, '*.html')))
+    # Fail on an unknown source before starting the pool; workers load their own instance
+    source_instance = load_source(source)
+    chunks = [(source, paths[i:i + chunk_size]) for i in range(0, len(paths), chunk_size)]
+    empty = 0
+    layout_errors: Counter = Counter()
+    start = time.time()
+
+    def parsed_rows() -> Iterator[BinRecord]:
+        nonlocal empty
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for rows, chunk_empty, chunk_errors in executor.map(_parse_chunk, chunks):
+                empty += chunk_empty
+                layout_errors.update(chunk_errors)
+                yield from rows
+
+    own_db = db is None
+    db = db or BinDatabase()
+    try:
+        db.register_source(source_instance.name, source_instance.priority, source_instance.base_url)
+        stats = import_rows(parsed_rows(), db, kind='reparse', source=source_instance.name)
+    finally:
+        if own_db:
+            db.close()
+    stats.update(pages=len(paths), pages_without_table=empty,
+                 pages_bad_layout=sum(layout_errors.values()), layout_errors=dict(layout_errors),
+                 seconds=time.time() - start)
+    return stats
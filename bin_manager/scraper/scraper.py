@@ -1,113 +1,140 @@
 import requests
 from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+from typing import List, Optional
 import logging
-from logging.handlers import RotatingFileHandler
 import os
 from dataclasses import dataclass
-from time import sleep
-from urllib.parse import urljoin
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+from time import sleep, perf_counter
+from urllib.parse import quote, urljoin, urlsplit
+
+from bin_manager.logging_setup import setup_logging
+from bin_manager.metrics import metrics
+from bin_manager.records import BinRecord, split_valid
+from bin_manager.scraper.sources import BinSource, load_source
+from bin_manager.scraper.transport import create_session
+
+# Recorded as the URL's last_error when get_bank_bins returns nothing
+NO_BINS_ERROR = "No BIN table found"
+
+
+class FetchError(Exception):
+    """A page could not be fetched (timeout, connection or HTTP error); already logged."""
+
+
+def page_filename(url: str) -> str:
+    """File name a fetched page is saved under in ScraperConfig.save_pages_dir."""
+    return quote(urlsplit(url).path.strip('/'), safe='') + '.html'
 
 @dataclass
 class ScraperConfig:
-    base_url: str = "https://bincheck.io/fr"
+    # Overrides the source's base_url, e.g. to point it at a mirror
+    base_url: Optional[str] = None
     user_agent: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
     retry_attempts: int = 3
     retry_backoff: int = 2
     timeout: int = 10
     delay: float = 0.5
+    pool_size: int = 10
+    http2: bool = False
+    # Keep a copy of every fetched page here for `bin-cli --reparse`
+    save_pages_dir: Optional[str] = None
 
 class BinScraper:
-    def __init__(self, config: Optional[ScraperConfig] = None):
+    def __init__(self, config: Optional[ScraperConfig] = None, source: Optional[BinSource] = None):
         self.config = config or ScraperConfig()
+        self.source = source or load_source('bincheck')
+        self.base_url = self.config.base_url or self.source.base_url
         self.logger = self._setup_logger()
         self.session = self._setup_session()
-        self.selectors = {
-            'country_container': (
-                "section.bg-white.dark\\:text-white.dark\\:bg-gray-900 > "
-                "section.py-20.antialiased.bg-white.dark\\:text-white.dark\\:bg-gray-900 > "
-                "div > div.grid"
-            ),
-            'bank_table': (
-                "section.bg-white.dark\\:text-white.dark\\:bg-gray-900 > "
-                "section.py-5.antialiased.bg-white.dark\\:text-white.dark\\:bg-gray-900 > "
-                "div > div > table"
-            )
-        }
+        if self.config.save_pages_dir:
+            os.makedirs(self.config.save_pages_dir, exist_ok=True)
 
     def _setup_logger(self) -> logging.Logger:
-        """Configure rotating file logger with proper formatting."""
-        os.makedirs('logs', exist_ok=True)
-        logger = logging.getLogger('bin_scraper')
-        logger.setLevel(logging.INFO)
-
-        handler = RotatingFileHandler(
-            os.path.join('logs', 'scraper.log'),
-            maxBytes=5*1024*1024,
-            backupCount=3,
-            encoding='utf-8'
-        )
-
-        formatter = logging.Formatter(
-            '%(asctime)s - %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-        return logger
-
-    def _setup_session(self) -> requests.Session:
-        """Configure session with retry logic and headers."""
-        session = requests.Session()
-        
-        retry_strategy = Retry(
-            total=self.config.retry_attempts,
-            backoff_factor=self.config.retry_backoff,
-            status_forcelist=[429, 500, 502, 503, 504]
-        )
-        
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-        
-        session.headers.update({
-            "User-Agent": self.config.user_agent
-        })
-        
-        return session
-
-    def _fetch_page(self, url: str) -> Optional[BeautifulSoup]:
-        """Fetch and parse a page, handling errors gracefully."""
+        """Return the process-wide queued scraper logger."""
+        return setup_logging()
+
+    def _setup_session(self):
+        """Configure the pooled keep-alive session with retry logic and headers."""
+        return create_session(self.config, self.logger)
+
+    def _fetch_page(self, url: str, raise_errors: bool = False) -> Optional[BeautifulSoup]:
+        """Fetch and parse a page, handling errors gracefully.
+
+        Failures are logged and give None, or raise FetchError with the cause
+        when `raise_errors` is set.
+        """
         try:
-            self.logger.info(f"Fetching: {url}")
-            response = self.session.get(url, timeout=self.config.timeout)
+            self.logger.info("Fetching: %s", url, extra={'url': url, 'sampled': True})
+            response = self.session.get(url, timeout=self.config.timeout, stream=True)
+            metrics.observe('fetch_ttfb', response.elapsed.total_seconds())
+            self._record_retries(response)
+            self._record_connection_stats()
+            if not response.ok:
+                # Release the streamed connection back to the pool before raising
+                response.close()
             response.raise_for_status()
-            return BeautifulSoup(response.text, 'html.parser')
+
+            start = perf_counter()
+            body = response.content
+            metrics.observe('fetch_download', perf_counter() - start)
+            metrics.inc('pages')
+            metrics.inc('bytes', len(body))
+
+            html = response.text
+            if self.config.save_pages_dir:
+                self._save_page(url, html)
+
+            with metrics.timer('parse_soup'):
+                return BeautifulSoup(html, 'html.parser')
         except requests.RequestException as e:
-            self.logger.error(f"Request failed for {url}: {str(e)}")
+            metrics.inc('errors')
+            self.logger.error("Request failed for %s: %s", url, e, extra={'url': url})
+            if raise_errors:
+                raise FetchError(f"Request failed: {e}") from e
             return None
         except Exception as e:
-            self.logger.error(f"Unexpected error for {url}: {str(e)}")
+            metrics.inc('errors')
+            self.logger.error("Unexpected error for %s: %s", url, e, extra={'url': url})
+            if raise_errors:
+                raise FetchError(f"Unexpected error: {e}") from e
             return None
         finally:
             sleep(self.config.delay)
 
+    def _save_page(self, url: str, html: str) -> None:
+        path = os.path.join(self.config.save_pages_dir, page_filename(url))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(html)
+
+    @staticmethod
+    def _record_retries(response: requests.Response) -> None:
+        """Count the retries urllib3 performed before this response."""
+        retries = getattr(getattr(response, 'raw', None), 'retries', None)
+        if retries is not None and retries.history:
+            metrics.inc('retries', len(retries.history))
+
+    def _record_connection_stats(self) -> None:
+        """Export pool reuse so we can confirm TLS handshakes aren't paid per page."""
+        stats = self.session.connection_stats()
+        reuse = 1 - stats['connections'] / stats['requests'] if stats['requests'] else 0.0
+        metrics.set_gauge('connections_opened', stats['connections'], 'HTTP connections opened by the session pool')
+        metrics.set_gauge('connection_reuse_ratio', reuse, 'Share of requests served on a reused connection')
+
+    def country_url(self, href: str) -> str:
+        """Absolute URL of a link found on one of the source's pages."""
+        return urljoin(self.base_url, href)
+
     def get_countries_list(self) -> List[str]:
         """Fetch list of country URLs."""
-        url = urljoin(self.config.base_url, "bin-list")
-        soup = self._fetch_page(url)
+        soup = self._fetch_page(self.country_url(self.source.country_list_path))
         if not soup:
             return []
 
-        container = soup.select_one(self.selectors['country_container'])
-        if not container:
-            self.logger.error("Country container not found")
+        links = self.source.country_links(soup)
+        if links is None:
+            self.logger.error("Country container not found for %s", self.source.name)
             return []
-
-        return [link.get('href') for link in container.find_all('a') if link.get('href')]
+        return links
 
     def get_country_banks(self, country_url: str) -> List[str]:
         """Fetch list of bank URLs for a specific country."""
@@ -115,37 +142,30 @@ class BinScraper:
         if not soup:
             return []
 
-        container = soup.select_one(self.selectors['country_container'])
-        if not container:
-            self.logger.error(f"Bank container not found for {country_url}")
+        links = self.source.bank_links(soup)
+        if links is None:
+            self.logger.error("Bank container not found for %s", country_url, extra={'url': country_url})
             return []
+        return [self.country_url(link) for link in links]
 
-        return [link.get('href') for link in container.find_all('a') if link.get('href')]
+    def get_bank_bins(self, bank_url: str) -> List[BinRecord]:
+        """Fetch the valid BIN records of a specific bank.
 
-    def get_bank_bins(self, bank_url: str) -> List[Dict]:
-        """Fetch BIN information for a specific bank."""
-        soup = self._fetch_page(bank_url)
-        if not soup:
-            return []
+        Raises FetchError when the page itself could not be fetched, so the
+        URL's last_error tells network failures from pages without BINs, and
+        TableLayoutError when the table's headers are no longer recognized.
+        """
+        soup = self._fetch_page(bank_url, raise_errors=True)
 
-        table = soup.select_one(self.selectors['bank_table'])
+        table = self.source.bank_table(soup)
         if not table:
-            self.logger.error(f"Bank table not found for {bank_url}")
+            self.logger.error("Bank table not found for %s", bank_url, extra={'url': bank_url})
             return []
 
-        return self._parse_bank_table(table)
-
-    def _parse_bank_table(self, table: BeautifulSoup) -> List[Dict]:
-        """Parse bank table into structured data."""
-        headers = [th.text.strip() for th in table.select("thead th")]
-        rows_data = []
-
-        for row in table.select("tbody tr"):
-            cells = row.find_all('td')
-            row_dict = {
-                header: cell.text.strip().replace('↗', '').strip()
-                for header, cell in zip(headers, cells)
-            }
-            rows_data.append(row_dict)
-
-        return rows_data
+        with metrics.timer('parse_table'):
+            records, rejected = split_valid(self.source.parse_bank_table(table))
+        if rejected:
+            metrics.inc('invalid_rows', len(rejected))
+            self.logger.warning("Skipped %d invalid rows from %s (first: %s)", len(rejected), bank_url,
+                                '; '.join(rejected[0].problems()), extra={'url': bank_url})
+        return records
@@ -0,0 +1,43 @@
+# bin_manager/scraper/sources/__init__.py
+"""Registry of the sites BINs are scraped from.
+
+A source is named by its registered name or, for plugins living outside
+this package, as module:Class. BIN_SOURCES lists the sources crawled by
+default, comma separated.
+"""
+import importlib
+import os
+from typing import List, Optional
+
+from bin_manager.scraper.sources.base import BinSource, TableLayoutError  # noqa: F401
+
+# Built-in sources, name -> module:Class, imported on demand
+SOURCES = {
+    'bincheck': 'bin_manager.scraper.sources.bincheck:BincheckSource',
+}
+
+DEFAULT_SOURCES = os.getenv('BIN_SOURCES', 'bincheck')
+
+
+def load_source(spec: str) -> BinSource:
+    """Instantiate a source from its registered name or a module:Class path."""
+    spec = spec.strip()
+    path = SOURCES.get(spec, spec)
+    if ':' not in path:
+        raise ValueError(f"Unknown source {spec!r} (known: {', '.join(sorted(SOURCES))}, or module:Class)")
+    module_name, attr = path.split(':')
+    source = getattr(importlib.import_module(module_name), attr)()
+    if not source.name:
+        raise ValueError(f"Source {spec!r} has no name")
+    return source
+
+
+def load_sources(specs: Optional[str] = None) -> List[BinSource]:
+    """Instantiate the comma-separated sources in `specs` (default: BIN_SOURCES)."""
+    sources = [load_source(spec) for spec in (specs or DEFAULT_SOURCES).split(',') if spec.strip()]
+    names = [source.name for source in sources]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Sources listed twice: {', '.join(names)}")
+    if not sources:
+        raise ValueError("No sources given")
+    return sources
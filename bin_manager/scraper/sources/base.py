@@ -0,0 +1,86 @@
+# bin_manager/scraper/sources/base.py
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+from bin_manager.records import FIELD_ALIASES, Aliases, BinRecord, header_positions, record_from_cells
+
+
+class TableLayoutError(ValueError):
+    """A bank table whose headers no longer map to every required record field."""
+
+
+def clean_cell(cell) -> str:
+    """Text of a table cell without the external-link arrow."""
+    return cell.text.strip().replace('↗', '').strip()
+
+
+class BinSource(ABC):
+    """A site BINs are scraped from: where its pages are and how to read them.
+
+    BinScraper does the fetching; a source only turns parsed pages into
+    country links, bank links and BinRecords. Subclasses set the class
+    attributes and implement the three *_links/bank_table hooks; a subclass
+    missing one fails when load_source instantiates it.
+    """
+
+    # Stored in bank_urls.source and bin_cards.source
+    name: str = ''
+    base_url: str = ''
+    # Page listing the countries, relative to base_url
+    country_list_path: str = ''
+    # When two sources list the same BIN in the same country, the higher priority wins
+    priority: int = 0
+    # Table header -> record field mapping (lowercased headers, like FIELD_ALIASES)
+    field_aliases: Aliases = FIELD_ALIASES
+    # Source country names -> the names already stored in bin_cards.pays
+    country_names: Dict[str, str] = {}
+
+    @abstractmethod
+    def country_links(self, soup: BeautifulSoup) -> Optional[List[str]]:
+        """Country page links of the country list page; None if the layout is not found."""
+
+    @abstractmethod
+    def bank_links(self, soup: BeautifulSoup) -> Optional[List[str]]:
+        """Bank page links of a country page; None if the layout is not found."""
+
+    @abstractmethod
+    def bank_table(self, soup: BeautifulSoup):
+        """The BIN table of a bank page, or None."""
+
+    def parse_bank_table(self, table) -> List[BinRecord]:
+        """Parse a bank table into normalized BinRecords, mapping its headers once.
+
+        Raises TableLayoutError naming the missing columns when the headers
+        do not cover the required fields, e.g. after the site changed layout.
+        """
+        headers = [th.text.strip() for th in table.select("thead th")]
+        try:
+            positions = header_positions(headers, self.field_aliases)
+        except ValueError as e:
+            raise TableLayoutError(
+                f"Unrecognized {self.name} table layout: {e} (headers: {', '.join(headers) or 'none'})"
+            ) from None
+        return [
+            self.normalize(record_from_cells([clean_cell(td) for td in tr.find_all('td')], positions))
+            for tr in table.select("tbody tr")
+        ]
+
+    def parse_bank_page(self, html: str) -> List[BinRecord]:
+        """Parse a saved bank page into BinRecords."""
+        table = self.bank_table(BeautifulSoup(html, 'html.parser'))
+        if table is None:
+            return []
+        return self.parse_bank_table(table)
+
+    def normalize(self, record: BinRecord) -> BinRecord:
+        """Bring a record to the store's conventions so sources merge on the same keys.
+
+        Whitespace is collapsed, BINs lose the spaces some sites group digits
+        with, and country names are translated through `country_names`.
+        """
+        record = BinRecord._make(' '.join(value.split()) if value else value for value in record)
+        bin_number = record.bin_number.replace(' ', '') if record.bin_number else record.bin_number
+        pays = self.country_names.get(record.pays, record.pays) if record.pays else record.pays
+        return record._replace(bin_number=bin_number, pays=pays)
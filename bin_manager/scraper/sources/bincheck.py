@@ -0,0 +1,41 @@
+# bin_manager/scraper/sources/bincheck.py
+from bin_manager.scraper.sources.base import BinSource
+
+# CSS selectors of the bincheck.io page layout
+SELECTORS = {
+    'country_container': (
+        "section.bg-white.dark\\:text-white.dark\\:bg-gray-900 > "
+        "section.py-20.antialiased.bg-white.dark\\:text-white.dark\\:bg-gray-900 > "
+        "div > div.grid"
+    ),
+    'bank_table': (
+        "section.bg-white.dark\\:text-white.dark\\:bg-gray-900 > "
+        "section.py-5.antialiased.bg-white.dark\\:text-white.dark\\:bg-gray-900 > "
+        "div > div > table"
+    )
+}
+
+
+class BincheckSource(BinSource):
+    """bincheck.io in French, the source the bin_cards columns are named after."""
+
+    name = 'bincheck'
+    base_url = "https://bincheck.io/fr"
+    country_list_path = "bin-list"
+    priority = 100
+
+    def _links(self, soup):
+        container = soup.select_one(SELECTORS['country_container'])
+        if not container:
+            return None
+        return [link.get('href') for link in container.find_all('a') if link.get('href')]
+
+    def country_links(self, soup):
+        return self._links(soup)
+
+    def bank_links(self, soup):
+        # Country pages list their banks in the same grid
+        return self._links(soup)
+
+    def bank_table(self, soup):
+        return soup.select_one(SELECTORS['bank_table'])
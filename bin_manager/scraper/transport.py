@@ -0,0 +1,138 @@
+import logging
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.packages.urllib3.util import make_headers
+from requests.packages.urllib3.util.retry import Retry
+
+# Optional HTTP/2 backend, used only when ScraperConfig.http2 is set
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# urllib3 advertises br/zstd only when the brotli/zstandard packages are installed
+ACCEPT_ENCODING = make_headers(accept_encoding=True)['accept-encoding']
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that reports how often pooled connections are reused."""
+
+    def connection_stats(self) -> Dict[str, int]:
+        connections = requests_sent = 0
+        pools = self.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            connections += pool.num_connections
+            requests_sent += pool.num_requests
+        return {'connections': connections, 'requests': requests_sent}
+
+
+class ScraperSession(requests.Session):
+    """requests.Session with a sized keep-alive pool and connection reuse stats."""
+
+    def __init__(self, config):
+        super().__init__()
+        retry_strategy = Retry(
+            total=config.retry_attempts,
+            backoff_factor=config.retry_backoff,
+            status_forcelist=[429, 500, 502, 503, 504]
+        )
+        self.adapter = PooledHTTPAdapter(
+            pool_connections=config.pool_size,
+            pool_maxsize=config.pool_size,
+            max_retries=retry_strategy
+        )
+        self.mount("http://", self.adapter)
+        self.mount("https://", self.adapter)
+        self.headers.update({
+            "User-Agent": config.user_agent,
+            "Accept-Encoding": ACCEPT_ENCODING,
+            "Connection": "keep-alive"
+        })
+
+    def connection_stats(self) -> Dict[str, int]:
+        return self.adapter.connection_stats()
+
+
+def _to_requests_response(response) -> requests.Response:
+    """Copy a fully read httpx response into a requests.Response.
+
+    The scraper then sees the same .ok, .raise_for_status() (raising
+    requests.HTTPError), .text and .elapsed on both transports.
+    """
+    converted = requests.Response()
+    converted.status_code = response.status_code
+    converted.reason = response.reason_phrase
+    converted.headers = CaseInsensitiveDict(response.headers)
+    converted.url = str(response.url)
+    converted.encoding = response.encoding
+    converted.elapsed = response.elapsed
+    converted._content = response.content
+    # Nothing left to stream, so close() has no raw connection to release
+    converted._content_consumed = True
+    return converted
+
+
+class Http2Session:
+    """Minimal requests-like wrapper around an httpx client multiplexing over HTTP/2.
+
+    Responses and errors are translated to their requests counterparts.
+    httpx only retries failed connection attempts, not 429/5xx responses.
+    """
+
+    def __init__(self, config):
+        limits = httpx.Limits(
+            max_connections=config.pool_size,
+            max_keepalive_connections=config.pool_size
+        )
+        self.client = httpx.Client(
+            http2=True,
+            limits=limits,
+            transport=httpx.HTTPTransport(http2=True, retries=config.retry_attempts, limits=limits),
+            headers={"User-Agent": config.user_agent, "Accept-Encoding": ACCEPT_ENCODING},
+            follow_redirects=True
+        )
+        self.requests_sent = 0
+        self.connections_opened = 0
+
+    def _trace(self, event_name: str, info: Dict) -> None:
+        # httpcore reports every TCP connection it opens, like urllib3's num_connections
+        if event_name.endswith('connect_tcp.complete'):
+            self.connections_opened += 1
+
+    def get(self, url: str, timeout: float = None, stream: bool = False) -> requests.Response:
+        # httpx reads the body eagerly; `stream` is accepted for API parity
+        self.requests_sent += 1
+        try:
+            response = self.client.get(url, timeout=timeout, extensions={'trace': self._trace})
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(e) from e
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(e) from e
+        except httpx.HTTPError as e:
+            raise requests.RequestException(e) from e
+        return _to_requests_response(response)
+
+    def connection_stats(self) -> Dict[str, int]:
+        return {'connections': self.connections_opened, 'requests': self.requests_sent}
+
+    def close(self):
+        self.client.close()
+
+
+def create_session(config, logger: logging.Logger):
+    """Build the HTTP session described by `config`."""
+    if config.http2:
+        if httpx is not None:
+            try:
+                return Http2Session(config)
+            except ImportError:
+                # httpx is installed without the h2 extra
+                pass
+        logger.warning("HTTP/2 requested but httpx[http2] is not installed, using HTTP/1.1")
+    return ScraperSession(config)